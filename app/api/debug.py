@@ -0,0 +1,72 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, Response
+from app.config.settings import app_config
+from app.utils.profiling import profile_store, to_collapsed, to_speedscope
+from app.utils.response import create_success_response
+from app.utils.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+async def require_debug_access(x_debug_token: Optional[str] = Header(None)) -> None:
+    """Debug routes need PROFILING_TOKEN; without a token they are only open outside production"""
+    token = app_config.profiling_token
+    if token:
+        if x_debug_token is None or not hmac.compare_digest(x_debug_token, token):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid debug token")
+    elif app_config.is_production:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Debug routes are disabled")
+
+
+@router.get(
+    "/debug/profiles",
+    tags=["Debug"],
+    summary="List aggregated profiles",
+    dependencies=[Depends(require_debug_access)]
+)
+async def list_profiles():
+    """Rutas perfiladas con número de requests y muestras"""
+    return create_success_response(
+        data=profile_store.summary(),
+        message="Profiles retrieved successfully"
+    )
+
+
+@router.get(
+    "/debug/profiles/stacks",
+    tags=["Debug"],
+    summary="Get aggregated stacks for a route",
+    dependencies=[Depends(require_debug_access)]
+)
+async def get_profile(
+    route: str = Query(..., description='Route key, e.g. "GET /api/{seller_id}/users"'),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$", description="Output format")
+):
+    """Perfil agregado de una ruta en formato collapsed o speedscope"""
+    stacks = profile_store.get(route)
+    if stacks is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+
+    if format == "speedscope":
+        return Response(
+            content=to_speedscope(route, stacks, app_config.profiling_interval_ms),
+            media_type="application/json"
+        )
+    return PlainTextResponse(to_collapsed(stacks))
+
+
+@router.delete(
+    "/debug/profiles",
+    tags=["Debug"],
+    summary="Clear aggregated profiles",
+    dependencies=[Depends(require_debug_access)]
+)
+async def clear_profiles():
+    """Elimina los perfiles agregados"""
+    profile_store.clear()
+    return create_success_response(
+        data={"cleared": True},
+        message="Profiles cleared successfully"
+    )
@@ -3,10 +3,11 @@ from app.config.settings import app_config, db_config
 from app.schemas.response import StandardResponse
 from app.utils.response import create_success_response
 from app.utils.logger import logger
+from app.utils.timing import TimedRoute
 from pydantic import BaseModel
 from typing import Optional
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 settings = app_config
 
@@ -29,7 +30,7 @@ async def health_check():
     logger.info(
         "Health check requested",
         extra={
-            "extra_data": {"endpoint": "/health", "environment": settings.environment}
+            "extra_data": lambda: {"endpoint": "/health", "environment": settings.environment}
         },
     )
 
@@ -71,7 +72,7 @@ async def health_check():
     logger.info(
         "Health check completed",
         extra={
-            "extra_data": {
+            "extra_data": lambda: {
                 "status": overall_status,
                 "environment": settings.environment,
                 "is_lambda": settings.is_lambda,
@@ -2,9 +2,10 @@ from fastapi import APIRouter, Request, Depends
 from app.schemas.response import StandardResponse
 from app.middleware.auth import get_auth_context, get_current_user_id, get_current_user_email, get_current_store
 from app.utils.response import create_success_response
+from app.utils.timing import TimedRoute
 from typing import Dict, Any
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get(
@@ -0,0 +1,35 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from app.config.settings import app_config
+from app.core.metrics import registry
+from app.utils.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+async def require_metrics_access(authorization: Optional[str] = Header(None)) -> None:
+    """/metrics needs METRICS_TOKEN as a bearer token; without a token it is only open outside production"""
+    token = app_config.metrics_token
+    if token:
+        if authorization is None or not hmac.compare_digest(authorization, f"Bearer {token}"):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid metrics token")
+    elif app_config.is_production:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Metrics endpoint is disabled")
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(require_metrics_access)]
+)
+async def metrics():
+    """
+    Exposición de métricas en formato de texto de Prometheus
+    """
+    return PlainTextResponse(
+        registry.expose(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,26 +1,37 @@
-from fastapi import APIRouter, status, Depends
+from typing import List, Optional
+from fastapi import APIRouter, status, Depends, Header, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
 from app.schemas.response import StandardResponse, ResponseMetadata
 from app.schemas.users import (
     UserCreateRequest,
     UserUpdateRequest,
     UserResponse,
-    UserListResponse
+    UserListResponse,
+    UserLookupRequest,
+    UserUpsertRequest
 )
 from app.schemas.common import PaginatedResponse
 from app.services.users import UserService
 from app.dependencies.common import (
     validate_seller_id,
     validate_user_id,
+    validate_user_ids,
+    validate_email,
     get_pagination_params,
     get_search_params,
     PaginationParams,
     SearchParams
 )
+from app.dependencies.rate_limit import enforce_seller_rate_limit
+from app.dependencies.idempotency import get_idempotency_key, idempotent_response
 from app.utils.response import create_success_response, create_fast_response, create_paginated_response
 from app.config.settings import app_config
+from app.core.generations import seller_generations
+from app.utils.sync_token import encode_sync_token, decode_sync_token
+from app.utils.etag import CACHE_CONTROL, user_etag, list_etag, etag_matches, not_modified_response
+from app.utils.timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute, dependencies=[Depends(enforce_seller_rate_limit)])
 
 
 @router.post(
@@ -33,10 +44,28 @@ router = APIRouter()
     description="Create a new user for the specified seller"
 )
 async def create_user(
+    request: Request,
+    response: Response,
     user_data: UserCreateRequest,
-    seller_id: int = Depends(validate_seller_id)
+    seller_id: int = Depends(validate_seller_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
-    """Create a new user"""
+    """Create a new user (retries with the same Idempotency-Key replay the first response)"""
+    if idempotency_key is None:
+        return await _create_user(seller_id, user_data)
+
+    return await idempotent_response(
+        request,
+        response,
+        seller_id,
+        idempotency_key,
+        status.HTTP_201_CREATED,
+        lambda: _create_user(seller_id, user_data)
+    )
+
+
+async def _create_user(seller_id: int, user_data: UserCreateRequest):
+    """Create the user and build the response content"""
     user_doc = await UserService.create_user_fast(seller_id, user_data)
 
     if app_config.validate_responses:
@@ -53,6 +82,119 @@ async def create_user(
         )
 
 
+async def _multi_get_response(seller_id: int, user_ids: List[str]):
+    """Users in request order; ids without a match (or owned by another seller) are marked not found"""
+    user_docs = await UserService.get_users_by_ids_fast(seller_id, user_ids)
+    data = []
+    for user_id in user_ids:
+        user_doc = user_docs.get(user_id)
+        if user_doc is None:
+            data.append({"id": user_id, "found": False})
+        else:
+            data.append({"id": user_id, "found": True, "user": UserResponse.from_dict_fast(user_doc)})
+
+    return create_fast_response(
+        data=data,
+        message=f"{len(user_docs)} of {len(user_ids)} users found"
+    )
+
+
+@router.post(
+    "/api/{seller_id}/users/lookup",
+    tags=["Users"],
+    summary="Get users by IDs",
+    description="Fetch many users in one request; results follow the order of the requested IDs"
+)
+async def lookup_users(
+    lookup: UserLookupRequest,
+    seller_id: int = Depends(validate_seller_id)
+):
+    """Multi-get by ID (body variant, for long ID lists)"""
+    user_ids = validate_user_ids(lookup.ids, app_config.multi_get_max_ids)
+    return await _multi_get_response(seller_id, user_ids)
+
+
+# Declared before /users/{user_id} so "lookup" is not taken as a user id
+@router.get(
+    "/api/{seller_id}/users/lookup",
+    tags=["Users"],
+    summary="Find users by email or phone",
+    description="Exact match on the normalized email (case-insensitive) or the phone in E.164 form"
+)
+async def lookup_users_by_contact(
+    seller_id: int = Depends(validate_seller_id),
+    email: Optional[str] = Query(None, max_length=254, description="Email, any casing"),
+    phone: Optional[str] = Query(None, max_length=20, description="Phone number, E.164 or national")
+):
+    """Contact lookup backed by the (seller_id, email_normalized) and (seller_id, phone_e164) indexes"""
+    if (email is None) == (phone is None):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provide exactly one of email or phone")
+
+    users = await UserService.lookup_users_by_contact_fast(seller_id, email=email, phone=phone)
+
+    return create_fast_response(
+        data=[UserResponse.from_dict_fast(user) for user in users],
+        message=f"{len(users)} users found"
+    )
+
+
+# Declared before /users/{user_id} so "changes" is not taken as a user id
+@router.get(
+    "/api/{seller_id}/users/changes",
+    tags=["Users"],
+    summary="List user changes",
+    description="Users created, updated or soft-deleted after a sync token, in (updated_at, id) order"
+)
+async def list_user_changes(
+    seller_id: int = Depends(validate_seller_id),
+    since: Optional[str] = Query(None, description="Token from a previous response; omit for an initial full sync"),
+    limit: int = Query(100, ge=1, le=app_config.changes_max_limit, description="Maximum changes per response")
+):
+    """Delta sync: page through changes with the returned next_token until has_more is false"""
+    watermark = None
+    if since:
+        try:
+            watermark = decode_sync_token(since)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token")
+
+    users, has_more = await UserService.list_user_changes(seller_id, watermark, limit)
+
+    # Without new changes the client keeps its current token
+    next_token = encode_sync_token(users[-1]["updated_at"], users[-1]["_id"]) if users else since
+
+    response = create_fast_response(
+        data=[UserResponse.from_dict_fast(user) for user in users],
+        message="User changes retrieved successfully"
+    )
+    response["sync"] = {"next_token": next_token, "has_more": has_more}
+    return response
+
+
+@router.put(
+    "/api/{seller_id}/users/by-email/{email}",
+    tags=["Users"],
+    summary="Create or update user by email",
+    description="Upsert a user on its natural key (seller, email): 201 when created, 200 when updated"
+)
+async def upsert_user_by_email(
+    response: Response,
+    user_data: UserUpsertRequest,
+    seller_id: int = Depends(validate_seller_id),
+    email: str = Depends(validate_email)
+):
+    """Single round-trip create-or-update (safe to retry)"""
+    user_doc, created = await UserService.upsert_user_by_email_fast(seller_id, email, user_data)
+
+    if created:
+        response.status_code = status.HTTP_201_CREATED
+
+    return create_fast_response(
+        data={"created": created, "user": UserResponse.from_dict_fast(user_doc)},
+        message="User created successfully" if created else "User updated successfully"
+    )
+
+
 @router.get(
     "/api/{seller_id}/users/{user_id}",
     response_model=StandardResponse[UserResponse] if app_config.validate_responses else None,
@@ -62,12 +204,22 @@ async def create_user(
     description="Retrieve a specific user by their ID"
 )
 async def get_user(
+    response: Response,
     seller_id: int = Depends(validate_seller_id),
-    user_id: str = Depends(validate_user_id)
+    user_id: str = Depends(validate_user_id),
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get user by ID"""
+    """Get user by ID (304 when If-None-Match matches the current ETag)"""
     user_doc = await UserService.get_user_by_id_fast(seller_id, user_id)
 
+    if app_config.etag_enabled:
+        etag = user_etag(user_doc)
+        # Short-circuit before any serialization
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+
     if app_config.validate_responses:
         user = UserResponse.from_dict(user_doc)
         return create_success_response(
@@ -84,7 +236,7 @@ async def get_user(
 
 @router.put(
     "/api/{seller_id}/users/{user_id}",
-    response_model=StandardResponse[UserResponse],
+    response_model=StandardResponse[UserResponse] if app_config.validate_responses else None,
     response_model_exclude_none=True,
     tags=["Users"],
     summary="Update user",
@@ -94,19 +246,27 @@ async def update_user(
     user_data: UserUpdateRequest,
     seller_id: int = Depends(validate_seller_id),
     user_id: str = Depends(validate_user_id)
-) -> StandardResponse[UserResponse]:
+):
     """Update user"""
-    user = await UserService.update_user(seller_id, user_id, user_data)
+    user_doc = await UserService.update_user_fast(seller_id, user_id, user_data)
 
-    return create_success_response(
-        data=user,
-        message="User updated successfully"
-    )
+    if app_config.validate_responses:
+        user = UserResponse.from_dict(user_doc)
+        return create_success_response(
+            data=user,
+            message="User updated successfully"
+        )
+    else:
+        # Fast path: bypass Pydantic validation
+        return create_fast_response(
+            data=UserResponse.from_dict_fast(user_doc),
+            message="User updated successfully"
+        )
 
 
 @router.delete(
     "/api/{seller_id}/users/{user_id}",
-    response_model=StandardResponse[dict],
+    response_model=StandardResponse[dict] if app_config.validate_responses else None,
     response_model_exclude_none=True,
     tags=["Users"],
     summary="Delete user",
@@ -115,14 +275,21 @@ async def update_user(
 async def delete_user(
     seller_id: int = Depends(validate_seller_id),
     user_id: str = Depends(validate_user_id)
-) -> StandardResponse[dict]:
+):
     """Delete user (soft delete)"""
     await UserService.delete_user(seller_id, user_id)
 
-    return create_success_response(
-        data={"deleted": True},
-        message="User deleted successfully"
-    )
+    if app_config.validate_responses:
+        return create_success_response(
+            data={"deleted": True},
+            message="User deleted successfully"
+        )
+    else:
+        # Fast path: bypass Pydantic validation
+        return create_fast_response(
+            data={"deleted": True},
+            message="User deleted successfully"
+        )
 
 
 @router.get(
@@ -132,11 +299,28 @@ async def delete_user(
     description="Get a paginated list of users with optional search and filtering"
 )
 async def list_users(
+    response: Response,
     seller_id: int = Depends(validate_seller_id),
     pagination: PaginationParams = Depends(get_pagination_params),
-    search: SearchParams = Depends(get_search_params)
+    search: SearchParams = Depends(get_search_params),
+    if_none_match: Optional[str] = Header(None),
+    ids: Optional[str] = Query(None, description="Comma-separated user IDs: multi-get instead of listing")
 ):
-    """List users with pagination and search"""
+    """List users with pagination and search (304 when the seller's data has not changed)"""
+    if ids is not None:
+        user_ids = validate_user_ids([user_id.strip() for user_id in ids.split(",") if user_id.strip()], app_config.multi_get_max_ids)
+        return await _multi_get_response(seller_id, user_ids)
+
+    # Generation is usually cached, so a matching poll never reaches the users collection.
+    # It is the newest write stamp (set by the write itself), None while that write settles
+    generation = await seller_generations.get(seller_id) if app_config.etag_enabled else None
+    if generation is not None:
+        etag = list_etag(seller_id, generation, pagination.page, pagination.page_size, search.search, search.is_active)
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+
     users_response = await UserService.list_users(seller_id, pagination, search)
 
     # Use reusable paginated response utility
@@ -1,5 +1,5 @@
 from .base import BaseConfig
-from typing import Optional
+from typing import Optional, Dict, List
 import os
 
 
@@ -12,12 +12,118 @@ class AppConfig(BaseConfig):
     debug: bool = False
     environment: str = "production"
     log_level: str = "INFO"
+    log_queue_enabled: bool = False  # Format/write logs on a background thread
+    log_queue_size: int = 10000
+    log_queue_overflow: str = "drop_newest"  # drop_newest | drop_oldest | block
+    # Per-message sampling/rate limits, e.g. {"Health check requested": 0.01}
+    log_sample_rates: Dict[str, float] = {}
+    log_rate_limits: Dict[str, float] = {}  # records per second per message
+    # Resources that fail to start (e.g. MongoDB unreachable) are retried with exponential backoff (ASGI lifespan)
+    startup_retry_initial_seconds: float = 1.0
+    startup_retry_max_seconds: float = 30.0
 
     # Documentation settings
     enable_docs: bool = True
 
     # Performance settings
     validate_responses: bool = True  # Set to False in production for faster responses
+    server_timing_header: Optional[bool] = None  # None = enabled outside production
+    request_timing_log_sample_rate: float = 0.01  # Fraction of requests logging their phase timings
+    client_error_log_sample_rate: float = 0.1  # Fraction of 4xx responses logged (5xx always logged)
+    metrics_enabled: bool = True  # In-process metrics registry and /metrics endpoint
+    metrics_token: Optional[str] = None  # Bearer token for /metrics (mandatory in production)
+
+    # Per-seller rate limiting for /api/{seller_id}/users routes
+    rate_limit_enabled: bool = False  # Opt-in: the default tier caps every seller at 20 rps / burst 40
+    rate_limit_tiers: Dict[str, List[float]] = {"standard": [20.0, 40.0], "premium": [100.0, 200.0]}  # [rate/s, burst]
+    rate_limit_default_tier: str = "standard"
+    rate_limit_seller_tiers: Dict[int, str] = {}  # seller_id -> tier name
+    rate_limit_by_subject: bool = False  # Also limit per authorizer "sub"
+    rate_limit_idle_ttl_seconds: float = 300.0
+    rate_limit_max_keys: int = 10000
+
+    # Per-request deadline applied to MongoDB operations (pymongo.timeout)
+    request_deadline_enabled: bool = True
+    request_budget_seconds: float = 29.0  # API Gateway integration timeout; capped by Lambda remaining time
+    request_deadline_margin_ms: int = 250  # Reserved to serialize and return the response
+
+    # User search: prefix (typeahead on search_keys) | text (legacy $text)
+    # Switch to prefix only after deployment/backfill_search_keys.py and the sync_indexes run:
+    # prefix queries hint the search_keys index and miss users without search_keys
+    user_search_mode: str = "text"
+    search_index_sellers: List[int] = []  # Hot sellers answered from an in-process index (prefix mode)
+    search_index_memory_mb: int = 64  # Budget for all in-process indexes (LRU eviction of whole sellers)
+    search_index_build_backoff_seconds: float = 30.0  # Wait after a failed or oversized build; doubles per failure, up to 1 h
+
+    # Email Bloom filters: definite misses skip the MongoDB lookup
+    email_filter_sellers: List[int] = []  # Sellers with an in-process filter (empty = disabled)
+    email_filter_false_positive_rate: float = 0.01
+    email_filter_max_kb: int = 1024  # Per seller; caps the filter size (the rate rises beyond capacity)
+    email_filter_snapshots_collection: str = "email_filter_snapshots"
+
+    # Multi-get (GET /api/{seller_id}/users?ids=... and POST /api/{seller_id}/users/lookup)
+    multi_get_max_ids: int = 100
+
+    # Contact lookup (GET /api/{seller_id}/users/lookup?email=|phone=)
+    phone_default_country_code: str = "52"  # Prepended to national numbers when normalizing to E.164
+    contact_lookup_limit: int = 50
+
+    # Delta sync (GET /api/{seller_id}/users/changes)
+    changes_settle_seconds: float = 2.0  # Hold back changes this recent (in-flight writes / clock skew)
+    changes_max_limit: int = 1000
+
+    # list_users result-page cache (invalidated by the per-seller generation)
+    list_cache_enabled: bool = True
+    list_cache_max_entries: int = 1000
+    list_cache_max_mb: int = 32
+
+    # Conditional GET (ETag / If-None-Match) on user routes
+    etag_enabled: bool = True
+    seller_generation_cache_ttl_seconds: float = 1.0  # Max staleness of list ETags across instances
+    seller_generation_settle_seconds: float = 2.0  # Generations younger than this are not trusted (in-flight writes / clock skew)
+
+    # Idempotency-Key support on create routes
+    idempotency_enabled: bool = True
+    idempotency_store: str = "mongodb"  # mongodb (shared across instances) | memory (single process: dev/tests only)
+    idempotency_collection: str = "idempotency_keys"
+    idempotency_ttl_seconds: float = 86400.0
+    idempotency_lock_seconds: float = 30.0  # In-flight claims older than this can be taken over
+    idempotency_wait_seconds: float = 5.0  # Duplicates wait this long for the in-flight attempt
+    idempotency_max_keys: int = 10000  # In-memory store bound (in-flight claims are never evicted)
+
+    # Adaptive concurrency limit around database calls (load shedding with 503)
+    db_concurrency_limit_enabled: bool = True
+    db_concurrency_initial_limit: int = 8
+    db_concurrency_min_limit: int = 1
+    db_concurrency_max_limit: int = 64
+    db_concurrency_latency_tolerance: float = 2.0  # Back off when short-term latency > tolerance x baseline
+    db_concurrency_backoff_ratio: float = 0.9
+    db_concurrency_retry_after_seconds: int = 1
+
+    # On-demand profiling (middleware and /debug/profiles only exist when enabled)
+    profiling_enabled: bool = False
+    profiling_header: str = "x-profile"  # Request header that asks for a profile
+    profiling_token: Optional[str] = None  # Required header value and debug token (mandatory in production)
+    profiling_sample_rate: float = 0.0  # Fraction of requests profiled without the header
+    profiling_interval_ms: float = 1.0
+    profiling_format: str = "collapsed"  # collapsed | speedscope
+    profiling_output_dir: str = "/tmp/profiles"
+
+    # CloudWatch Embedded Metric Format (one line per Lambda invocation)
+    emf_enabled: bool = True
+    emf_namespace: str = "FastAPIApp"
+    emf_dimensions: List[str] = ["Route"]  # Other keys (e.g. SellerId) are logged as properties
+
+    # Container server settings (app/local_server.py --prod)
+    server_host: str = "0.0.0.0"
+    server_port: int = 8081
+    server_workers: int = 0  # 0 = derive from available CPUs
+    server_graceful_timeout: int = 30  # Seconds to drain in-flight requests on SIGTERM
+    server_keep_alive: int = 5
+
+    # Lambda warmer settings
+    lambda_warmer_marker: str = "warmer"  # Key in the event payload that flags a keep-warm ping
+    lambda_warmer_warm_pool: bool = True  # Ping MongoDB on warmer events to keep pooled sockets alive
 
     @property
     def is_development(self) -> bool:
@@ -27,6 +133,13 @@ class AppConfig(BaseConfig):
     def is_production(self) -> bool:
         return self.environment.lower() in ["production", "prod"]
 
+    @property
+    def server_timing_enabled(self) -> bool:
+        """Emit Server-Timing headers (explicit setting wins, otherwise off in production)"""
+        if self.server_timing_header is not None:
+            return self.server_timing_header
+        return not self.is_production
+
     @property
     def is_lambda(self) -> bool:
         """Detect if running in AWS Lambda environment"""
@@ -8,12 +8,16 @@ class DatabaseConfig(BaseConfig):
     # MongoDB Atlas Configuration
     mongodb_url: Optional[str] = None
     mongodb_database_name: str = "fastapi_app"
-    mongodb_min_pool_size: int = 0
-    mongodb_max_pool_size: int = 100
     mongodb_max_idle_time_ms: int = 30000
     mongodb_server_selection_timeout_ms: int = 5000
     mongodb_connect_timeout_ms: int = 10000
-    mongodb_socket_timeout_ms: int = 20000
+    mongodb_socket_timeout_ms: int = 5000  # Also caps the per-operation timeout under a request deadline
+
+    # Per-process pool sizing (one client per Lambda container / server worker).
+    # Single source of truth: passed to MongoClient, not to the connection string.
+    mongodb_worker_max_pool_size: int = 2  # Lambda: max 1-2 concurrent requests
+    mongodb_worker_min_pool_size: int = 1  # Keep 1 connection warm
+    mongodb_executor_max_workers: int = 4
 
     # Connection retry settings
     mongodb_retry_writes: bool = True
@@ -32,8 +36,6 @@ class DatabaseConfig(BaseConfig):
         params = []
         params.append(f"retryWrites={str(self.mongodb_retry_writes).lower()}")
         params.append(f"retryReads={str(self.mongodb_retry_reads).lower()}")
-        params.append(f"maxPoolSize={self.mongodb_max_pool_size}")
-        params.append(f"minPoolSize={self.mongodb_min_pool_size}")
         params.append(f"maxIdleTimeMS={self.mongodb_max_idle_time_ms}")
         params.append(f"serverSelectionTimeoutMS={self.mongodb_server_selection_timeout_ms}")
         params.append(f"connectTimeoutMS={self.mongodb_connect_timeout_ms}")
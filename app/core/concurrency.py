@@ -0,0 +1,84 @@
+"""
+Adaptive concurrency limiting for the PyMongo executor
+Gradient-style AIMD: the limit grows additively while short-term DB latency
+stays close to the long-term baseline, and shrinks multiplicatively when it
+degrades or operations time out. Requests over the limit are rejected at
+once (503 + Retry-After) instead of queuing behind a slow database.
+"""
+from fastapi import HTTPException, status
+
+
+class ServiceOverloadedError(HTTPException):
+    """Raised when the adaptive limit rejects work; rendered as 503 with Retry-After"""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service temporarily overloaded, retry later",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit driven by observed latency.
+    Only used from the event loop thread, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        tolerance: float = 2.0,
+        backoff_ratio: float = 0.9,
+        short_alpha: float = 0.2,
+        long_alpha: float = 0.01
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.tolerance = tolerance
+        self.backoff_ratio = backoff_ratio
+        self.short_alpha = short_alpha
+        self.long_alpha = long_alpha
+        self.inflight = 0
+        self.short_latency = 0.0
+        self.long_latency = 0.0
+
+    def try_acquire(self) -> bool:
+        """Admit one operation if below the current limit"""
+        if self.inflight >= int(self.limit):
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self, latency: float, dropped: bool = False) -> None:
+        """
+        Record the outcome of an admitted operation.
+
+        Args:
+            latency: Wall time from admission to completion (seconds), queue wait included
+            dropped: True for timeouts/connection failures (always backs off)
+        """
+        was_saturated = self.inflight >= int(self.limit)
+        self.inflight -= 1
+
+        if dropped:
+            self._decrease()
+            return
+
+        if self.long_latency == 0.0:
+            self.short_latency = self.long_latency = latency
+        else:
+            self.short_latency += self.short_alpha * (latency - self.short_latency)
+            self.long_latency += self.long_alpha * (latency - self.long_latency)
+
+        if self.short_latency > self.long_latency * self.tolerance:
+            self._decrease()
+        elif was_saturated or self.inflight >= self.limit / 2:
+            # Additive increase (~ +1 per limit's worth of successful operations)
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _decrease(self) -> None:
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
@@ -1,9 +1,25 @@
 import asyncio
+import time
 from concurrent.futures import ThreadPoolExecutor
+import pymongo
 from pymongo import MongoClient
 from pymongo.database import Database
-from app.config.settings import db_config
+from pymongo.errors import ConnectionFailure, ExecutionTimeout, PyMongoError
+from app.config.settings import app_config, db_config
+from app.core.concurrency import AdaptiveConcurrencyLimiter, ServiceOverloadedError
+from app.core.deadline import DeadlineExceededError, current_deadline, remaining_seconds
+from app.core.metrics import (
+    CommandMetricsListener,
+    PoolMetricsListener,
+    executor_queue_depth,
+    executor_threads,
+    executor_active_tasks,
+    db_concurrency_limit,
+    db_concurrency_inflight,
+    db_concurrency_rejections_total
+)
 from app.utils.logger import logger
+from app.utils.timing import current_timings
 from typing import Optional
 
 # Global database instances
@@ -11,10 +27,38 @@ client: Optional[MongoClient] = None
 database: Optional[Database] = None
 executor: Optional[ThreadPoolExecutor] = None
 
+# Tolerance when attributing a PyMongo timeout to the request deadline
+# (client-side timeouts may fire up to one round trip early)
+DEADLINE_SLACK_SECONDS = 0.1
+
+# Adaptive admission control for executor work (None when disabled)
+concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = AdaptiveConcurrencyLimiter(
+    initial_limit=app_config.db_concurrency_initial_limit,
+    min_limit=app_config.db_concurrency_min_limit,
+    max_limit=app_config.db_concurrency_max_limit,
+    tolerance=app_config.db_concurrency_latency_tolerance,
+    backoff_ratio=app_config.db_concurrency_backoff_ratio
+) if app_config.db_concurrency_limit_enabled else None
+
+
+def init_executor() -> None:
+    """Initialize the thread pool executor used for PyMongo calls"""
+    global executor
+
+    if executor is None:
+        executor = ThreadPoolExecutor(
+            max_workers=db_config.mongodb_executor_max_workers,
+            thread_name_prefix="pymongo"
+        )
+
 
 def init_database() -> None:
     """Initialize MongoDB connection (sync)"""
-    global client, database, executor
+    global client, database
+
+    if client is not None:
+        # Already initialized (e.g. by a warmer invocation)
+        return
 
     try:
         if not db_config.mongodb_url:
@@ -23,21 +67,22 @@ def init_database() -> None:
 
         logger.info("Initializing MongoDB connection", extra={"extra_data": {
             "database_name": db_config.mongodb_database_name,
-            "min_pool_size": db_config.mongodb_min_pool_size,
-            "max_pool_size": db_config.mongodb_max_pool_size
+            "min_pool_size": db_config.mongodb_worker_min_pool_size,
+            "max_pool_size": db_config.mongodb_worker_max_pool_size,
+            "executor_workers": db_config.mongodb_executor_max_workers
         }})
 
         # Create MongoDB client optimized for Lambda/high-performance
         client = MongoClient(
             db_config.connection_string,
-            # Lambda-optimized pool settings
-            maxPoolSize=2,  # Lambda: max 1-2 concurrent requests
-            minPoolSize=1,  # Keep 1 connection warm
+            # Per-worker pool settings (Lambda defaults: 2/1)
+            maxPoolSize=db_config.mongodb_worker_max_pool_size,
+            minPoolSize=db_config.mongodb_worker_min_pool_size,
             maxIdleTimeMS=60000,  # 1 minute (typical Lambda lifecycle)
             # Aggressive timeouts for faster failures
             serverSelectionTimeoutMS=2000,  # 2 seconds vs 5 seconds
             connectTimeoutMS=3000,  # 3 seconds vs 10 seconds
-            socketTimeoutMS=5000,   # 5 seconds vs 20 seconds
+            socketTimeoutMS=db_config.mongodb_socket_timeout_ms,  # 5 seconds by default
             # Performance optimizations
             retryWrites=False,  # Skip retries in Lambda (fail fast)
             retryReads=False,   # Skip read retries
@@ -45,14 +90,16 @@ def init_database() -> None:
             readPreference="primary",  # No secondary reads
             # Connection efficiency
             maxConnecting=1,  # Only 1 connection attempt at a time
-            waitQueueTimeoutMS=1000  # Fast queue timeout
+            waitQueueTimeoutMS=1000,  # Fast queue timeout
+            # Command latency / pool checkout metrics
+            event_listeners=[CommandMetricsListener(), PoolMetricsListener()] if app_config.metrics_enabled else None
         )
 
         # Get database
         database = client[db_config.mongodb_database_name]
 
         # Initialize thread pool executor for async operations
-        executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pymongo")
+        init_executor()
 
         # Test connection
         client.admin.command('ping')
@@ -66,19 +113,30 @@ def init_database() -> None:
             "error": str(e),
             "database_name": db_config.mongodb_database_name
         }})
+        # Reset so the next init attempt starts from scratch
+        if client is not None:
+            client.close()
+        client = None
+        database = None
         raise
 
 
-def close_database() -> None:
-    """Close MongoDB connection"""
-    global client, executor
+def close_client() -> None:
+    """Close MongoDB client"""
+    global client, database
 
     if client:
         logger.info("Closing MongoDB connection")
         client.close()
         client = None
+        database = None
         logger.info("MongoDB connection closed")
 
+
+def shutdown_executor() -> None:
+    """Shut down the thread pool executor, waiting for in-flight operations"""
+    global executor
+
     if executor:
         logger.info("Shutting down thread pool executor")
         executor.shutdown(wait=True)
@@ -86,6 +144,12 @@ def close_database() -> None:
         logger.info("Thread pool executor shut down")
 
 
+def close_database() -> None:
+    """Close MongoDB connection and executor"""
+    shutdown_executor()
+    close_client()
+
+
 def get_database() -> Database:
     """Get database instance"""
     if database is None:
@@ -108,10 +172,125 @@ def get_executor() -> ThreadPoolExecutor:
 
 
 async def run_in_executor(func, *args):
-    """Run sync function in thread pool executor"""
+    """
+    Run sync function in thread pool executor.
+    Admission goes through the adaptive concurrency limiter: when the limit is
+    reached the call fails fast with ServiceOverloadedError (503) instead of queuing.
+    """
+    limiter = concurrency_limiter
+    if limiter is None:
+        return await run_in_executor_unlimited(func, *args)
+
+    if not limiter.try_acquire():
+        db_concurrency_rejections_total.inc()
+        raise ServiceOverloadedError(retry_after=app_config.db_concurrency_retry_after_seconds)
+
+    started = time.perf_counter()
+    dropped = False
+    try:
+        return await run_in_executor_unlimited(func, *args)
+    except (ConnectionFailure, ExecutionTimeout):
+        # Timeouts / pool wait failures are the overload signal: back off
+        dropped = True
+        raise
+    finally:
+        limiter.release(time.perf_counter() - started, dropped=dropped)
+
+
+async def run_in_executor_unlimited(func, *args):
+    """Run sync function in thread pool executor, bypassing admission control (health checks)"""
     loop = asyncio.get_event_loop()
     executor_instance = get_executor()
-    return await loop.run_in_executor(executor_instance, func, *args)
+
+    # Bound every PyMongo operation by the request deadline, if one is active
+    deadline = current_deadline()
+    if deadline is not None:
+        if remaining_seconds(deadline) <= 0:
+            raise DeadlineExceededError()
+        func = _bounded_by_deadline(func, deadline)
+
+    executor_active_tasks.inc()
+    try:
+        return await _run_timed(loop, executor_instance, func, *args)
+    except PyMongoError as e:
+        if deadline is not None and e.timeout and remaining_seconds(deadline) <= DEADLINE_SLACK_SECONDS:
+            raise DeadlineExceededError() from e
+        raise
+    finally:
+        executor_active_tasks.dec()
+
+
+def operation_timeout(remaining: float) -> float:
+    """
+    PyMongo timeout for one operation: the time left, capped at the socket timeout.
+    pymongo.timeout() overrides socketTimeoutMS/waitQueueTimeoutMS, so without the cap
+    a slow query or pool wait could hold a worker for the whole request budget.
+    """
+    return min(remaining, db_config.mongodb_socket_timeout_ms / 1000)
+
+
+def _bounded_by_deadline(func, deadline: float):
+    """
+    Wrap func to run under pymongo.timeout() with the time left when it starts
+    executing, so work that waited in the executor queue past the deadline is dropped.
+    pymongo.timeout() is context-local, hence it is entered on the worker thread.
+    """
+    def _run(*args):
+        remaining = remaining_seconds(deadline)
+        if remaining <= 0:
+            raise DeadlineExceededError()
+        with pymongo.timeout(operation_timeout(remaining)):
+            return func(*args)
+
+    return _run
+
+
+async def _run_timed(loop, executor_instance, func, *args):
+    """Submit to the executor, recording queue wait and execution phases when timing is active"""
+    timings = current_timings()
+    if timings is None:
+        return await loop.run_in_executor(executor_instance, func, *args)
+
+    # Measure executor queue wait and execution separately
+    submitted = time.perf_counter()
+    started = finished = submitted
+
+    def _timed():
+        nonlocal started, finished
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+
+    try:
+        return await loop.run_in_executor(executor_instance, _timed)
+    finally:
+        timings.add("db_queue", (started - submitted) * 1000)
+        timings.add("db", (finished - started) * 1000)
+
+
+def warm_connection_pool() -> bool:
+    """Initialize the client if needed and ping so the pooled socket stays warm (sync)"""
+    if not db_config.mongodb_url:
+        return False
+
+    try:
+        init_database()
+        if client is None:
+            return False
+        client.admin.command('ping')
+        return True
+    except Exception as e:
+        logger.warning("Connection pool warm-up failed", extra={"extra_data": {"error": str(e)}})
+        return False
+
+
+# Executor gauges computed at scrape time
+executor_queue_depth.set_function(lambda: executor._work_queue.qsize() if executor else 0)
+executor_threads.set_function(lambda: len(executor._threads) if executor else 0)
+db_concurrency_limit.set_function(lambda: int(concurrency_limiter.limit) if concurrency_limiter else 0)
+db_concurrency_inflight.set_function(lambda: concurrency_limiter.inflight if concurrency_limiter else 0)
 
 
 # Health check function
@@ -124,7 +303,8 @@ async def check_database_health() -> bool:
         def _ping():
             return client.admin.command('ping')
 
-        await run_in_executor(_ping)
+        # Exempt from load shedding so health reflects connectivity, not load
+        await run_in_executor_unlimited(_ping)
         return True
     except Exception as e:
         logger.error("Database health check failed", extra={"extra_data": {"error": str(e)}})
@@ -0,0 +1,46 @@
+"""
+Per-request deadlines
+The deadline is an absolute time.monotonic() value held in a context variable.
+It is derived from the Lambda context's remaining time (or a configured server
+budget) and enforced on PyMongo operations with client-side operation timeouts
+(pymongo.timeout), so work stops once the caller can no longer get the answer.
+"""
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+from fastapi import HTTPException, status
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceededError(HTTPException):
+    """Raised when the request budget is spent; rendered as 504"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Request deadline exceeded"
+        )
+
+
+def start_request_deadline(budget_seconds: float) -> Token:
+    """Set the deadline `budget_seconds` from now; returns the token for reset"""
+    return _deadline.set(time.monotonic() + budget_seconds)
+
+
+def reset_request_deadline(token: Token) -> None:
+    """Restore the previous deadline (end of request)"""
+    _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    """Absolute deadline (time.monotonic()) of the current request, if any"""
+    return _deadline.get()
+
+
+def remaining_seconds(deadline: Optional[float] = None) -> Optional[float]:
+    """Seconds left until the deadline (negative once expired); None without a deadline"""
+    deadline = _deadline.get() if deadline is None else deadline
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
@@ -0,0 +1,322 @@
+"""
+Per-seller Bloom filters of normalized emails
+Most email existence checks (the contact lookup route) are misses.
+For configured sellers a Bloom filter answers "definitely not present" without
+the email lookup; "maybe present" still goes to the database. A cached
+generation can miss a user just created on another instance, so "absent" is
+only answered once a generation read issued after the check began shows the
+filter is current (seller_generations.confirm, one read shared by concurrent
+checks). Otherwise the check falls back to MongoDB.
+
+A plain Bloom filter is enough: users are only soft-deleted, so emails leave
+the collection only through renames, and a stale bit for an old email costs
+a false positive (one extra lookup), never a wrong answer.
+
+Freshness follows the search index (app/core/search_index.py): a filter
+remembers the seller generation it reflects, and once the generation moves on
+it is bypassed while a background task adds the emails of the users stamped
+since. Filters start from the binary snapshot in MongoDB (caught up the same
+way), or from a streaming cursor when there is none.
+"""
+import asyncio
+import contextvars
+import hashlib
+import math
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from bson import Binary
+from app.config.settings import app_config
+from app.core.database import get_database, run_in_executor_unlimited
+from app.core.generations import seller_generations
+from app.core.lifecycle import lifecycle
+from app.core.metrics import email_filter_checks_total, email_filter_bytes, email_filter_false_positive_rate
+from app.models.users import UserModel
+from app.utils.logger import logger
+
+# Snapshot layout: magic, k, number of bits, inserted items, generation, then the bit array
+_SNAPSHOT_HEADER = struct.Struct(">4sIQQQ")
+_SNAPSHOT_MAGIC = b"EBF1"
+# Sized for this many times the current users, so growth does not degrade the rate at once
+_GROWTH_HEADROOM = 1.5
+_MIN_CAPACITY = 1000
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter with double hashing (not thread-safe)"""
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytearray] = None, count: int = 0):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+        self.count = count
+
+    @classmethod
+    def for_capacity(cls, capacity: int, false_positive_rate: float, max_bytes: int) -> "BloomFilter":
+        """Optimal size for `capacity` items at the target rate, capped at `max_bytes`"""
+        capacity = max(capacity, 1)
+        num_bits = math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+        num_bits = max(8, min(num_bits, max_bytes * 8))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.bits)
+
+    @property
+    def capacity(self) -> int:
+        """Items this filter was sized for (k = m/n * ln 2 solved for n)"""
+        return int(self.num_bits * math.log(2) / self.num_hashes)
+
+    def estimated_false_positive_rate(self) -> float:
+        """(1 - e^(-kn/m))^k for the items inserted so far"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def to_bytes(self, generation: int) -> bytes:
+        """Compact binary snapshot (header + raw bits)"""
+        return _SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, self.num_hashes, self.num_bits, self.count, generation) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Tuple["BloomFilter", int]:
+        """(filter, generation) from a snapshot; raises ValueError when malformed"""
+        if len(data) < _SNAPSHOT_HEADER.size:
+            raise ValueError("Truncated email filter snapshot")
+        magic, num_hashes, num_bits, count, generation = _SNAPSHOT_HEADER.unpack_from(data)
+        bits = bytearray(data[_SNAPSHOT_HEADER.size:])
+        if magic != _SNAPSHOT_MAGIC or not num_hashes or len(bits) != (num_bits + 7) // 8:
+            raise ValueError("Invalid email filter snapshot")
+        return cls(num_bits, num_hashes, bits, count), generation
+
+
+class EmailFilterRegistry:
+    """Bloom filters for the configured sellers, each bounded by `max_bytes`"""
+
+    def __init__(
+        self,
+        sellers: List[int],
+        false_positive_rate: float,
+        max_bytes: int,
+        snapshots_collection: str = "email_filter_snapshots"
+    ):
+        self.sellers = set(sellers)
+        self.false_positive_rate = false_positive_rate
+        self.max_bytes = max_bytes
+        self.snapshots_collection = snapshots_collection
+        # seller_id -> (filter, generation it reflects)
+        self._filters: Dict[int, Tuple[BloomFilter, int]] = {}
+        self._building: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    async def might_contain(self, seller_id: int, email: str) -> Optional[bool]:
+        """
+        False when the email is definitely not stored for the seller, True when it may be,
+        None when no current filter exists (callers query MongoDB either way unless False)
+        """
+        if seller_id not in self.sellers:
+            return None
+
+        with self._lock:
+            entry = self._filters.get(seller_id)
+            present = entry is not None and UserModel.normalize_email(email) in entry[0]
+        if entry is None:
+            email_filter_checks_total.inc("bypass")
+            self._schedule_build(seller_id)
+            return None
+        if present:
+            # Only lets the lookup run: no freshness needed
+            email_filter_checks_total.inc("positive")
+            return True
+
+        # "Absent" must hold for writes acknowledged anywhere before this check
+        try:
+            generation = await seller_generations.confirm(seller_id)
+        except Exception as e:
+            logger.warning("Failed to confirm seller generation", extra={"extra_data": {
+                "seller_id": seller_id,
+                "error": str(e)
+            }})
+            generation = None
+        if generation is not None and entry[1] >= generation:
+            email_filter_checks_total.inc("negative")
+            return False
+
+        email_filter_checks_total.inc("bypass")
+        self._schedule_build(seller_id)
+        return None
+
+    async def start(self) -> None:
+        """Build the configured sellers' filters in the background, before their first request (lifecycle startup)"""
+        for seller_id in self.sellers:
+            self._schedule_build(seller_id)
+
+    async def close(self) -> None:
+        """Cancel background builds and drop every filter (lifecycle shutdown)"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self.clear()
+
+    def _schedule_build(self, seller_id: int) -> None:
+        if seller_id in self._building:
+            return
+        self._building.add(seller_id)
+        # Fresh context: the build must not inherit the request deadline or timings
+        task = asyncio.create_task(self._build(seller_id), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _build(self, seller_id: int) -> None:
+        """Catch the seller's filter up, or load or build a new one (bypasses the adaptive limiter)"""
+        try:
+            built = await run_in_executor_unlimited(self._build_sync, seller_id)
+            if built is None:
+                return
+            bloom, generation = built
+            with self._lock:
+                self._filters[seller_id] = (bloom, generation)
+                self._report(seller_id, bloom)
+            logger.info("Seller email filter ready", extra={"extra_data": {
+                "seller_id": seller_id,
+                "emails": bloom.count,
+                "size_bytes": bloom.size_bytes,
+                "estimated_false_positive_rate": round(bloom.estimated_false_positive_rate(), 6)
+            }})
+        except Exception as e:
+            logger.warning("Failed to build seller email filter", extra={"extra_data": {
+                "seller_id": seller_id,
+                "error": str(e)
+            }})
+        finally:
+            self._building.discard(seller_id)
+
+    def _build_sync(self, seller_id: int) -> Optional[Tuple[BloomFilter, int]]:
+        """A new (filter, generation), or None when the current one was caught up in place (or the generation is settling)"""
+        generation = seller_generations.read_sync(seller_id)
+        if not seller_generations.settled(generation):
+            return None
+        with self._lock:
+            entry = self._filters.get(seller_id)
+        if entry is not None:
+            self._catch_up_sync(seller_id, entry, generation)
+            return None
+
+        loaded = self._load_snapshot_sync(seller_id)
+        if loaded is not None:
+            bloom, snapshot_generation = loaded
+            if snapshot_generation < generation:
+                for email in self._emails_since_sync(seller_id, snapshot_generation, generation):
+                    bloom.add(email)
+                if not self._outgrown(bloom):
+                    self._save_snapshot_sync(seller_id, bloom, generation)
+            if not self._outgrown(bloom):
+                return bloom, generation
+
+        # Users written during the scan have a stamp above `generation`: the next catch-up adds them
+        collection = UserModel.get_collection()
+        users = collection.count_documents({"seller_id": seller_id})
+        bloom = BloomFilter.for_capacity(
+            max(int(users * _GROWTH_HEADROOM), _MIN_CAPACITY),
+            self.false_positive_rate,
+            self.max_bytes
+        )
+        for doc in collection.find({"seller_id": seller_id}, {"email": 1, "_id": 0}).batch_size(5000):
+            bloom.add(UserModel.normalize_email(doc["email"]))
+
+        self._save_snapshot_sync(seller_id, bloom, generation)
+        return bloom, generation
+
+    def _catch_up_sync(self, seller_id: int, entry: Tuple[BloomFilter, int], generation: int) -> None:
+        """Add the emails stamped in (entry generation, generation] to an installed filter"""
+        if entry[1] >= generation:
+            return
+        emails = list(self._emails_since_sync(seller_id, entry[1], generation))
+        with self._lock:
+            if self._filters.get(seller_id) is not entry:
+                return
+            bloom = entry[0]
+            for email in emails:
+                bloom.add(email)
+            if self._outgrown(bloom):
+                # Resized by the next build
+                self._drop(seller_id)
+                return
+            self._filters[seller_id] = (bloom, generation)
+            self._report(seller_id, bloom)
+
+    def _emails_since_sync(self, seller_id: int, after: int, upto: int) -> Iterator[str]:
+        """Normalized emails of the users stamped in (after, upto]"""
+        for doc in seller_generations.changes_sync(seller_id, after, upto, {"email": 1, "_id": 0}):
+            yield UserModel.normalize_email(doc["email"])
+
+    def _snapshots(self):
+        return get_database()[self.snapshots_collection]
+
+    def _load_snapshot_sync(self, seller_id: int) -> Optional[Tuple[BloomFilter, int]]:
+        """(filter, generation) from the seller's snapshot, if any and readable"""
+        doc = self._snapshots().find_one({"_id": seller_id})
+        if doc is None:
+            return None
+        try:
+            return BloomFilter.from_bytes(bytes(doc["data"]))
+        except ValueError:
+            return None
+
+    def _outgrown(self, bloom: BloomFilter) -> bool:
+        """Past its capacity with room to grow (at max_bytes the rate is left to rise, and reported)"""
+        return bloom.count > bloom.capacity and bloom.size_bytes < self.max_bytes
+
+    def _save_snapshot_sync(self, seller_id: int, bloom: BloomFilter, generation: int) -> None:
+        """Best effort: a failed save only makes the next rebuild scan again"""
+        try:
+            self._snapshots().replace_one(
+                {"_id": seller_id},
+                {"_id": seller_id, "generation": generation, "data": Binary(bloom.to_bytes(generation))},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning("Failed to save seller email filter snapshot", extra={"extra_data": {
+                "seller_id": seller_id,
+                "error": str(e)
+            }})
+
+    def _report(self, seller_id: int, bloom: BloomFilter) -> None:
+        email_filter_bytes.set(bloom.size_bytes, str(seller_id))
+        email_filter_false_positive_rate.set(bloom.estimated_false_positive_rate(), str(seller_id))
+
+    def _drop(self, seller_id: int) -> None:
+        if self._filters.pop(seller_id, None) is not None:
+            email_filter_bytes.set(0, str(seller_id))
+
+    def clear(self) -> None:
+        """Drop every filter"""
+        with self._lock:
+            for seller_id in list(self._filters):
+                self._drop(seller_id)
+
+
+email_filters = EmailFilterRegistry(
+    sellers=app_config.email_filter_sellers,
+    false_positive_rate=app_config.email_filter_false_positive_rate,
+    max_bytes=app_config.email_filter_max_kb * 1024,
+    snapshots_collection=app_config.email_filter_snapshots_collection
+)
+lifecycle.register("email_filter", startup=email_filters.start, shutdown=email_filters.close)
@@ -0,0 +1,112 @@
+"""
+CloudWatch Embedded Metric Format (EMF) sink
+Buffers measurements for the current Lambda invocation and writes a single
+EMF JSON line to stdout when the invocation ends (no PutMetricData calls).
+"""
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from app.config.settings import app_config
+from app.utils.logger import json_dumps
+
+# CloudWatch limits: 100 metrics per directive, 30 dimensions per set
+MAX_METRICS = 100
+
+
+class EmfSink:
+    """
+    Per-invocation metric buffer.
+
+    Dimensions are restricted to `app_config.emf_dimensions`; any other key passed to
+    set_dimension (e.g. SellerId) is written as a property instead, so high-cardinality
+    values stay searchable in Logs Insights without creating CloudWatch metric series.
+    """
+
+    def __init__(self, namespace: str, service: str, allowed_dimensions: List[str]):
+        self.namespace = namespace
+        self.service = service
+        self.allowed_dimensions = set(allowed_dimensions)
+        self.active = False
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._metrics: Dict[str, Tuple[float, str]] = {}
+        self._dimensions: Dict[str, str] = {}
+        self._properties: Dict[str, object] = {}
+
+    def begin_invocation(self) -> None:
+        """Start buffering for a new invocation"""
+        with self._lock:
+            self._reset()
+            self.active = True
+
+    def put_metric(self, name: str, value: float, unit: str = "None") -> None:
+        """Set a metric value for this invocation (last write wins)"""
+        if not self.active:
+            return
+        with self._lock:
+            if name in self._metrics or len(self._metrics) < MAX_METRICS:
+                self._metrics[name] = (value, unit)
+
+    def increment(self, name: str, value: float = 1.0, unit: str = "Count") -> None:
+        """Add to a metric accumulated over the invocation (e.g. DbTime, CacheHits)"""
+        if not self.active:
+            return
+        with self._lock:
+            current = self._metrics.get(name)
+            if current is not None:
+                self._metrics[name] = (current[0] + value, unit)
+            elif len(self._metrics) < MAX_METRICS:
+                self._metrics[name] = (value, unit)
+
+    def set_dimension(self, key: str, value: str) -> None:
+        """Set a dimension if allowed by config, otherwise record it as a property"""
+        if not self.active:
+            return
+        if key in self.allowed_dimensions:
+            self._dimensions[key] = value
+        else:
+            self._properties[key] = value
+
+    def set_property(self, key: str, value: object) -> None:
+        """Attach a non-metric, non-dimension value to the EMF line"""
+        if self.active:
+            self._properties[key] = value
+
+    def flush(self) -> Optional[str]:
+        """Write the buffered invocation as one EMF line; returns the line written"""
+        with self._lock:
+            if not self.active:
+                return None
+            self.active = False
+            if not self._metrics:
+                return None
+
+            dimensions = {"Service": self.service, **self._dimensions}
+            payload = {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [{
+                        "Namespace": self.namespace,
+                        "Dimensions": [list(dimensions.keys())],
+                        "Metrics": [{"Name": name, "Unit": unit} for name, (_, unit) in self._metrics.items()]
+                    }]
+                },
+                **self._properties,
+                **dimensions,
+                **{name: value for name, (value, _) in self._metrics.items()}
+            }
+
+        line = json_dumps(payload)
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+        return line
+
+
+emf_sink = EmfSink(
+    namespace=app_config.emf_namespace,
+    service=app_config.app_name,
+    allowed_dimensions=app_config.emf_dimensions
+)
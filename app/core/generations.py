@@ -0,0 +1,149 @@
+"""
+Per-seller change generations
+Every user write stamps the document with a server-side BSON timestamp
+(UserModel.WRITE_STAMP, `$currentDate` inside the write itself, so writes stay
+one round trip). A seller's generation is its newest stamp as a 64-bit int,
+read with a single lookup on (seller_id, write_ts). It identifies the state of
+the seller's users and backs list ETags, the list page cache and the
+in-process indexes, which catch up by reading the users stamped after their
+own generation (`changes_sync`). Users are only soft-deleted, so every change
+leaves a stamp.
+
+Concurrent writes can become visible out of stamp order, so a generation is
+only trusted once its newest stamp is `settle_seconds` old (the same guard as
+/users/changes); until then callers get None and skip ETags and caches. Each
+instance caches generations for a short TTL, so a write made elsewhere is
+observed after at most `cache_ttl` seconds; answers that must reflect every
+acknowledged write use `confirm` instead.
+"""
+import asyncio
+import contextvars
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+from bson import Timestamp
+from pymongo import DESCENDING
+from pymongo.cursor import Cursor
+from app.config.settings import app_config
+from app.core.database import run_in_executor
+from app.core.lifecycle import lifecycle
+from app.models.users import UserModel
+
+
+def to_timestamp(generation: int) -> Timestamp:
+    """BSON timestamp for a generation (the inverse of from_timestamp)"""
+    return Timestamp(generation >> 32, generation & 0xFFFFFFFF)
+
+
+def from_timestamp(stamp: Timestamp) -> int:
+    """Generation for a BSON timestamp: seconds in the high 32 bits, increment in the low ones"""
+    return (stamp.time << 32) | stamp.inc
+
+
+class SellerGenerations:
+    """Newest write stamp per seller, with a local TTL cache"""
+
+    def __init__(self, cache_ttl: float = 1.0, settle_seconds: float = 2.0):
+        self.cache_ttl = cache_ttl
+        self.settle_seconds = settle_seconds
+        # seller_id -> (generation, cached_at monotonic)
+        self._cache: Dict[int, Tuple[int, float]] = {}
+        # seller_id -> result of the next confirming read (not issued yet, so callers may still join)
+        self._next_reads: Dict[int, asyncio.Future] = {}
+        self._reading: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def settled(self, generation: int) -> bool:
+        """True once every write stamped up to `generation` is visible"""
+        return (generation >> 32) <= time.time() - self.settle_seconds
+
+    def read_sync(self, seller_id: int) -> int:
+        """Uncached generation read (executor threads); refreshes the cache. May not be settled yet"""
+        doc = UserModel.get_collection().find_one(
+            {"seller_id": seller_id},
+            {UserModel.WRITE_STAMP_FIELD: 1, "_id": 0},
+            sort=[(UserModel.WRITE_STAMP_FIELD, DESCENDING)]
+        )
+        # Users written before stamping existed sort last and count as generation 0
+        stamp = doc.get(UserModel.WRITE_STAMP_FIELD) if doc else None
+        generation = from_timestamp(stamp) if stamp is not None else 0
+        self._cache[seller_id] = (generation, time.monotonic())
+        return generation
+
+    async def get(self, seller_id: int) -> Optional[int]:
+        """
+        Current generation (cache first, then a single indexed lookup).
+        None while the newest write is settling: callers must not serve ETags or cached data.
+        """
+        entry = self._cache.get(seller_id)
+        if entry is not None and time.monotonic() - entry[1] <= self.cache_ttl:
+            generation = entry[0]
+        else:
+            generation = await run_in_executor(self.read_sync, seller_id)
+        return generation if self.settled(generation) else None
+
+    async def confirm(self, seller_id: int) -> Optional[int]:
+        """
+        Settled generation from a read issued after this call (never the cache), so it reflects
+        every write acknowledged before the call. Concurrent callers share the next read.
+        """
+        future = self._next_reads.get(seller_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._next_reads[seller_id] = future
+            if seller_id not in self._reading:
+                self._reading.add(seller_id)
+                # Fresh context: the read must not inherit one caller's deadline
+                task = asyncio.create_task(self._confirm_reads(seller_id), context=contextvars.Context())
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        generation = await asyncio.shield(future)
+        return generation if self.settled(generation) else None
+
+    async def _confirm_reads(self, seller_id: int) -> None:
+        """Issue reads while callers wait for one; callers arriving mid-read wait for the next"""
+        try:
+            while seller_id in self._next_reads:
+                future = self._next_reads.pop(seller_id)
+                try:
+                    future.set_result(await run_in_executor(self.read_sync, seller_id))
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            self._reading.discard(seller_id)
+
+    def changes_sync(self, seller_id: int, after: int, upto: int, projection: Dict[str, Any]) -> Cursor:
+        """Users stamped in (after, upto], to catch an index up from `after` (executor threads)"""
+        return UserModel.get_collection().find(
+            {"seller_id": seller_id, UserModel.WRITE_STAMP_FIELD: {"$gt": to_timestamp(after), "$lte": to_timestamp(upto)}},
+            projection
+        ).hint(UserModel.GENERATION_INDEX).batch_size(1000)
+
+    def invalidate(self, seller_id: int) -> None:
+        """Forget the cached generation after a local write (the next read sees its stamp)"""
+        self._cache.pop(seller_id, None)
+
+    def clear(self) -> None:
+        """Drop the local cache"""
+        self._cache.clear()
+
+    async def close(self) -> None:
+        """Cancel confirming reads (their callers see CancelledError) and drop the cache (lifecycle shutdown)"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for future in self._next_reads.values():
+            future.cancel()
+        self._next_reads.clear()
+        self.clear()
+
+
+seller_generations = SellerGenerations(
+    cache_ttl=app_config.seller_generation_cache_ttl_seconds,
+    settle_seconds=app_config.seller_generation_settle_seconds
+)
+lifecycle.register("seller_generations", shutdown=seller_generations.close)
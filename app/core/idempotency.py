@@ -0,0 +1,302 @@
+"""
+Idempotency-Key support
+The first successful response for (seller, key) is stored together with the
+request body hash and replayed on retries. Concurrent duplicates wait for the
+in-flight attempt instead of running the operation again. Failed attempts
+release the key so the client can retry.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from bson import Binary
+from fastapi import HTTPException, status
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from app.core.database import get_database, run_in_executor
+from app.models.indexes import IndexSpec
+from app.utils.logger import logger
+
+IN_FLIGHT = "in_flight"
+COMPLETED = "completed"
+
+
+@dataclass
+class IdempotencyRecord:
+    """Stored attempt: in flight, or completed with the response to replay"""
+    body_hash: str
+    state: str = IN_FLIGHT
+    status_code: int = 0
+    body: bytes = b""
+    media_type: str = "application/json"
+
+
+class IdempotencyKeyMismatchError(HTTPException):
+    """Same key reused with a different request body"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request body"
+        )
+
+
+class IdempotencyInProgressError(HTTPException):
+    """The original attempt is still running after the wait budget"""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class IdempotencyStoreFullError(HTTPException):
+    """Every slot of the in-memory store holds an in-flight claim"""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many requests with an Idempotency-Key in progress",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class InMemoryIdempotencyStore:
+    """
+    Process-local store (single worker, tests, local development): it cannot
+    deduplicate retries that reach another worker or Lambda instance.
+    Waiters are woken through asyncio events; entries expire after `ttl` and
+    the oldest completed ones are evicted beyond `max_keys`. In-flight claims
+    are never evicted (a retry would run the operation again): when they fill
+    every slot, new claims are rejected with 503.
+    """
+
+    def __init__(self, ttl: float = 86400.0, max_keys: int = 10000):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._records: "OrderedDict[str, Tuple[float, IdempotencyRecord]]" = OrderedDict()
+        self._events: Dict[str, asyncio.Event] = {}
+
+    def _get(self, record_id: str) -> Optional[IdempotencyRecord]:
+        entry = self._records.get(record_id)
+        if entry is None:
+            return None
+        expires_at, record = entry
+        if expires_at <= time.time():
+            del self._records[record_id]
+            return None
+        return record
+
+    async def reserve(self, record_id: str, body_hash: str) -> Optional[IdempotencyRecord]:
+        """Claim the key; returns None when claimed, otherwise the existing record"""
+        existing = self._get(record_id)
+        if existing is not None:
+            return existing
+        while len(self._records) >= self.max_keys:
+            if not self._evict_one():
+                raise IdempotencyStoreFullError()
+        self._records[record_id] = (time.time() + self.ttl, IdempotencyRecord(body_hash=body_hash))
+        self._events[record_id] = asyncio.Event()
+        return None
+
+    def _evict_one(self) -> bool:
+        """Drop the oldest expired or completed entry; False when only in-flight claims remain"""
+        now = time.time()
+        for record_id, (expires_at, record) in self._records.items():
+            if record.state != IN_FLIGHT or expires_at <= now:
+                del self._records[record_id]
+                return True
+        return False
+
+    async def complete(self, record_id: str, record: IdempotencyRecord) -> None:
+        """Store the final response and wake waiters"""
+        self._records[record_id] = (time.time() + self.ttl, record)
+        self._notify(record_id)
+
+    async def release(self, record_id: str) -> None:
+        """Forget an in-flight claim (the attempt failed) and wake waiters"""
+        entry = self._records.get(record_id)
+        if entry is not None and entry[1].state == IN_FLIGHT:
+            del self._records[record_id]
+        self._notify(record_id)
+
+    async def wait(self, record_id: str, timeout: float) -> None:
+        """Wait until the in-flight attempt completes or is released"""
+        event = self._events.get(record_id)
+        if event is None:
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _notify(self, record_id: str) -> None:
+        event = self._events.pop(record_id, None)
+        if event is not None:
+            event.set()
+
+    async def close(self) -> None:
+        """Wake every waiter (lifecycle shutdown) so duplicates answer instead of stalling the drain"""
+        for record_id in list(self._events):
+            self._notify(record_id)
+
+
+class MongoIdempotencyStore:
+    """
+    MongoDB-backed store shared by all workers/Lambda instances.
+    Documents expire through the TTL index declared in INDEXES (deployment/sync_indexes.py);
+    in-flight claims carry a shorter `locked_until` so a crashed attempt does not block the key.
+    Waiters poll with backoff since there is no cross-process notification.
+    """
+
+    INDEXES = [
+        IndexSpec(
+            "idempotency_expires_ttl", (("expires_at", ASCENDING),), expire_after_seconds=0,
+            purpose="Expire stored responses (IDEMPOTENCY_STORE=mongodb)"
+        )
+    ]
+
+    def __init__(self, collection_name: str = "idempotency_keys", ttl: float = 86400.0, lock_ttl: float = 30.0):
+        self.collection_name = collection_name
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+
+    def _collection(self):
+        return get_database()[self.collection_name]
+
+    @staticmethod
+    def _to_record(doc: dict) -> IdempotencyRecord:
+        return IdempotencyRecord(
+            body_hash=doc["body_hash"],
+            state=doc["state"],
+            status_code=doc.get("status_code", 0),
+            body=bytes(doc.get("body", b"")),
+            media_type=doc.get("media_type", "application/json")
+        )
+
+    async def reserve(self, record_id: str, body_hash: str) -> Optional[IdempotencyRecord]:
+        """Claim the key with insert_one; returns None when claimed, otherwise the existing record"""
+        def _reserve():
+            collection = self._collection()
+            now = datetime.now(timezone.utc)
+            claim = {
+                "body_hash": body_hash,
+                "state": IN_FLIGHT,
+                "expires_at": now + timedelta(seconds=self.ttl),
+                "locked_until": now + timedelta(seconds=self.lock_ttl)
+            }
+            try:
+                collection.insert_one({"_id": record_id, **claim})
+                return None
+            except DuplicateKeyError:
+                pass
+
+            # Take over expired entries (TTL monitor runs ~every 60s) and abandoned claims
+            taken = collection.find_one_and_update(
+                {"_id": record_id, "$or": [
+                    {"expires_at": {"$lte": now}},
+                    {"state": IN_FLIGHT, "locked_until": {"$lte": now}}
+                ]},
+                {"$set": claim, "$unset": {"status_code": "", "body": "", "media_type": ""}}
+            )
+            if taken is not None:
+                return None
+            return collection.find_one({"_id": record_id})
+
+        doc = await run_in_executor(_reserve)
+        return None if doc is None else self._to_record(doc)
+
+    async def complete(self, record_id: str, record: IdempotencyRecord) -> None:
+        """Store the final response"""
+        def _complete():
+            # Upsert: the claim may have been reaped by the TTL monitor meanwhile
+            self._collection().update_one({"_id": record_id}, {"$set": {
+                "body_hash": record.body_hash,
+                "state": COMPLETED,
+                "status_code": record.status_code,
+                "body": Binary(record.body),
+                "media_type": record.media_type,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+            }, "$unset": {"locked_until": ""}}, upsert=True)
+
+        await run_in_executor(_complete)
+
+    async def release(self, record_id: str) -> None:
+        """Delete an in-flight claim (the attempt failed)"""
+        def _release():
+            self._collection().delete_one({"_id": record_id, "state": IN_FLIGHT})
+
+        await run_in_executor(_release)
+
+    async def wait(self, record_id: str, timeout: float) -> None:
+        """Poll until the in-flight attempt completes, disappears or `timeout` elapses"""
+        def _state():
+            doc = self._collection().find_one({"_id": record_id}, {"state": 1})
+            return doc["state"] if doc else None
+
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            if await run_in_executor(_state) != IN_FLIGHT or time.monotonic() >= deadline:
+                return
+            delay = min(delay * 2, 0.5)
+
+
+async def execute_idempotent(
+    store,
+    record_id: str,
+    body_hash: str,
+    produce: Callable[[], Awaitable[Tuple[int, bytes, str]]],
+    wait_seconds: float = 5.0
+) -> Tuple[IdempotencyRecord, bool]:
+    """
+    Run `produce` at most once per record_id and return (record, replayed).
+
+    Args:
+        store: InMemoryIdempotencyStore or MongoIdempotencyStore
+        record_id: Store key, e.g. "<seller_id>:<Idempotency-Key>"
+        body_hash: Hash of the request body; reuse with another body is rejected (422)
+        produce: Coroutine returning (status_code, body, media_type) of a successful response
+        wait_seconds: How long a duplicate waits for the in-flight attempt before 409
+    """
+    wait_until = time.monotonic() + wait_seconds
+    while True:
+        existing = await store.reserve(record_id, body_hash)
+        if existing is None:
+            try:
+                status_code, body, media_type = await produce()
+            except BaseException:
+                # Errors are not stored: the key becomes usable again for a retry
+                await asyncio.shield(store.release(record_id))
+                raise
+
+            record = IdempotencyRecord(
+                body_hash=body_hash,
+                state=COMPLETED,
+                status_code=status_code,
+                body=body,
+                media_type=media_type
+            )
+            try:
+                await store.complete(record_id, record)
+            except Exception as e:
+                logger.warning("Failed to store idempotent response", extra={"extra_data": {
+                    "record_id": record_id,
+                    "error": str(e)
+                }})
+            return record, False
+
+        if existing.body_hash != body_hash:
+            raise IdempotencyKeyMismatchError()
+        if existing.state == COMPLETED:
+            return existing, True
+
+        remaining = wait_until - time.monotonic()
+        if remaining <= 0:
+            raise IdempotencyInProgressError()
+        await store.wait(record_id, remaining)
@@ -0,0 +1,189 @@
+"""
+Resource lifecycle
+Owns startup/teardown of process-wide resources (MongoDB client, executor,
+caches, background tasks) for the ASGI lifespan and the Lambda init phase.
+The core resources are registered here; caches and registries register
+themselves where their singleton is defined, so they shut down before the
+executor and client they use.
+"""
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.config.settings import app_config
+from app.core.database import init_database, close_client, init_executor, shutdown_executor
+from app.utils.logger import logger, shutdown_logging
+
+
+@dataclass
+class Resource:
+    """A named resource with optional startup and shutdown hooks (sync or async)"""
+    name: str
+    startup: Optional[Callable[[], Any]] = None
+    shutdown: Optional[Callable[[], Any]] = None
+    required: bool = False
+    ready: bool = False
+
+
+class Lifecycle:
+    """Ordered resource registry: started in registration order, shut down in reverse"""
+
+    def __init__(self, retry_initial_seconds: float = 1.0, retry_max_seconds: float = 30.0):
+        self.retry_initial_seconds = retry_initial_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._resources: List[Resource] = []
+        self._task_factories: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def ready(self) -> bool:
+        """True when every registered resource started successfully"""
+        return all(resource.ready for resource in self._resources)
+
+    def register(
+        self,
+        name: str,
+        startup: Optional[Callable[[], Any]] = None,
+        shutdown: Optional[Callable[[], Any]] = None,
+        required: bool = False
+    ) -> None:
+        """
+        Register a resource; failures of non-required resources are logged and retried later:
+        by a backoff task under the ASGI lifespan, on the next invocation on Lambda
+        """
+        self._resources.append(Resource(name=name, startup=startup, shutdown=shutdown, required=required))
+
+    def add_background_task(self, name: str, factory: Callable[[], Awaitable[None]]) -> None:
+        """Register a coroutine factory run as a task for the lifetime of the ASGI app"""
+        self._task_factories[name] = factory
+
+    async def startup(self) -> None:
+        """Start all resources and background tasks (ASGI lifespan)"""
+        loop = asyncio.get_running_loop()
+        total_start = time.perf_counter()
+
+        for resource in self._resources:
+            await self._run_phase(resource, "startup", loop)
+
+        for name, factory in self._task_factories.items():
+            self._tasks[name] = asyncio.create_task(factory(), name=name)
+        if not self.ready:
+            # Otherwise the worker would answer 500 until restarted
+            self._tasks["lifecycle.retry"] = asyncio.create_task(self._retry_pending(), name="lifecycle.retry")
+
+        self._log_total("startup", total_start)
+
+    async def _retry_pending(self) -> None:
+        """Retry failed startups in registration order, with exponential backoff, until all are ready"""
+        loop = asyncio.get_running_loop()
+        delay = self.retry_initial_seconds
+        while not self.ready:
+            await asyncio.sleep(delay)
+            for resource in self._resources:
+                if not resource.ready:
+                    await self._run_phase(resource, "startup", loop)
+            delay = min(delay * 2, self.retry_max_seconds)
+        logger.info("Pending resources started after startup failures")
+
+    async def shutdown(self) -> None:
+        """Cancel background tasks and shut down resources in reverse order"""
+        loop = asyncio.get_running_loop()
+        total_start = time.perf_counter()
+
+        for task in self._tasks.values():
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+        for resource in reversed(self._resources):
+            await self._run_phase(resource, "shutdown", loop)
+
+        self._log_total("shutdown", total_start)
+
+    def startup_sync(self) -> None:
+        """
+        Start pending resources without an event loop (Lambda init phase / retries).
+        Async hooks and background tasks only run under the ASGI lifespan.
+        """
+        total_start = time.perf_counter()
+
+        for resource in self._resources:
+            if resource.ready:
+                continue
+            if resource.startup is None or inspect.iscoroutinefunction(resource.startup):
+                resource.ready = True
+                continue
+            self._run_phase_sync(resource)
+
+        self._log_total("startup", total_start)
+
+    async def _run_phase(self, resource: Resource, phase: str, loop: asyncio.AbstractEventLoop) -> None:
+        """Run one hook, offloading sync hooks to a thread, and record its duration"""
+        hook = getattr(resource, phase)
+        start = time.perf_counter()
+        try:
+            if hook is not None:
+                if inspect.iscoroutinefunction(hook):
+                    await hook()
+                else:
+                    await loop.run_in_executor(None, hook)
+            resource.ready = phase == "startup"
+        except Exception as e:
+            self._handle_failure(resource, phase, e)
+        finally:
+            self._record(resource.name, phase, start)
+
+    def _run_phase_sync(self, resource: Resource) -> None:
+        """Run a sync startup hook inline and record its duration"""
+        start = time.perf_counter()
+        try:
+            resource.startup()
+            resource.ready = True
+        except Exception as e:
+            self._handle_failure(resource, "startup", e)
+        finally:
+            self._record(resource.name, "startup", start)
+
+    def _handle_failure(self, resource: Resource, phase: str, error: Exception) -> None:
+        """Log a failed phase; only required resources abort startup"""
+        logger.error("Resource lifecycle phase failed", extra={"extra_data": {
+            "resource": resource.name,
+            "phase": phase,
+            "error": str(error)
+        }})
+        if resource.required and phase == "startup":
+            raise error
+
+    def _record(self, name: str, phase: str, start: float) -> None:
+        """Store the phase duration in milliseconds"""
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        self.timings[f"{name}.{phase}"] = duration_ms
+        logger.debug("Resource lifecycle phase completed", extra={"extra_data": {
+            "resource": name,
+            "phase": phase,
+            "duration_ms": duration_ms
+        }})
+
+    def _log_total(self, phase: str, start: float) -> None:
+        """Log the total duration of a phase with the per-resource breakdown"""
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        self.timings[phase] = duration_ms
+        logger.info(f"Application {phase} completed", extra={"extra_data": {
+            "duration_ms": duration_ms,
+            "timings_ms": dict(self.timings)
+        }})
+
+
+lifecycle = Lifecycle(
+    retry_initial_seconds=app_config.startup_retry_initial_seconds,
+    retry_max_seconds=app_config.startup_retry_max_seconds
+)
+
+# Startup order: client (ping included) then executor; shutdown drains the executor first
+# and stops the background log writer last
+lifecycle.register("logging", shutdown=shutdown_logging)
+lifecycle.register("mongodb", startup=init_database, shutdown=close_client)
+lifecycle.register("executor", startup=init_executor, shutdown=shutdown_executor)
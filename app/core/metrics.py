@@ -0,0 +1,332 @@
+"""
+In-process metrics registry
+Counters, gauges and fixed-bucket histograms with Prometheus text exposition.
+
+Recording is lock-light: counters and histograms write to per-thread shards
+(no lock on the hot path, only when a new thread records for the first time)
+and shards are summed at scrape time.
+"""
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from pymongo import monitoring
+from app.core.emf import emf_sink
+
+LabelValues = Tuple[str, ...]
+
+# Default latency buckets in seconds (1 ms .. 10 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Shards:
+    """Per-thread dicts registered once per thread and merged on read"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> dict:
+        """Shard of the calling thread (registered on first use)"""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def snapshot(self) -> List[dict]:
+        """Copies of every shard for aggregation"""
+        with self._lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+
+class Metric(ABC):
+    """Base metric with a name, help text and label names"""
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.extend(extra.items())
+        if not pairs:
+            return ""
+        rendered = ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs)
+        return "{" + rendered + "}"
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines for this metric"""
+
+    def expose(self) -> str:
+        """Render HELP/TYPE lines followed by the samples"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonic counter"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._shards = _Shards()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        """Increment the counter for the given label values"""
+        shard = self._shards.get()
+        shard[labelvalues] = shard.get(labelvalues, 0.0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        """Totals per label set across all threads"""
+        totals: Dict[LabelValues, float] = {}
+        for shard in self._shards.snapshot():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._format_labels(labels)} {_num(value)}" for labels, value in self.values().items()]
+
+
+class Gauge(Metric):
+    """Point-in-time value, either set directly or computed at scrape time by a callback"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        """Set the gauge for the given label values"""
+        self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        """Increment (only call from a single thread, e.g. the event loop)"""
+        self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        """Decrement (same threading rules as inc)"""
+        self.inc(*labelvalues, amount=-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Compute the (unlabelled) value at scrape time"""
+        self._function = function
+
+    def value(self, *labelvalues: str) -> float:
+        """Current value for the given label values"""
+        if self._function is not None:
+            return self._function()
+        return self._values.get(labelvalues, 0.0)
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_num(self._function())}"]
+            except Exception:
+                return []
+        return [f"{self.name}{self._format_labels(labels)} {_num(value)}" for labels, value in self._values.copy().items()]
+
+
+class Histogram(Metric):
+    """Fixed-bucket histogram: constant memory per label set"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._shards = _Shards()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """Record one observation"""
+        shard = self._shards.get()
+        state = shard.get(labelvalues)
+        if state is None:
+            # [bucket counts..., +Inf count, sum]
+            state = shard[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def values(self) -> Dict[LabelValues, List[float]]:
+        """Merged [bucket counts..., +Inf count, sum] per label set"""
+        totals: Dict[LabelValues, List[float]] = {}
+        for shard in self._shards.snapshot():
+            for labels, state in shard.items():
+                merged = totals.get(labels)
+                if merged is None:
+                    totals[labels] = list(state)
+                else:
+                    for index, value in enumerate(state):
+                        merged[index] += value
+        return totals
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, state in self.values().items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._format_labels(labels, {'le': _num(bound)})} {cumulative}")
+            cumulative += state[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{self._format_labels(labels, {'le': '+Inf'})} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(labels)} {_num(state[-1])}")
+            lines.append(f"{self.name}_count{self._format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics by name and renders the text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def expose(self) -> str:
+        """Render all metrics in the Prometheus text format"""
+        return "\n".join(metric.expose() for metric in self._metrics.values()) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = MetricsRegistry()
+
+# HTTP
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by method, route template and status code", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route template", ("method", "route")
+)
+
+# Executor
+executor_queue_depth = registry.gauge("executor_queue_depth", "Tasks waiting in the PyMongo thread pool queue")
+executor_threads = registry.gauge("executor_threads", "Threads started by the PyMongo thread pool")
+executor_active_tasks = registry.gauge("executor_active_tasks", "Tasks submitted to the PyMongo thread pool and not yet finished")
+
+# MongoDB
+mongodb_command_duration_seconds = registry.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by command name", ("command",)
+)
+mongodb_command_failures_total = registry.counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands by command name", ("command",)
+)
+mongodb_pool_checkout_wait_seconds = registry.histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting to check out a pooled connection"
+)
+mongodb_pool_checkout_failures_total = registry.counter(
+    "mongodb_pool_checkout_failures_total", "Failed connection checkouts by reason", ("reason",)
+)
+
+
+# Admission control
+rate_limit_rejections_total = registry.counter(
+    "rate_limit_rejections_total", "Requests rejected by the per-tenant rate limiter by tier and key type", ("tier", "key_type")
+)
+db_concurrency_limit = registry.gauge("db_concurrency_limit", "Current adaptive concurrency limit for database operations")
+db_concurrency_inflight = registry.gauge("db_concurrency_inflight", "Database operations admitted by the adaptive limiter and not yet finished")
+db_concurrency_rejections_total = registry.counter(
+    "db_concurrency_rejections_total", "Database operations shed by the adaptive concurrency limiter"
+)
+
+# Caches
+search_index_queries_total = registry.counter(
+    "search_index_queries_total", "Typeahead searches for hot sellers by outcome (hit answered in memory, miss fell back to MongoDB)", ("result",)
+)
+search_index_bytes = registry.gauge("search_index_bytes", "Approximate memory used by in-process seller search indexes")
+page_cache_requests_total = registry.counter(
+    "page_cache_requests_total", "list_users result-page cache lookups by result (hit rate = hit / total)", ("result",)
+)
+page_cache_entries = registry.gauge("page_cache_entries", "Pages held by the list_users result cache")
+page_cache_bytes = registry.gauge("page_cache_bytes", "Approximate memory used by the list_users result cache")
+email_filter_checks_total = registry.counter(
+    "email_filter_checks_total", "Email existence checks by Bloom filter outcome (negative skipped MongoDB, bypass had no current filter)", ("result",)
+)
+email_filter_bytes = registry.gauge("email_filter_bytes", "Memory used by the email Bloom filter of each configured seller", ("seller_id",))
+email_filter_false_positive_rate = registry.gauge(
+    "email_filter_false_positive_rate", "Estimated false-positive rate of each seller's email Bloom filter at its current fill", ("seller_id",)
+)
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Records MongoDB command latency (runs on executor threads)"""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        mongodb_command_duration_seconds.observe(event.duration_micros / 1_000_000, event.command_name)
+        emf_sink.increment("DbTime", event.duration_micros / 1000, "Milliseconds")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        mongodb_command_duration_seconds.observe(event.duration_micros / 1_000_000, event.command_name)
+        mongodb_command_failures_total.inc(event.command_name)
+        emf_sink.increment("DbTime", event.duration_micros / 1000, "Milliseconds")
+        emf_sink.increment("DbErrors")
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Records connection pool checkout waits and failures"""
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        mongodb_pool_checkout_wait_seconds.observe(event.duration)
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        mongodb_pool_checkout_wait_seconds.observe(event.duration)
+        mongodb_pool_checkout_failures_total.inc(str(event.reason))
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_checked_in(self, event) -> None:
+        pass
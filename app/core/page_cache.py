@@ -0,0 +1,85 @@
+"""
+Result-page cache for list_users
+Entries are keyed on the normalized query plus the seller's change generation
+(app/core/generations.py). A write moves the generation, so older pages become
+unreachable at once (O(1) invalidation) and age out through LRU eviction.
+Bounded by entry count and approximate bytes.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from app.config.settings import app_config
+from app.core.emf import emf_sink
+from app.core.lifecycle import lifecycle
+from app.core.metrics import page_cache_requests_total, page_cache_entries, page_cache_bytes
+
+_DOC_OVERHEAD = 300
+_VALUE_OVERHEAD = 50
+
+Page = Tuple[List[Dict[str, Any]], int]
+
+
+def estimate_page_size(users: List[Dict[str, Any]]) -> int:
+    """Approximate resident size of a cached page of user documents"""
+    size = _DOC_OVERHEAD
+    for doc in users:
+        size += _DOC_OVERHEAD
+        for value in doc.values():
+            size += _VALUE_OVERHEAD + (len(value) if isinstance(value, str) else 0)
+            if isinstance(value, list):
+                size += sum(len(item) + _VALUE_OVERHEAD for item in value if isinstance(item, str))
+    return size
+
+
+class PageCache:
+    """LRU of (users, total_count) pages; used from the event loop thread only"""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Page, int]]" = OrderedDict()
+        self.size_bytes = 0
+
+    def get(self, key: Hashable) -> Optional[Page]:
+        """Cached page or None (records the hit/miss in /metrics and the invocation's EMF line)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            page_cache_requests_total.inc("miss")
+            emf_sink.increment("CacheMisses")
+            return None
+        self._entries.move_to_end(key)
+        page_cache_requests_total.inc("hit")
+        emf_sink.increment("CacheHits")
+        return entry[0]
+
+    def put(self, key: Hashable, page: Page) -> None:
+        """Store a page, evicting least recently used entries beyond the bounds"""
+        size = estimate_page_size(page[0])
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= previous[1]
+        self._entries[key] = (page, size)
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+
+    def clear(self) -> None:
+        """Drop every page"""
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+list_page_cache = PageCache(
+    max_entries=app_config.list_cache_max_entries,
+    max_bytes=app_config.list_cache_max_mb * 1024 * 1024
+)
+
+lifecycle.register("page_cache", shutdown=list_page_cache.clear)
+
+page_cache_entries.set_function(lambda: len(list_page_cache))
+page_cache_bytes.set_function(lambda: list_page_cache.size_bytes)
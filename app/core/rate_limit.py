@@ -0,0 +1,101 @@
+"""
+In-process token-bucket rate limiter
+O(1) checks per key with LRU-ordered buckets; idle buckets are evicted so
+memory stays proportional to the number of recently active tenants.
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class RateLimitTier:
+    """Sustained rate (tokens per second) and burst capacity"""
+    name: str
+    rate: float
+    burst: float
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a check, with the values needed for RateLimit-* headers"""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_seconds: int
+    retry_after: int = 0
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by an arbitrary string (e.g. "seller:42").
+    Not thread-safe by design: checks run on the event loop thread.
+    """
+
+    def __init__(self, idle_ttl: float = 300.0, max_keys: int = 10000):
+        self.idle_ttl = idle_ttl
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+
+    def check(self, key: str, tier: RateLimitTier, cost: float = 1.0, now: Optional[float] = None) -> RateLimitResult:
+        """Consume `cost` tokens from the key's bucket if available"""
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(tier.burst, now)
+            self._evict(now)
+        else:
+            bucket.tokens = min(tier.burst, bucket.tokens + (now - bucket.updated) * tier.rate)
+            bucket.updated = now
+            self._buckets.move_to_end(key)
+
+        allowed = bucket.tokens >= cost
+        if allowed:
+            bucket.tokens -= cost
+
+        # Seconds until the bucket is full again / until `cost` tokens are available
+        reset_seconds = math.ceil((tier.burst - bucket.tokens) / tier.rate) if tier.rate > 0 else 0
+        retry_after = 0
+        if not allowed:
+            retry_after = max(1, math.ceil((cost - bucket.tokens) / tier.rate)) if tier.rate > 0 else 60
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=int(tier.burst),
+            remaining=max(0, int(bucket.tokens)),
+            reset_seconds=reset_seconds,
+            retry_after=retry_after
+        )
+
+    def refund(self, key: str, tier: RateLimitTier, cost: float = 1.0) -> None:
+        """Return tokens taken by a check whose request was rejected by another bucket"""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.tokens = min(tier.burst, bucket.tokens + cost)
+
+    def _evict(self, now: float) -> None:
+        """Drop least recently used buckets that are idle or over the key budget"""
+        while self._buckets:
+            oldest_key, oldest = next(iter(self._buckets.items()))
+            if len(self._buckets) > self.max_keys or now - oldest.updated > self.idle_ttl:
+                del self._buckets[oldest_key]
+            else:
+                break
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def build_tiers(tiers: Dict[str, List[float]]) -> Dict[str, RateLimitTier]:
+    """Build tiers from config: {"standard": [rate, burst], ...}"""
+    return {name: RateLimitTier(name=name, rate=float(values[0]), burst=float(values[1])) for name, values in tiers.items()}
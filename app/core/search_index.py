@@ -0,0 +1,322 @@
+"""
+In-process typeahead index for hot sellers
+Sorted (search_key, user_id) arrays per seller, answering prefix searches with
+a bisect instead of a MongoDB round trip. Indexes are built lazily in the
+background from a streaming cursor and evicted (whole tenants, LRU) beyond a
+memory budget.
+
+Freshness: each index remembers the seller generation it reflects (see
+app/core/generations.py). When the generation moves on (a write on any
+instance), queries fall back to MongoDB while a background task catches the
+index up with the users stamped since, instead of rebuilding it.
+
+Builds and catch-ups are admitted by the adaptive concurrency limiter like any
+other query. A seller whose build fails or does not fit the budget is not
+retried until its backoff expires (doubling per failure), so misses do not turn
+into a collection scan per keystroke. Installed indexes are never modified:
+catch-ups apply to a copy that replaces them, so searches scan without the lock.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.config.settings import app_config
+from app.core.database import run_in_executor
+from app.core.emf import emf_sink
+from app.core.generations import seller_generations
+from app.core.lifecycle import lifecycle
+from app.core.metrics import search_index_queries_total, search_index_bytes
+from app.models.users import UserModel
+from app.utils.logger import logger
+
+# Fields kept per user: enough to build UserResponse without MongoDB
+INDEXED_FIELDS = (
+    "_id", "seller_id", "email", "first_name", "last_name",
+    "phone_number", "is_active", "created_at", "updated_at", "search_keys"
+)
+
+# Rough per-object overheads used for the memory estimate
+_DOC_OVERHEAD = 400
+_ENTRY_OVERHEAD = 120
+_MAX_BUILD_BACKOFF = 3600.0
+
+
+def _doc_size(doc: Dict[str, Any]) -> int:
+    """Approximate resident size of one indexed user (document + key entries)"""
+    keys = doc.get("search_keys") or []
+    strings = sum(len(value) for value in (doc.get("email"), doc.get("first_name"), doc.get("last_name"), doc.get("phone_number")) if value)
+    return _DOC_OVERHEAD + strings + sum(len(key) + _ENTRY_OVERHEAD for key in keys)
+
+
+class SellerSearchIndex:
+    """Sorted key entries plus the indexed documents of one seller (not thread-safe; read-only once installed)"""
+
+    def __init__(self, seller_id: int, generation: int):
+        self.seller_id = seller_id
+        self.generation = generation
+        self.entries: List[Tuple[str, str]] = []
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.size_bytes = 0
+
+    def add_sorted(self, docs: List[Dict[str, Any]]) -> None:
+        """Bulk load (build path): append then sort once"""
+        for doc in docs:
+            user_id = str(doc["_id"])
+            self.docs[user_id] = doc
+            self.size_bytes += _doc_size(doc)
+            self.entries.extend((key, user_id) for key in doc.get("search_keys") or ())
+        self.entries.sort()
+
+    def copy(self, generation: int) -> "SellerSearchIndex":
+        """Independent copy to modify (documents are shared: upsert replaces them, never mutates)"""
+        clone = SellerSearchIndex(self.seller_id, generation)
+        clone.entries = list(self.entries)
+        clone.docs = dict(self.docs)
+        clone.size_bytes = self.size_bytes
+        return clone
+
+    def upsert(self, doc: Dict[str, Any]) -> None:
+        """Insert or replace one user (catch-up path)"""
+        user_id = str(doc["_id"])
+        self.remove(user_id)
+        doc = {field: doc.get(field) for field in INDEXED_FIELDS}
+        if doc["search_keys"] is None:
+            # Users written before search_keys existed
+            doc["search_keys"] = UserModel.build_search_keys(doc["email"], doc["first_name"], doc["last_name"])
+        self.docs[user_id] = doc
+        self.size_bytes += _doc_size(doc)
+        for key in doc.get("search_keys") or ():
+            insort(self.entries, (key, user_id))
+
+    def remove(self, user_id: str) -> None:
+        """Drop a user and its key entries"""
+        doc = self.docs.pop(user_id, None)
+        if doc is None:
+            return
+        self.size_bytes -= _doc_size(doc)
+        for key in doc.get("search_keys") or ():
+            position = bisect_left(self.entries, (key, user_id))
+            if position < len(self.entries) and self.entries[position] == (key, user_id):
+                del self.entries[position]
+
+    def search(self, prefix: str, is_active: Optional[bool], skip: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Distinct users with a key starting with `prefix`, in key order (same as the MongoDB index)"""
+        seen: Set[str] = set()
+        page: List[Dict[str, Any]] = []
+        total = 0
+        position = bisect_left(self.entries, (prefix, ""))
+        while position < len(self.entries):
+            key, user_id = self.entries[position]
+            if not key.startswith(prefix):
+                break
+            position += 1
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            doc = self.docs[user_id]
+            if is_active is not None and doc.get("is_active", True) != is_active:
+                continue
+            if skip <= total < skip + limit:
+                page.append(doc)
+            total += 1
+        return page, total
+
+
+class SearchIndexRegistry:
+    """Per-seller indexes for configured hot sellers, bounded by an LRU memory budget"""
+
+    def __init__(self, sellers: List[int], memory_budget_bytes: int, build_backoff_seconds: float = 30.0):
+        self.sellers = set(sellers)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.build_backoff_seconds = build_backoff_seconds
+        self._indexes: "OrderedDict[int, SellerSearchIndex]" = OrderedDict()
+        self._building: Set[int] = set()
+        # seller_id -> (no build before, monotonic; last delay) after a failed or oversized build
+        self._backoff: Dict[int, Tuple[float, float]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(index.size_bytes for index in self._indexes.values())
+
+    def is_hot(self, seller_id: int) -> bool:
+        return seller_id in self.sellers
+
+    async def search(
+        self,
+        seller_id: int,
+        search: str,
+        is_active: Optional[bool],
+        skip: int,
+        limit: int
+    ) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """Answer a normalized prefix search from memory, or None to fall back to MongoDB"""
+        if seller_id not in self.sellers:
+            return None
+
+        generation = await seller_generations.get(seller_id)
+        if generation is None:
+            # The newest write is still settling: MongoDB answers meanwhile
+            search_index_queries_total.inc("miss")
+            emf_sink.increment("SearchIndexMisses")
+            return None
+        with self._lock:
+            index = self._indexes.get(seller_id)
+            # An index ahead of a cached generation reflects more writes, not fewer
+            if index is not None and index.generation >= generation:
+                self._indexes.move_to_end(seller_id)
+            else:
+                index = None
+        if index is not None:
+            # Installed indexes are replaced, never modified: no lock needed to scan
+            result = index.search(search, is_active, skip, limit)
+            search_index_queries_total.inc("hit")
+            emf_sink.increment("SearchIndexHits")
+            return result
+
+        search_index_queries_total.inc("miss")
+        emf_sink.increment("SearchIndexMisses")
+        self._schedule_build(seller_id)
+        return None
+
+    async def start(self) -> None:
+        """Build the configured sellers' indexs in the background, before their first request (lifecycle startup)"""
+        for seller_id in self.sellers:
+            self._schedule_build(seller_id)
+
+    async def close(self) -> None:
+        """Cancel background builds and drop every index (lifecycle shutdown)"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self.clear()
+
+    def _schedule_build(self, seller_id: int) -> None:
+        if seller_id in self._building:
+            return
+        backoff = self._backoff.get(seller_id)
+        if backoff is not None and time.monotonic() < backoff[0]:
+            return
+        self._building.add(seller_id)
+        # Fresh context: the build must not inherit the request deadline or timings
+        task = asyncio.create_task(self._build(seller_id), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _build(self, seller_id: int) -> None:
+        """Catch the seller's index up, or stream its users into a new one"""
+        try:
+            index = await run_in_executor(self._build_sync, seller_id)
+            if index is None:
+                return
+            with self._lock:
+                self._indexes[seller_id] = index
+                self._indexes.move_to_end(seller_id)
+                self._enforce_budget(keep=seller_id)
+            logger.info("Seller search index built", extra={"extra_data": {
+                "seller_id": seller_id,
+                "users": len(index.docs),
+                "size_bytes": index.size_bytes
+            }})
+        except Exception as e:
+            # Includes limiter rejections (ServiceOverloadedError): back off either way
+            self._defer(seller_id)
+            logger.warning("Failed to build seller search index", extra={"extra_data": {
+                "seller_id": seller_id,
+                "retry_in_seconds": self._backoff[seller_id][1],
+                "error": str(e)
+            }})
+        finally:
+            self._building.discard(seller_id)
+
+    def _build_sync(self, seller_id: int) -> Optional[SellerSearchIndex]:
+        """A new index, or None when the current one was caught up in place (or the generation is settling)"""
+        generation = seller_generations.read_sync(seller_id)
+        if not seller_generations.settled(generation):
+            return None
+        with self._lock:
+            current = self._indexes.get(seller_id)
+        if current is not None:
+            self._catch_up_sync(current, generation)
+            return None
+
+        # Users written during the scan may be read in their new state or not at all;
+        # either way their stamp is above `generation`, so the next catch-up covers them
+        index = SellerSearchIndex(seller_id, generation)
+        collection = UserModel.get_collection()
+        cursor = collection.find({"seller_id": seller_id}, {field: 1 for field in INDEXED_FIELDS}).batch_size(1000)
+
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= 1000:
+                index.add_sorted(batch)
+                batch = []
+                if index.size_bytes > self.memory_budget_bytes:
+                    self._defer(seller_id)
+                    logger.warning("Seller search index exceeds the memory budget", extra={"extra_data": {
+                        "seller_id": seller_id,
+                        "budget_bytes": self.memory_budget_bytes,
+                        "retry_in_seconds": self._backoff[seller_id][1]
+                    }})
+                    return None
+        index.add_sorted(batch)
+        self._backoff.pop(seller_id, None)
+        return index
+
+    def _catch_up_sync(self, index: SellerSearchIndex, generation: int) -> None:
+        """Replace an installed index with a copy that includes the users stamped in (index.generation, generation]"""
+        if index.generation >= generation:
+            return
+        projection = {field: 1 for field in INDEXED_FIELDS}
+        updated = index.copy(generation)
+        for doc in seller_generations.changes_sync(index.seller_id, index.generation, generation, projection):
+            updated.upsert(doc)
+        with self._lock:
+            if self._indexes.get(index.seller_id) is not index:
+                # Evicted meanwhile
+                return
+            self._indexes[index.seller_id] = updated
+            self._enforce_budget(keep=index.seller_id)
+        self._backoff.pop(index.seller_id, None)
+
+    def _defer(self, seller_id: int) -> None:
+        """Hold off builds for the seller: the base backoff, doubled per consecutive failure"""
+        previous = self._backoff.get(seller_id)
+        delay = self.build_backoff_seconds if previous is None else min(previous[1] * 2, _MAX_BUILD_BACKOFF)
+        self._backoff[seller_id] = (time.monotonic() + delay, delay)
+
+    def _enforce_budget(self, keep: int) -> None:
+        """Evict least recently used tenants until the total fits the budget"""
+        total = self.size_bytes
+        while total > self.memory_budget_bytes and len(self._indexes) > 1:
+            seller_id, index = next(iter(self._indexes.items()))
+            if seller_id == keep:
+                self._indexes.move_to_end(seller_id)
+                continue
+            del self._indexes[seller_id]
+            total -= index.size_bytes
+        if total > self.memory_budget_bytes:
+            self._indexes.pop(keep, None)
+
+    def clear(self) -> None:
+        """Drop every index and build backoff"""
+        with self._lock:
+            self._indexes.clear()
+            self._backoff.clear()
+
+
+search_indexes = SearchIndexRegistry(
+    sellers=app_config.search_index_sellers,
+    memory_budget_bytes=app_config.search_index_memory_mb * 1024 * 1024,
+    build_backoff_seconds=app_config.search_index_build_backoff_seconds
+)
+lifecycle.register("search_index", startup=search_indexes.start, shutdown=search_indexes.close)
+
+search_index_bytes.set_function(lambda: search_indexes.size_bytes)
@@ -1,13 +1,18 @@
-from typing import Optional
+from typing import List, Optional
 from fastapi import HTTPException, status, Path, Query, Depends
 from bson import ObjectId
 from bson.errors import InvalidId
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from app.core.emf import emf_sink
+from app.models.users import UserModel
 
 
 async def validate_seller_id(
     seller_id: int = Path(..., gt=0, description="Seller unique identifier")
 ) -> int:
     """Validate seller_id path parameter"""
+    # High-cardinality: becomes an EMF property unless configured as a dimension
+    emf_sink.set_dimension("SellerId", str(seller_id))
     return seller_id
 
 
@@ -25,6 +30,46 @@ async def validate_user_id(
         )
 
 
+_email_adapter = TypeAdapter(EmailStr)
+
+
+async def validate_email(
+    email: str = Path(..., description="User email address")
+) -> str:
+    """Validate an email path parameter, normalized the same way as request bodies"""
+    try:
+        return _email_adapter.validate_python(email)
+    except ValidationError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid email format"
+        )
+
+
+def validate_user_ids(user_ids: List[str], max_ids: int) -> List[str]:
+    """
+    Validate a multi-get ID list (same rule as validate_user_id, plus a size cap).
+    Returns the ids in canonical lowercase hex, the form results are keyed and echoed by.
+    """
+    if not user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one user ID is required"
+        )
+    if len(user_ids) > max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {max_ids} user IDs per request"
+        )
+    invalid = [user_id for user_id in user_ids if not ObjectId.is_valid(user_id)]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid user ID format: {', '.join(invalid[:10])}"
+        )
+    return [str(ObjectId(user_id)) for user_id in user_ids]
+
+
 class PaginationParams:
     """Reusable pagination parameters"""
 
@@ -63,4 +108,7 @@ async def get_search_params(
     is_active: Optional[bool] = Query(None, description="Filter by active status")
 ) -> SearchParams:
     """Dependency to get search parameters"""
+    if search is not None and not UserModel.normalize_search_term(search):
+        # Only spaces or combining marks: treated as no search (not as a match-all prefix)
+        search = None
     return SearchParams(search=search, is_active=is_active)
\ No newline at end of file
@@ -0,0 +1,90 @@
+import hashlib
+from typing import Any, Awaitable, Callable, Optional
+from fastapi import Header, HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from app.config.settings import app_config
+from app.core.deadline import remaining_seconds
+from app.core.idempotency import InMemoryIdempotencyStore, MongoIdempotencyStore, execute_idempotent
+from app.core.lifecycle import lifecycle
+from app.utils.logger import json_dumps
+
+MAX_KEY_LENGTH = 255
+
+if app_config.idempotency_store == "mongodb":
+    idempotency_store = MongoIdempotencyStore(
+        collection_name=app_config.idempotency_collection,
+        ttl=app_config.idempotency_ttl_seconds,
+        lock_ttl=app_config.idempotency_lock_seconds
+    )
+else:
+    idempotency_store = InMemoryIdempotencyStore(
+        ttl=app_config.idempotency_ttl_seconds,
+        max_keys=app_config.idempotency_max_keys
+    )
+    # The MongoDB store keeps nothing in process (claims expire after lock_ttl)
+    lifecycle.register("idempotency_store", shutdown=idempotency_store.close)
+
+
+async def get_idempotency_key(
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+) -> Optional[str]:
+    """Optional Idempotency-Key header (ignored when the feature is disabled)"""
+    if not app_config.idempotency_enabled or idempotency_key is None:
+        return None
+    if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH or not idempotency_key.isprintable():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} printable characters"
+        )
+    return idempotency_key
+
+
+async def idempotent_response(
+    request: Request,
+    response: Response,
+    seller_id: int,
+    idempotency_key: str,
+    status_code: int,
+    produce_content: Callable[[], Awaitable[Any]]
+) -> Response:
+    """
+    Run the route body once per (seller, Idempotency-Key) and replay its response
+
+    Args:
+        request: Current request (its raw body is hashed)
+        response: Injected response whose headers (e.g. RateLimit-*) are kept
+        seller_id: Tenant owning the key
+        idempotency_key: Validated header value
+        status_code: Status code of a successful response
+        produce_content: Coroutine returning the response content (same as the non-idempotent path)
+
+    Returns:
+        The original response, with `Idempotent-Replayed: true` when replayed
+    """
+    body_hash = hashlib.sha256(await request.body()).hexdigest()
+
+    async def _produce():
+        content = await produce_content()
+        # Same encoding as the route without the key: nulls are only dropped by the response model
+        content = jsonable_encoder(content, exclude_none=app_config.validate_responses)
+        return status_code, json_dumps(content).encode("utf-8"), "application/json"
+
+    # Duplicates wait for the in-flight attempt, but never past the request deadline
+    wait_seconds = app_config.idempotency_wait_seconds
+    remaining = remaining_seconds()
+    if remaining is not None:
+        wait_seconds = max(0.0, min(wait_seconds, remaining))
+
+    record, replayed = await execute_idempotent(
+        idempotency_store,
+        f"{seller_id}:{idempotency_key}",
+        body_hash,
+        _produce,
+        wait_seconds=wait_seconds
+    )
+
+    result = Response(content=record.body, status_code=record.status_code, media_type=record.media_type)
+    result.headers.update(response.headers)
+    if replayed:
+        result.headers["Idempotent-Replayed"] = "true"
+    return result
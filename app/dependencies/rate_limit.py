@@ -0,0 +1,78 @@
+from fastapi import Depends, HTTPException, Request, status
+from app.config.settings import app_config
+from app.core.metrics import rate_limit_rejections_total
+from app.core.rate_limit import TokenBucketLimiter, RateLimitResult, RateLimitTier, build_tiers
+from app.dependencies.common import validate_seller_id
+from app.middleware.auth import get_authorizer_subject
+from app.utils.logger import logger
+
+limiter = TokenBucketLimiter(
+    idle_ttl=app_config.rate_limit_idle_ttl_seconds,
+    max_keys=app_config.rate_limit_max_keys
+)
+tiers = build_tiers(app_config.rate_limit_tiers)
+
+
+def get_seller_tier(seller_id: int) -> RateLimitTier:
+    """Tier configured for the seller, falling back to the default tier"""
+    name = app_config.rate_limit_seller_tiers.get(seller_id, app_config.rate_limit_default_tier)
+    return tiers.get(name) or tiers[app_config.rate_limit_default_tier]
+
+
+def _rate_limit_headers(result: RateLimitResult) -> dict:
+    """Standard RateLimit-* headers (plus Retry-After when rejected)"""
+    headers = {
+        "RateLimit-Limit": str(result.limit),
+        "RateLimit-Remaining": str(result.remaining),
+        "RateLimit-Reset": str(result.reset_seconds)
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(result.retry_after)
+    return headers
+
+
+async def enforce_seller_rate_limit(
+    request: Request,
+    seller_id: int = Depends(validate_seller_id)
+) -> None:
+    """
+    Token-bucket admission per seller (and optionally per authorizer subject).
+    RateLimit-* headers are added to whatever response the request ends with by
+    RateLimitHeadersMiddleware (304s, replays and error responses included).
+    """
+    if not app_config.rate_limit_enabled:
+        return
+
+    tier = get_seller_tier(seller_id)
+    subject = get_authorizer_subject(request) if app_config.rate_limit_by_subject else None
+    subject_result = None
+
+    # Subject first: a request it rejects must not spend a seller token
+    if subject:
+        subject_result = limiter.check(f"sub:{subject}", tier)
+
+    if subject_result is not None and not subject_result.allowed:
+        result, key_type = subject_result, "subject"
+    else:
+        result, key_type = limiter.check(f"seller:{seller_id}", tier), "seller"
+        if subject_result is not None:
+            if not result.allowed:
+                limiter.refund(f"sub:{subject}", tier)
+            elif subject_result.remaining < result.remaining:
+                result, key_type = subject_result, "subject"
+
+    request.state.rate_limit_headers = _rate_limit_headers(result)
+
+    if not result.allowed:
+        rate_limit_rejections_total.inc(tier.name, key_type)
+        logger.warning("Rate limit exceeded", extra={"extra_data": lambda: {
+            "seller_id": seller_id,
+            "tier": tier.name,
+            "key_type": key_type,
+            "retry_after": result.retry_after
+        }})
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers=_rate_limit_headers(result)
+        )
@@ -1,69 +1,70 @@
 """
 Custom exception handlers for better error logging and response formatting
 """
-import json
+import random
+from datetime import datetime, timezone
 from fastapi import Request, HTTPException
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from app.utils.logger import logger
-from app.utils.response import create_error_response
-from app.schemas.response import ErrorDetail
+from fastapi.responses import JSONResponse, Response
+from app.config.settings import app_config
+from app.utils.logger import logger, json_dumps
+from app.utils.response import create_fast_error_response
+
+
+def _should_log_client_error() -> bool:
+    """Sample 4xx logging (404/409 probes are frequent and expected)"""
+    rate = app_config.client_error_log_sample_rate
+    return rate >= 1.0 or (rate > 0 and random.random() < rate)
 
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors with detailed logging"""
     try:
-        # Get request body for logging if available
-        request_body = None
-        if hasattr(request, "_body"):
-            try:
-                request_body = json.loads(request._body.decode())
-            except Exception:
-                request_body = "Could not parse request body"
-
-        # Extract validation errors
-        validation_errors = []
+        # Extract validation errors (each error already carries the offending input,
+        # so the request body is not decoded again)
+        errors = exc.errors()
         error_details = []
 
-        for error in exc.errors():
+        for error in errors:
             field_name = ".".join(str(loc) for loc in error["loc"]) if error.get("loc") else "unknown"
             error_msg = error.get("msg", "Validation error")
             error_input = error.get("input")
 
-            validation_errors.append({
+            error_details.append({
+                "code": "validation_error",
                 "field": field_name,
-                "message": error_msg,
-                "type": error.get("type"),
-                "input": error_input
+                "message": f"{error_msg} (received: {error_input})" if error_input is not None else error_msg
             })
 
-            error_details.append(ErrorDetail(
-                code="validation_error",
-                field=field_name,
-                message=f"{error_msg} (received: {error_input})" if error_input is not None else error_msg
-            ))
-
-        # Log comprehensive validation error
-        logger.warning("Request validation failed", extra={"extra_data": {
-            "method": request.method,
-            "url": str(request.url),
-            "path_params": dict(request.path_params),
-            "query_params": dict(request.query_params),
-            "request_body": request_body,
-            "validation_errors": validation_errors,
-            "total_errors": len(validation_errors)
-        }})
-
-        # Create standardized error response
-        error_response = create_error_response(
-            message="Request validation failed",
-            errors=error_details
-        )
-
-        return JSONResponse(
-            status_code=422,
-            content=error_response.model_dump()
-        )
+        if _should_log_client_error():
+            logger.warning("Request validation failed", extra={"extra_data": lambda: {
+                "method": request.method,
+                "path": request.scope["path"],
+                "path_params": dict(request.path_params),
+                "query_params": dict(request.query_params),
+                "validation_errors": [
+                    {
+                        "field": detail["field"],
+                        "message": error.get("msg"),
+                        "type": error.get("type"),
+                        "input": error.get("input")
+                    }
+                    for detail, error in zip(error_details, errors)
+                ],
+                "total_errors": len(errors)
+            }})
+
+        # Standardized error envelope, serialized without Pydantic models
+        content = json_dumps({
+            "metadata": {
+                "success": False,
+                "message": "Request validation failed",
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            },
+            "errors": error_details
+        })
+
+        return Response(content=content, status_code=422, media_type="application/json")
 
     except Exception as log_error:
         logger.error("Failed to log validation error", extra={"extra_data": {
@@ -80,26 +81,20 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions with logging"""
-    logger.warning("HTTP exception occurred", extra={"extra_data": {
-        "method": request.method,
-        "url": str(request.url),
-        "status_code": exc.status_code,
-        "detail": exc.detail
-    }})
-
-    # Create standardized error response
-    error_response = create_error_response(
-        message=str(exc.detail),
-        errors=[ErrorDetail(
-            code=f"http_{exc.status_code}",
-            field=None,
-            message=str(exc.detail)
-        )]
-    )
+    if exc.status_code >= 500 or _should_log_client_error():
+        log = logger.error if exc.status_code >= 500 else logger.warning
+        log("HTTP exception occurred", extra={"extra_data": lambda: {
+            "method": request.method,
+            "path": request.scope["path"],
+            "status_code": exc.status_code,
+            "detail": exc.detail
+        }})
 
-    return JSONResponse(
+    # Precomputed envelope for the (status, detail) pair
+    return create_fast_error_response(
         status_code=exc.status_code,
-        content=error_response.model_dump()
+        message=str(exc.detail),
+        headers=exc.headers
     )
 
 
@@ -112,17 +107,9 @@ async def general_exception_handler(request: Request, exc: Exception):
         "error_type": type(exc).__name__
     }})
 
-    # Create standardized error response
-    error_response = create_error_response(
+    return create_fast_error_response(
+        status_code=500,
         message="Internal server error",
-        errors=[ErrorDetail(
-            code="internal_error",
-            field=None,
-            message="An unexpected error occurred"
-        )]
+        code="internal_error",
+        detail="An unexpected error occurred"
     )
-
-    return JSONResponse(
-        status_code=500,
-        content=error_response.model_dump()
-    )
\ No newline at end of file
@@ -2,15 +2,92 @@
 Handler para AWS Lambda
 Configurar en Lambda: app.lambda_handler.handler
 """
-
+# Primero: marca el inicio de la fase INIT (para medir la duración del cold start)
+from app.utils.init_clock import INIT_START
+import time
 from mangum import Mangum
-from app.main import create_app
+from app.main import app  # Construida una sola vez al importar app.main
+from app.config.settings import app_config
+from app.core.database import warm_connection_pool
+from app.core.lifecycle import lifecycle
+from app.core.emf import emf_sink
+from app.utils.logger import flush_logs
+
+# Fuentes de eventos programados que solo buscan mantener la función caliente
+WARMER_SOURCES = ("aws.events", "serverless-plugin-warmup")
+
+# Init hook de Lambda: inicializa recursos durante la fase INIT (equivalente al lifespan)
+lifecycle.startup_sync()
+
+# Crear el handler ASGI para Lambda usando Mangum
+asgi_handler = Mangum(app, lifespan="off")
+
+# Duración del INIT; se reporta en la primera invocación (cold start)
+_init_duration_ms = (time.perf_counter() - INIT_START) * 1000
+_cold_start = True
+
+
+def is_warmer_event(event) -> bool:
+    """
+    Detecta pings de keep-warm (EventBridge/scheduler o payload con el marcador configurado)
+    """
+    if not isinstance(event, dict):
+        return False
+
+    # Los eventos HTTP de API Gateway siempre traen requestContext
+    if "requestContext" in event or "httpMethod" in event:
+        return False
+
+    if event.get(app_config.lambda_warmer_marker):
+        return True
 
-# Crear la aplicación FastAPI
-app = create_app()
+    return event.get("source") in WARMER_SOURCES
+
+
+def handle_warmer_event(event, context) -> dict:
+    """
+    Responde al ping sin despachar por ASGI; opcionalmente mantiene caliente el pool de MongoDB
+    """
+    pool_warmed = False
+    if app_config.lambda_warmer_warm_pool:
+        pool_warmed = warm_connection_pool()
+
+    return {"warmed": True, "pool_warmed": pool_warmed}
+
+
+def handler(event, context):
+    """
+    Entry point de Lambda: atiende warmers directamente y delega el resto a Mangum
+    """
+    try:
+        # Reintenta recursos que fallaron en INIT (p.ej. MongoDB no disponible en el cold start)
+        if not lifecycle.ready:
+            lifecycle.startup_sync()
+
+        if is_warmer_event(event):
+            return handle_warmer_event(event, context)
+
+        if app_config.emf_enabled:
+            begin_invocation_metrics()
+
+        return asgi_handler(event, context)
+    finally:
+        # Una línea EMF por invocación y logs encolados escritos antes de que Lambda congele el proceso
+        emf_sink.flush()
+        flush_logs()
+
+
+def begin_invocation_metrics() -> None:
+    """
+    Inicia el buffer EMF de la invocación e incluye el flag/duración de cold start
+    """
+    global _cold_start
 
-# Crear el handler para Lambda usando Mangum
-handler = Mangum(app, lifespan="off")
+    emf_sink.begin_invocation()
+    emf_sink.put_metric("ColdStart", 1 if _cold_start else 0, "Count")
+    if _cold_start:
+        emf_sink.put_metric("InitDuration", _init_duration_ms, "Milliseconds")
+        _cold_start = False
 
 
 # Opcional: Handler personalizado para casos específicos
@@ -21,5 +98,5 @@ def lambda_handler(event, context):
     print(f"Event: {event}")
     print(f"Context: {context}")
 
-    # Usar Mangum para manejar la request
+    # Usar el handler principal para manejar la request
     return handler(event, context)
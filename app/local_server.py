@@ -1,14 +1,15 @@
 # app/local_server.py
 """
-Servidor local para desarrollo
-Ejecutar con: python app/local_server.py
+Servidor local para desarrollo y servidor de producción para contenedores
+Ejecutar con: python app/local_server.py          (desarrollo, reload)
+              python app/local_server.py --prod   (producción, multi-worker)
 """
 import os
 import sys
-import asyncio
+import argparse
+import importlib.util
 from pathlib import Path
 import uvicorn
-from contextlib import asynccontextmanager
 
 # ⬇️ Coloca la raíz del repo (padre de /app) como cwd y en sys.path
 ROOT = Path(__file__).resolve().parents[1]
@@ -16,7 +17,27 @@ os.chdir(ROOT)
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-if __name__ == "__main__":
+
+def detect_cpu_count() -> int:
+    """Detecta las CPUs disponibles respetando affinity y la cuota de cgroups del contenedor"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # cgroup v2: "<quota> <period>" o "max <period>"
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) // int(period))))
+    except (OSError, ValueError):
+        pass
+
+    return max(1, cpus)
+
+
+def run_development_server() -> None:
+    """Servidor de desarrollo: un worker con reload"""
     uvicorn.run(
         "app.main:app",
         host="127.0.0.1",
@@ -28,3 +49,46 @@ if __name__ == "__main__":
         app_dir=str(ROOT),
         workers=1,  # evita sorpresas con múltiples workers en dev
     )
+
+
+def run_production_server(workers: int = 0) -> None:
+    """
+    Servidor de producción: múltiples workers, uvloop + httptools y drenado
+    ordenado en SIGTERM (uvicorn espera las requests en curso y luego ejecuta
+    el shutdown del lifespan, que cierra MongoDB)
+    """
+    from app.config.settings import app_config
+
+    workers = workers or app_config.server_workers or detect_cpu_count()
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+    print(f"🚀 Production server: {workers} workers, loop={loop}, http={http}")
+
+    uvicorn.run(
+        "app.main:app",
+        host=app_config.server_host,
+        port=app_config.server_port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        lifespan="on",
+        log_level=app_config.log_level.lower(),
+        access_log=False,  # la app ya emite logs estructurados
+        proxy_headers=True,
+        timeout_keep_alive=app_config.server_keep_alive,
+        timeout_graceful_shutdown=app_config.server_graceful_timeout,
+        app_dir=str(ROOT),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FastAPI server")
+    parser.add_argument("--prod", action="store_true", help="Run the multi-worker production server")
+    parser.add_argument("--workers", type=int, default=0, help="Worker count (default: derived from CPUs)")
+    args = parser.parse_args()
+
+    if args.prod:
+        run_production_server(workers=args.workers)
+    else:
+        run_development_server()
@@ -1,13 +1,19 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from app.routers import root, users, ulid
-from app.api import health, me
+from app.api import health, me, metrics, debug
 from app.api.v1 import sellers
 from app.api.v1 import users as v1_users
-from app.utils.logger import setup_logger
+from app.utils.logger import setup_logger, logger
 from app.config.settings import app_config
-from app.middleware.lambda_init import LambdaInitMiddleware
+from app.core.lifecycle import lifecycle
 from app.middleware.auth import LambdaAuthorizerMiddleware
+from app.middleware.timing import ServerTimingMiddleware
+from app.middleware.deadline import DeadlineMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.rate_limit import RateLimitHeadersMiddleware
 from app.exceptions.handlers import (
     validation_exception_handler,
     http_exception_handler,
@@ -15,12 +21,34 @@ from app.exceptions.handlers import (
 )
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifespan de la aplicación - inicializa y libera recursos del proceso
+    (en Lambda el equivalente es lifecycle.startup_sync() en app/lambda_handler.py).
+    Si un recurso no obligatorio falla (p.ej. MongoDB), se reintenta en segundo plano con backoff
+    """
+    await lifecycle.startup()
+
+    yield
+
+    logger.info("Shutting down FastAPI application")
+    await lifecycle.shutdown()
+
+
 def create_app() -> FastAPI:
     """
     App factory - Crea y configura la aplicación FastAPI
     """
     # Setup logger
-    logger = setup_logger(app_config.log_level)
+    logger = setup_logger(
+        app_config.log_level,
+        queue_enabled=app_config.log_queue_enabled,
+        queue_size=app_config.log_queue_size,
+        overflow=app_config.log_queue_overflow,
+        sample_rates=app_config.log_sample_rates,
+        rate_limits=app_config.log_rate_limits
+    )
     logger.info("Starting FastAPI application", extra={"extra_data": {
         "app_name": app_config.app_name,
         "version": app_config.app_version,
@@ -40,13 +68,24 @@ def create_app() -> FastAPI:
         openapi_url=openapi_url,
         docs_url=docs_url,
         redoc_url=redoc_url,
+        lifespan=lifespan,
         # Reduce startup overhead
         generate_unique_id_function=lambda route: f"{route.tags[0]}-{route.name}" if route.tags else route.name
     )
 
     # Add middleware
-    app.add_middleware(LambdaInitMiddleware)
+    if app_config.rate_limit_enabled:
+        app.add_middleware(RateLimitHeadersMiddleware)
     app.add_middleware(LambdaAuthorizerMiddleware)
+    if app_config.profiling_enabled:
+        app.add_middleware(ProfilingMiddleware)
+    if app_config.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+    if app_config.request_deadline_enabled:
+        # Pure ASGI and outside the auth middleware so its task inherits the deadline
+        app.add_middleware(DeadlineMiddleware)
+    # Outermost: activates per-request phase timing for everything below
+    app.add_middleware(ServerTimingMiddleware)
 
     # Add exception handlers
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
@@ -66,7 +105,11 @@ def register_routes(app: FastAPI) -> None:
     """
     app.include_router(root.router)
     app.include_router(health.router)
+    if app_config.metrics_enabled:
+        app.include_router(metrics.router)
     app.include_router(me.router)
+    if app_config.profiling_enabled:
+        app.include_router(debug.router)
     app.include_router(users.router)
     app.include_router(ulid.router)
     app.include_router(sellers.router)
@@ -3,8 +3,10 @@ from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from typing import Optional, Dict, Any
 import json
+import time
 from app.config.settings import app_config
 from app.utils.logger import logger
+from app.utils.timing import record_phase
 
 
 class LambdaAuthorizerMiddleware(BaseHTTPMiddleware):
@@ -19,9 +21,18 @@ class LambdaAuthorizerMiddleware(BaseHTTPMiddleware):
             # "/api/",  # Todas las rutas de API requieren autenticación
             "/me"  # Endpoint de perfil de usuario
         ]
-        self.excluded_paths = ["/health", "/docs", "/openapi.json", "/redoc"]
+        self.excluded_paths = ["/health", "/metrics", "/docs", "/openapi.json", "/redoc"]
 
     async def dispatch(self, request: Request, call_next):
+        start = time.perf_counter()
+
+        async def timed_call_next(request: Request):
+            record_phase("auth", (time.perf_counter() - start) * 1000)
+            return await call_next(request)
+
+        return await self._dispatch(request, timed_call_next)
+
+    async def _dispatch(self, request: Request, call_next):
         # Solo aplicar en Lambda
         if not app_config.is_lambda:
             logger.debug(
@@ -294,6 +305,28 @@ class LambdaAuthorizerMiddleware(BaseHTTPMiddleware):
         return None
 
 
+def get_authorizer_subject(request: Request) -> Optional[str]:
+    """
+    Claim "sub" del Lambda Authorizer, también en rutas que el middleware no protege
+    (solo del evento de API Gateway: los headers los controla el cliente)
+    """
+    user_id = getattr(request.state, "user_id", None)
+    if user_id:
+        return user_id
+
+    aws_event = request.scope.get("aws.event") or {}
+    authorizer = (aws_event.get("requestContext") or {}).get("authorizer") or {}
+    for context in (
+        authorizer.get("lambda"),                           # HTTP API v2, Lambda authorizer
+        (authorizer.get("jwt") or {}).get("claims"),        # HTTP API v2, JWT authorizer
+        authorizer.get("context"),                          # REST API con contexto anidado
+        authorizer                                          # REST API
+    ):
+        if isinstance(context, dict) and context.get("sub"):
+            return str(context["sub"])
+    return None
+
+
 def get_auth_context(request: Request) -> Dict[str, Any]:
     """
     Helper function para obtener el contexto de autenticación desde la request
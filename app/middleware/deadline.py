@@ -0,0 +1,36 @@
+"""
+Deadline Middleware
+Starts the per-request deadline from the Lambda context's remaining time
+(scope["aws.context"], set by Mangum) capped by the configured server budget
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config.settings import app_config
+from app.core.deadline import start_request_deadline, reset_request_deadline
+
+
+def request_budget_seconds(scope: Scope) -> float:
+    """Time the request may spend before the caller gives up, minus a safety margin"""
+    budget = app_config.request_budget_seconds
+    context = scope.get("aws.context")
+    get_remaining = getattr(context, "get_remaining_time_in_millis", None)
+    if callable(get_remaining):
+        budget = min(budget, get_remaining() / 1000)
+    return budget - app_config.request_deadline_margin_ms / 1000
+
+
+class DeadlineMiddleware:
+    """Pure ASGI middleware; register it outside BaseHTTPMiddleware-based middlewares"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_request_deadline(request_budget_seconds(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_request_deadline(token)
@@ -0,0 +1,45 @@
+"""
+Metrics Middleware
+Records request count and latency per route template and status code
+"""
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import http_requests_total, http_request_duration_seconds
+from app.core.emf import emf_sink
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; labels use the matched route template to bound cardinality"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # FastAPI stores the matched APIRoute in the scope during routing
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            duration = time.perf_counter() - start
+            http_request_duration_seconds.observe(duration, scope["method"], route_path)
+            http_requests_total.inc(scope["method"], route_path, str(status_code))
+
+            if emf_sink.active:
+                emf_sink.set_dimension("Route", f"{scope['method']} {route_path}")
+                emf_sink.set_property("StatusCode", status_code)
+                emf_sink.put_metric("Latency", duration * 1000, "Milliseconds")
+                emf_sink.increment("ServerErrors", 1 if status_code >= 500 else 0)
@@ -0,0 +1,75 @@
+"""
+Profiling Middleware
+Wraps selected requests with the process-wide sampling profiler (one profile
+at a time; the profile includes everything else the process runs meanwhile).
+Only registered when PROFILING_ENABLED=true, so it adds no overhead otherwise.
+"""
+import asyncio
+import hmac
+import random
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config.settings import app_config
+from app.utils.logger import logger
+from app.utils.profiling import process_sampler, profile_store, write_profile
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware: profiles on an allowlisted header or a sampling rate"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.header = app_config.profiling_header.lower().encode("latin-1")
+        self.token = app_config.profiling_token
+        self.allow_without_token = not app_config.is_production
+        self.sample_rate = app_config.profiling_sample_rate
+        self.interval = app_config.profiling_interval_ms / 1000
+
+    def should_profile(self, scope: Scope) -> bool:
+        """Header with the configured token (or any value outside production), else sampling"""
+        for name, value in scope["headers"]:
+            if name == self.header:
+                if self.token:
+                    return hmac.compare_digest(value.decode("latin-1"), self.token)
+                return self.allow_without_token
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Profiles are process-wide: while one runs, other requests go unprofiled
+        if not process_sampler.try_start(self.interval):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stacks = process_sampler.stop()
+            duration = process_sampler.duration
+            route = getattr(scope.get("route"), "path", scope["path"])
+            key = f"{scope['method']} {route}"
+            profile_store.add(key, stacks, duration)
+
+            try:
+                path = await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    write_profile,
+                    app_config.profiling_output_dir,
+                    key,
+                    stacks,
+                    app_config.profiling_format,
+                    app_config.profiling_interval_ms
+                )
+                logger.info("Request profile written", extra={"extra_data": {
+                    "route": key,
+                    "path": path,
+                    "samples": sum(stacks.values()),
+                    "duration_ms": round(duration * 1000, 3)
+                }})
+            except OSError as e:
+                logger.warning("Failed to write request profile", extra={"extra_data": {
+                    "route": key,
+                    "error": str(e)
+                }})
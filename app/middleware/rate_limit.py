@@ -0,0 +1,35 @@
+"""
+Rate Limit Headers Middleware
+The rate-limit dependency stores the RateLimit-* headers in the request state;
+this middleware adds them to the response actually sent. Routes that return
+their own Response (304, idempotent replays) and exception handlers bypass the
+injected Response object, so setting the headers there would drop them.
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RateLimitHeadersMiddleware:
+    """Pure ASGI middleware copying request.state.rate_limit_headers onto the response"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Same dict as request.state downstream
+        state = scope.setdefault("state", {})
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                rate_limit_headers = state.get("rate_limit_headers")
+                if rate_limit_headers:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in rate_limit_headers.items():
+                        headers.setdefault(name, value)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,53 @@
+"""
+Server-Timing Middleware
+Activates per-request phase timing, adds the Server-Timing header and emits a
+sampled structured log line with the phase breakdown
+"""
+import random
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config.settings import app_config
+from app.utils.logger import logger
+from app.utils.timing import start_request_timings, reset_request_timings
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware task overhead); register it outermost"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.header_enabled = app_config.server_timing_enabled
+        self.log_sample_rate = app_config.request_timing_log_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not (self.header_enabled or self.log_sample_rate > 0):
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = start_request_timings()
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.header_enabled:
+                    timings.add("total", (time.perf_counter() - start) * 1000)
+                    MutableHeaders(scope=message).append("Server-Timing", timings.header_value())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            reset_request_timings(token)
+            if self.log_sample_rate > 0 and random.random() < self.log_sample_rate:
+                if "total" not in timings.phases:
+                    timings.add("total", (time.perf_counter() - start) * 1000)
+                logger.info("Request timings", extra={"extra_data": lambda: {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status_code": status_code,
+                    "timings_ms": timings.as_dict()
+                }})
@@ -0,0 +1,189 @@
+"""
+Declarative MongoDB index registry
+Each model declares the indexes its queries rely on as IndexSpec entries
+(UserModel.INDEXES, MongoIdempotencyStore.INDEXES). deployment/sync_indexes.py
+diffs them against list_indexes(): missing indexes are created, and indexes
+nobody declared are reported, flagged when redundant (a left prefix of
+another index) or unused ($indexStats counters with no use over at least
+`min_unused_age`), and optionally dropped.
+Indexes are never created at runtime (Lambda cold starts).
+"""
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import TEXT
+
+ID_INDEX = "_id_"
+# $indexStats counters reset on restart/failover: younger ones prove nothing
+DEFAULT_MIN_UNUSED_AGE = timedelta(days=7)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """One declared index; `keys` as passed to create_index"""
+    name: str
+    keys: Tuple[Tuple[str, Any], ...]
+    unique: bool = False
+    partial_filter: Optional[Dict[str, Any]] = None
+    expire_after_seconds: Optional[int] = None
+    purpose: str = ""
+
+    def create_kwargs(self) -> Dict[str, Any]:
+        """Options for Collection.create_index"""
+        kwargs: Dict[str, Any] = {"name": self.name, "background": True}
+        if self.unique:
+            kwargs["unique"] = True
+        if self.partial_filter is not None:
+            kwargs["partialFilterExpression"] = self.partial_filter
+        if self.expire_after_seconds is not None:
+            kwargs["expireAfterSeconds"] = self.expire_after_seconds
+        return kwargs
+
+    def as_index_info(self) -> Dict[str, Any]:
+        """The spec in list_indexes() form, so both sides compare the same way"""
+        info: Dict[str, Any] = {"name": self.name, "key": dict(self.keys), "unique": self.unique}
+        text_fields = [name for name, kind in self.keys if kind == TEXT]
+        if text_fields:
+            info["weights"] = {name: 1 for name in text_fields}
+        if self.partial_filter is not None:
+            info["partialFilterExpression"] = self.partial_filter
+        if self.expire_after_seconds is not None:
+            info["expireAfterSeconds"] = self.expire_after_seconds
+        return info
+
+
+def _key_value(value: Any) -> Any:
+    # Servers may report 1.0 for indexes created by older drivers
+    return int(value) if isinstance(value, (int, float)) else value
+
+
+def index_definition(info: Dict[str, Any]) -> Tuple:
+    """Comparable definition of an index (name excluded); text indexes compare by their fields"""
+    key = [(name, _key_value(kind)) for name, kind in info["key"].items()]
+    text_fields: Tuple[str, ...] = ()
+    if any(kind == TEXT for _, kind in key):
+        text_fields = tuple(sorted(info.get("weights", {})))
+        key = [(name, kind) for name, kind in key if kind != TEXT and name not in ("_fts", "_ftsx")]
+    expire = info.get("expireAfterSeconds")
+    partial = info.get("partialFilterExpression")
+    return (
+        tuple(key),
+        text_fields,
+        bool(info.get("unique", False)),
+        json.dumps(partial, sort_keys=True, default=str) if partial is not None else None,
+        int(expire) if expire is not None else None
+    )
+
+
+@dataclass
+class IndexDiff:
+    """Declared vs existing indexes of one collection"""
+    missing: List[IndexSpec] = field(default_factory=list)
+    present: List[str] = field(default_factory=list)
+    # Declared name exists with another definition: needs a manual drop + sync
+    conflicting: List[Tuple[IndexSpec, Dict[str, Any]]] = field(default_factory=list)
+    undeclared: List[str] = field(default_factory=list)
+    # index name -> name of the index that makes it redundant
+    redundant: Dict[str, str] = field(default_factory=dict)
+    # index name -> accesses.since of indexes with no recorded use over at least min_unused_age
+    unused: Dict[str, Any] = field(default_factory=dict)
+    # index name -> accesses.since of indexes with no recorded use, but counters too recent to judge
+    unconfirmed: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def droppable(self) -> List[str]:
+        """Undeclared indexes that are redundant or unused (declared ones are removed from the registry first)"""
+        return [name for name in self.undeclared if name in self.redundant or name in self.unused]
+
+
+def _redundant_indexes(infos: List[Dict[str, Any]], declared: set) -> Dict[str, str]:
+    """
+    Indexes whose key is a left prefix of another index covering every document.
+    Unique, partial, TTL and text indexes are never flagged (they do more than serve queries).
+    """
+    redundant: Dict[str, str] = {}
+    definitions = {info["name"]: index_definition(info) for info in infos if info["name"] != ID_INDEX}
+    for name, (key, text_fields, unique, partial, expire) in definitions.items():
+        if unique or partial is not None or expire is not None or text_fields:
+            continue
+        for other, (other_key, other_text, _, other_partial, _) in definitions.items():
+            if other == name or other_partial is not None or other_text or len(other_key) < len(key):
+                continue
+            if other_key[:len(key)] != key:
+                continue
+            if other_key == key and (other in redundant or (name in declared and other not in declared)):
+                # Exact duplicates: flag one of the pair, preferring the undeclared one
+                continue
+            redundant[name] = other
+            break
+    return redundant
+
+
+def _counted_since(since: Any) -> Optional[datetime]:
+    """accesses.since as an aware datetime (PyMongo returns naive UTC by default)"""
+    if not isinstance(since, datetime):
+        return None
+    return since if since.tzinfo is not None else since.replace(tzinfo=timezone.utc)
+
+
+def diff_indexes(
+    specs: List[IndexSpec],
+    existing: List[Dict[str, Any]],
+    usage: Optional[Dict[str, Dict[str, Any]]] = None,
+    min_unused_age: timedelta = DEFAULT_MIN_UNUSED_AGE,
+    now: Optional[datetime] = None
+) -> IndexDiff:
+    """
+    Compare declared specs with list_indexes() output.
+    `usage` maps index name -> $indexStats `accesses` ({"ops", "since"}); None skips the unused check.
+    An index is unused only when it has no ops and its counters started at least `min_unused_age` ago.
+    """
+    diff = IndexDiff()
+    existing = [info for info in existing if info["name"] != ID_INDEX]
+    by_name = {info["name"]: info for info in existing}
+    by_definition = {index_definition(info): info["name"] for info in existing}
+    matched = set()
+
+    for spec in specs:
+        definition = index_definition(spec.as_index_info())
+        if definition in by_definition:
+            # Same definition under any name satisfies the spec
+            matched.add(by_definition[definition])
+            diff.present.append(by_definition[definition])
+        elif spec.name in by_name:
+            matched.add(spec.name)
+            diff.conflicting.append((spec, by_name[spec.name]))
+        else:
+            diff.missing.append(spec)
+
+    diff.undeclared = [info["name"] for info in existing if info["name"] not in matched]
+
+    # Judge redundancy on the state after creating the missing indexes
+    final = existing + [spec.as_index_info() for spec in diff.missing]
+    diff.redundant = _redundant_indexes(final, declared=matched | {spec.name for spec in diff.missing})
+
+    if usage is not None:
+        cutoff = (now or datetime.now(timezone.utc)) - min_unused_age
+        for name, accesses in usage.items():
+            if name not in by_name or accesses.get("ops"):
+                continue
+            since = _counted_since(accesses.get("since"))
+            if since is not None and since <= cutoff:
+                diff.unused[name] = accesses.get("since")
+            else:
+                diff.unconfirmed[name] = accesses.get("since")
+    return diff
+
+
+def declared_indexes() -> Dict[str, List[IndexSpec]]:
+    """collection name -> declared specs, for every collection the application queries by index"""
+    # Imported here: both modules import IndexSpec from this one
+    from app.config.settings import app_config
+    from app.core.idempotency import MongoIdempotencyStore
+    from app.models.users import UserModel
+
+    return {
+        UserModel.COLLECTION_NAME: UserModel.INDEXES,
+        app_config.idempotency_collection: MongoIdempotencyStore.INDEXES
+    }
@@ -1,26 +1,141 @@
+import re
+import unicodedata
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT
 from pymongo.collection import Collection
 from app.core.database import get_database
+from app.config.settings import app_config
+from app.models.indexes import IndexSpec
 
 
 class UserModel:
     """User database model for MongoDB operations"""
 
     COLLECTION_NAME = "users"
+    SEARCH_INDEX = "seller_search_keys_idx"
+    CHANGES_INDEX = "seller_updated_id_idx"
+    EMAIL_LOOKUP_INDEX = "seller_email_normalized_idx"
+    PHONE_LOOKUP_INDEX = "seller_phone_e164_idx"
+    GENERATION_INDEX = "seller_write_ts_idx"
+    # Server-side BSON timestamp set by every write, in the write itself (see app/core/generations.py)
+    WRITE_STAMP_FIELD = "write_ts"
+    WRITE_STAMP = {"$currentDate": {WRITE_STAMP_FIELD: {"$type": "timestamp"}}}
+    SEARCH_FIELDS = ("email", "first_name", "last_name")
+    # Fields read by UserResponse: projection for write paths that return the user
+    RESPONSE_PROJECTION = {
+        "seller_id": 1, "email": 1, "first_name": 1, "last_name": 1,
+        "phone_number": 1, "is_active": 1, "created_at": 1, "updated_at": 1
+    }
+
+    # Indexes the queries below rely on; applied by deployment/sync_indexes.py.
+    # seller_id alone is served by any index starting with seller_id.
+    INDEXES = [
+        IndexSpec(
+            "seller_email_unique", (("seller_id", ASCENDING), ("email", ASCENDING)), unique=True,
+            purpose="One user per email and seller; upsert by email"
+        ),
+        IndexSpec("email_idx", (("email", ASCENDING),), purpose="Email lookups across sellers"),
+        IndexSpec(
+            "seller_active_created_idx", (("seller_id", ASCENDING), ("is_active", ASCENDING), ("created_at", DESCENDING)),
+            purpose="Listing and filtering by status"
+        ),
+        IndexSpec(
+            "search_text_idx", (("email", TEXT), ("first_name", TEXT), ("last_name", TEXT)),
+            purpose="Full-text search (USER_SEARCH_MODE=text)"
+        ),
+        IndexSpec(
+            SEARCH_INDEX, (("seller_id", ASCENDING), ("search_keys", ASCENDING)),
+            purpose="Typeahead search (multikey)"
+        ),
+        IndexSpec(
+            CHANGES_INDEX, (("seller_id", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)),
+            purpose="Delta sync in (updated_at, _id) order"
+        ),
+        IndexSpec(
+            EMAIL_LOOKUP_INDEX, (("seller_id", ASCENDING), ("email_normalized", ASCENDING)),
+            purpose="Case-insensitive contact lookup"
+        ),
+        IndexSpec(
+            PHONE_LOOKUP_INDEX, (("seller_id", ASCENDING), ("phone_e164", ASCENDING)),
+            partial_filter={"phone_e164": {"$exists": True}},
+            purpose="Phone contact lookup (users with a phone only)"
+        ),
+        IndexSpec(
+            GENERATION_INDEX, (("seller_id", ASCENDING), (WRITE_STAMP_FIELD, DESCENDING)),
+            purpose="Seller generation (newest write stamp) and catch-up of in-process indexes"
+        )
+    ]
 
     @classmethod
     def get_collection(cls) -> Collection:
-        """Get users collection - indexes are pre-created via deployment script"""
+        """Get users collection - indexes are pre-created via deployment/sync_indexes.py"""
         db = get_database()
         return db[cls.COLLECTION_NAME]
 
     @staticmethod
-    def create_document(seller_id: int, user_data: Dict[str, Any]) -> Dict[str, Any]:
+    def normalize_search_term(value: Optional[str]) -> str:
+        """Casefold, strip accents and collapse whitespace ("  José  Pérez" -> "jose perez")"""
+        if not value:
+            return ""
+        decomposed = unicodedata.normalize("NFKD", value)
+        stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+        return " ".join(stripped.casefold().split())
+
+    @staticmethod
+    def normalize_email(email: str) -> str:
+        """Case-insensitive form of an email, used for lookups"""
+        return email.strip().lower()
+
+    @staticmethod
+    def normalize_phone(phone: Optional[str], default_country_code: Optional[str] = None) -> Optional[str]:
+        """
+        E.164 form ("+" and 8-15 digits) of a phone number, or None when it cannot be one.
+        "+" or "00" mark an international number; national numbers (up to 10 digits) get
+        the default country code (PHONE_DEFAULT_COUNTRY_CODE).
+        """
+        if not phone:
+            return None
+        value = phone.strip()
+        digits = "".join(char for char in value if char.isdigit())
+        if value.startswith("+"):
+            pass
+        elif digits.startswith("00"):
+            digits = digits[2:]
+        elif len(digits) <= 10:
+            digits = (default_country_code or app_config.phone_default_country_code) + digits
+        if not 8 <= len(digits) <= 15 or digits.startswith("0"):
+            return None
+        return "+" + digits
+
+    @classmethod
+    def contact_keys(cls, email: Optional[str] = None, phone_number: Optional[str] = None) -> Dict[str, Any]:
+        """Normalized lookup fields for the given email and/or phone (phone_e164 is None when unparseable)"""
+        keys: Dict[str, Any] = {}
+        if email is not None:
+            keys["email_normalized"] = cls.normalize_email(email)
+        if phone_number is not None:
+            keys["phone_e164"] = cls.normalize_phone(phone_number)
+        return keys
+
+    @classmethod
+    def build_search_keys(cls, email: str, first_name: str, last_name: str) -> List[str]:
+        """Normalized keys matched by prefix in typeahead search (email, names, full name)"""
+        keys = {
+            cls.normalize_search_term(email),
+            cls.normalize_search_term(first_name),
+            cls.normalize_search_term(last_name),
+            cls.normalize_search_term(f"{first_name} {last_name}")
+        }
+        keys.discard("")
+        return sorted(keys)
+
+    @classmethod
+    def create_document(cls, seller_id: int, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user document"""
         now = datetime.now(timezone.utc)
-        return {
+        doc = {
             "_id": ObjectId(),
             "seller_id": seller_id,
             "email": user_data["email"],
@@ -28,13 +143,33 @@ class UserModel:
             "last_name": user_data["last_name"],
             "phone_number": user_data.get("phone_number"),
             "is_active": user_data.get("is_active", True),
+            "search_keys": cls.build_search_keys(user_data["email"], user_data["first_name"], user_data["last_name"]),
             "created_at": now,
             "updated_at": now
         }
+        # phone_e164 is left out when there is none (partial index)
+        contact = cls.contact_keys(user_data["email"], user_data.get("phone_number"))
+        doc.update({field: value for field, value in contact.items() if value is not None})
+        return doc
 
-    @staticmethod
-    def update_document(user_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create update document with only provided fields"""
+    @classmethod
+    def insert_update(cls, user_doc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Update document that inserts `user_doc` (from create_document) and stamps it.
+        Used with update_one({"_id": ...}, upsert=True): an insert cannot set write_ts.
+        """
+        return {"$setOnInsert": {field: value for field, value in user_doc.items() if field != "_id"}, **cls.WRITE_STAMP}
+
+    @classmethod
+    def update_document(cls, user_data: Dict[str, Any], current: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Create update document with only provided fields
+
+        Args:
+            user_data: Fields to update (None values are ignored)
+            current: Current email/first_name/last_name, required to recompute
+                search_keys when any of them changes
+        """
         update_doc = {"updated_at": datetime.now(timezone.utc)}
 
         # Only include fields that are provided
@@ -43,18 +178,81 @@ class UserModel:
             if field in user_data and user_data[field] is not None:
                 update_doc[field] = user_data[field]
 
-        return {"$set": update_doc}
+        if current is not None and any(field in update_doc for field in cls.SEARCH_FIELDS):
+            merged = {field: update_doc.get(field, current.get(field)) for field in cls.SEARCH_FIELDS}
+            update_doc["search_keys"] = cls.build_search_keys(**merged)
 
-    @staticmethod
-    def build_search_filter(seller_id: int, search: Optional[str] = None, is_active: Optional[bool] = None) -> Dict[str, Any]:
-        """Build MongoDB filter for search queries"""
+        update = {"$set": update_doc, **cls.WRITE_STAMP}
+        contact = cls.contact_keys(update_doc.get("email"), update_doc.get("phone_number"))
+        if contact.get("phone_e164", "") is None:
+            # An unparseable new phone must not keep matching the old one
+            del contact["phone_e164"]
+            update["$unset"] = {"phone_e164": ""}
+        update_doc.update(contact)
+
+        return update
+
+    @classmethod
+    def upsert_document(cls, user_data: Dict[str, Any], email: str, now: datetime) -> Dict[str, Any]:
+        """
+        Update document for an upsert by (seller_id, email)
+
+        seller_id and email come from the equality filter on insert. created_at and
+        updated_at share `now` on insert, which is how callers tell inserts from updates.
+        """
+        set_doc = {
+            "first_name": user_data["first_name"],
+            "last_name": user_data["last_name"],
+            "search_keys": cls.build_search_keys(email, user_data["first_name"], user_data["last_name"]),
+            "updated_at": now
+        }
+        set_on_insert = {"created_at": now, "email_normalized": cls.normalize_email(email)}
+        update = {"$set": set_doc, "$setOnInsert": set_on_insert, **cls.WRITE_STAMP}
+
+        if user_data.get("phone_number") is not None:
+            set_doc["phone_number"] = user_data["phone_number"]
+            phone_e164 = cls.normalize_phone(user_data["phone_number"])
+            if phone_e164 is not None:
+                set_doc["phone_e164"] = phone_e164
+            else:
+                update["$unset"] = {"phone_e164": ""}
+        else:
+            set_on_insert["phone_number"] = None
+
+        if user_data.get("is_active") is not None:
+            set_doc["is_active"] = user_data["is_active"]
+        else:
+            set_on_insert["is_active"] = True
+
+        return update
+
+    @classmethod
+    def build_search_filter(
+        cls,
+        seller_id: int,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        mode: str = "prefix"
+    ) -> Dict[str, Any]:
+        """
+        Build MongoDB filter for search queries
+
+        mode="prefix": anchored, case-sensitive regex on the normalized search_keys,
+        which MongoDB turns into tight bounds on (seller_id, search_keys).
+        mode="text": legacy $text search (whole stemmed words).
+        """
         filter_doc = {"seller_id": seller_id}
 
         if is_active is not None:
             filter_doc["is_active"] = is_active
 
         if search:
-            # Use text search for better performance
-            filter_doc["$text"] = {"$search": search}
+            if mode == "text":
+                filter_doc["$text"] = {"$search": search}
+            else:
+                term = cls.normalize_search_term(search)
+                if term:
+                    # A blank term would be "^" and match every key: no search instead
+                    filter_doc["search_keys"] = {"$regex": f"^{re.escape(term)}"}
 
         return filter_doc
\ No newline at end of file
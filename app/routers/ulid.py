@@ -2,9 +2,10 @@ from fastapi import APIRouter
 from ulid import ULID
 from app.schemas.response import StandardResponse
 from app.utils.response import create_success_response
+from app.utils.timing import TimedRoute
 from pydantic import BaseModel
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 class UlidData(BaseModel):
@@ -4,8 +4,9 @@ from ulid import ULID
 from app.schemas.response import StandardResponse
 from app.utils.response import create_success_response
 from app.utils.logger import logger
+from app.utils.timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 class Usuario(BaseModel):
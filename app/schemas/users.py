@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 from pydantic import BaseModel, Field, EmailStr, validator
 from bson import ObjectId
 from app.schemas.common import PaginationInfo
@@ -108,6 +108,34 @@ class UserResponse(BaseModel):
         }
 
 
+class UserUpsertRequest(BaseModel):
+    """Schema for creating or updating a user by email (the email comes from the path)"""
+    first_name: str = Field(..., min_length=2, max_length=50, description="User first name")
+    last_name: str = Field(..., min_length=2, max_length=50, description="User last name")
+    phone_number: Optional[str] = Field(None, min_length=10, max_length=15, description="User phone number (kept when omitted)")
+    is_active: Optional[bool] = Field(None, description="Whether the user is active (kept when omitted, true on creation)")
+
+    @validator('phone_number')
+    def validate_phone_number(cls, v):
+        if v and not v.replace('+', '').replace('-', '').replace(' ', '').isdigit():
+            raise ValueError('Phone number must contain only digits, spaces, hyphens, and plus sign')
+        return v
+
+    model_config = {
+        "str_strip_whitespace": True,
+        # Performance optimizations
+        "validate_assignment": False,
+        "validate_default": False,
+        "use_list": True,
+        "arbitrary_types_allowed": True
+    }
+
+
+class UserLookupRequest(BaseModel):
+    """Schema for fetching many users by ID"""
+    ids: List[str] = Field(..., min_length=1, description="User IDs, results are returned in this order")
+
+
 class UserListResponse(BaseModel):
     """Schema for paginated user list response"""
     data: list[UserResponse] = Field(..., description="List of users")
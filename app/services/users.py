@@ -3,13 +3,27 @@ from fastapi import HTTPException, status
 from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
 from pymongo.collection import Collection
-from pymongo import DESCENDING
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
 from app.models.users import UserModel
-from app.schemas.users import UserCreateRequest, UserUpdateRequest, UserResponse, UserListResponse
+from app.schemas.users import UserCreateRequest, UserUpdateRequest, UserUpsertRequest, UserResponse, UserListResponse
 from app.schemas.common import PaginationInfo
 from app.dependencies.common import PaginationParams, SearchParams
 from app.utils.logger import logger
+from app.config.settings import app_config
 from app.core.database import run_in_executor
+from app.core.generations import seller_generations
+from app.core.search_index import search_indexes
+from app.core.email_filter import email_filters
+from app.core.page_cache import list_page_cache
+
+
+def _record_write(seller_id: int) -> None:
+    """
+    Forget this instance's cached generation after a write. No round trip: the write
+    itself stamped write_ts, which is the new generation (app/core/generations.py).
+    """
+    seller_generations.invalidate(seller_id)
 
 
 class UserService:
@@ -22,13 +36,14 @@ class UserService:
             def _create_user():
                 collection = UserModel.get_collection()
                 user_doc = UserModel.create_document(seller_id, user_data.model_dump())
-                result = collection.insert_one(user_doc)
-                user_doc["_id"] = result.inserted_id
+                # An upsert on a fresh _id inserts like insert_one, and can stamp write_ts
+                collection.update_one({"_id": user_doc["_id"]}, UserModel.insert_update(user_doc), upsert=True)
+                _record_write(seller_id)
                 return user_doc
 
             user_doc = await run_in_executor(_create_user)
 
-            logger.info("User created successfully", extra={"extra_data": {
+            logger.info("User created successfully", extra={"extra_data": lambda: {
                 "user_id": str(user_doc["_id"]),
                 "seller_id": seller_id,
                 "email": user_data.email
@@ -36,6 +51,8 @@ class UserService:
 
             return UserResponse.from_dict(user_doc)
 
+        except HTTPException:
+            raise
         except DuplicateKeyError:
             logger.warning("Duplicate user creation attempt", extra={"extra_data": {
                 "seller_id": seller_id,
@@ -63,13 +80,14 @@ class UserService:
             def _create_user():
                 collection = UserModel.get_collection()
                 user_doc = UserModel.create_document(seller_id, user_data.model_dump())
-                result = collection.insert_one(user_doc)
-                user_doc["_id"] = result.inserted_id
+                # An upsert on a fresh _id inserts like insert_one, and can stamp write_ts
+                collection.update_one({"_id": user_doc["_id"]}, UserModel.insert_update(user_doc), upsert=True)
+                _record_write(seller_id)
                 return user_doc
 
             user_doc = await run_in_executor(_create_user)
 
-            logger.info("User created successfully", extra={"extra_data": {
+            logger.info("User created successfully", extra={"extra_data": lambda: {
                 "user_id": str(user_doc["_id"]),
                 "seller_id": seller_id,
                 "email": user_data.email
@@ -77,6 +95,8 @@ class UserService:
 
             return user_doc
 
+        except HTTPException:
+            raise
         except DuplicateKeyError:
             logger.warning("Duplicate user creation attempt", extra={"extra_data": {
                 "seller_id": seller_id,
@@ -97,6 +117,63 @@ class UserService:
                 detail="Failed to create user"
             )
 
+    @staticmethod
+    async def upsert_user_by_email_fast(
+        seller_id: int,
+        email: str,
+        user_data: UserUpsertRequest
+    ) -> Tuple[dict, bool]:
+        """Create or update the user with this email in one round trip; returns (raw document, created)"""
+        try:
+            def _upsert_user():
+                collection = UserModel.get_collection()
+                now = datetime.now(timezone.utc)
+                update = UserModel.upsert_document(user_data.model_dump(), email, now)
+
+                # Two concurrent upserts of a new email can both miss the match; the
+                # loser gets DuplicateKeyError on seller_email_unique and now matches
+                for attempt in range(2):
+                    try:
+                        user_doc = collection.find_one_and_update(
+                            {"seller_id": seller_id, "email": email},
+                            update,
+                            projection=UserModel.RESPONSE_PROJECTION,
+                            upsert=True,
+                            return_document=ReturnDocument.AFTER
+                        )
+                        break
+                    except DuplicateKeyError:
+                        if attempt:
+                            raise
+
+                # created_at and updated_at only share `now` on insert
+                created = user_doc["created_at"] == user_doc["updated_at"]
+                _record_write(seller_id)
+                return user_doc, created
+
+            user_doc, created = await run_in_executor(_upsert_user)
+
+            logger.info("User upserted successfully", extra={"extra_data": lambda: {
+                "user_id": str(user_doc["_id"]),
+                "seller_id": seller_id,
+                "created": created
+            }})
+
+            return user_doc, created
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error("Failed to upsert user", extra={"extra_data": {
+                "seller_id": seller_id,
+                "email": email,
+                "error": str(e)
+            }})
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to upsert user"
+            )
+
     @staticmethod
     async def get_user_by_id(seller_id: int, user_id: str) -> UserResponse:
         """Get user by ID"""
@@ -165,12 +242,40 @@ class UserService:
                 detail="Failed to retrieve user"
             )
 
+    @staticmethod
+    async def get_users_by_ids_fast(seller_id: int, user_ids: List[str]) -> Dict[str, dict]:
+        """Get many users with one $in query scoped to the seller; returns raw documents by id"""
+        try:
+            def _get_users():
+                collection = UserModel.get_collection()
+                object_ids = list({ObjectId(user_id) for user_id in user_ids})
+                return list(collection.find({"seller_id": seller_id, "_id": {"$in": object_ids}}))
+
+            user_docs = await run_in_executor(_get_users)
+            return {str(user_doc["_id"]): user_doc for user_doc in user_docs}
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error("Failed to get users by id", extra={"extra_data": {
+                "seller_id": seller_id,
+                "requested": len(user_ids),
+                "error": str(e)
+            }})
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to retrieve users"
+            )
+
     @staticmethod
     async def update_user(seller_id: int, user_id: str, user_data: UserUpdateRequest) -> UserResponse:
         """Update user by ID"""
-        try:
-            collection = await UserModel.get_collection()
+        return UserResponse.from_dict(await UserService.update_user_fast(seller_id, user_id, user_data))
 
+    @staticmethod
+    async def update_user_fast(seller_id: int, user_id: str, user_data: UserUpdateRequest) -> dict:
+        """Update user by ID returning the raw updated document, projected to the response fields (fast path)"""
+        try:
             # Only update fields that are provided
             update_data = {k: v for k, v in user_data.model_dump().items() if v is not None}
 
@@ -180,13 +285,48 @@ class UserService:
                     detail="No fields provided for update"
                 )
 
-            update_doc = UserModel.update_document(update_data)
-
-            result = await collection.find_one_and_update(
-                {"_id": ObjectId(user_id), "seller_id": seller_id},
-                update_doc,
-                return_document=True
-            )
+            def _update_user():
+                collection = UserModel.get_collection()
+                filter_doc = {"_id": ObjectId(user_id), "seller_id": seller_id}
+                result = None
+
+                if any(field in update_data for field in UserModel.SEARCH_FIELDS):
+                    # search_keys depend on all name/email fields: read them and make the
+                    # update conditional on them so a concurrent rename cannot leave stale keys
+                    projection = {field: 1 for field in UserModel.SEARCH_FIELDS}
+                    for _ in range(3):
+                        current = collection.find_one(filter_doc, projection)
+                        if current is None:
+                            break
+                        result = collection.find_one_and_update(
+                            {**filter_doc, **{field: current.get(field) for field in UserModel.SEARCH_FIELDS}},
+                            UserModel.update_document(update_data, current=current),
+                            projection=UserModel.RESPONSE_PROJECTION,
+                            return_document=ReturnDocument.AFTER
+                        )
+                        if result is not None:
+                            break
+                    else:
+                        # The user exists but kept changing under us: not a 404
+                        raise HTTPException(
+                            status_code=status.HTTP_409_CONFLICT,
+                            detail="User was modified concurrently, retry the update",
+                            headers={"Retry-After": "1"}
+                        )
+                else:
+                    # No read: the update itself returns the post-image
+                    result = collection.find_one_and_update(
+                        filter_doc,
+                        UserModel.update_document(update_data),
+                        projection=UserModel.RESPONSE_PROJECTION,
+                        return_document=ReturnDocument.AFTER
+                    )
+
+                if result is not None:
+                    _record_write(seller_id)
+                return result
+
+            result = await run_in_executor(_update_user)
 
             if not result:
                 raise HTTPException(
@@ -194,13 +334,13 @@ class UserService:
                     detail="User not found"
                 )
 
-            logger.info("User updated successfully", extra={"extra_data": {
+            logger.info("User updated successfully", extra={"extra_data": lambda: {
                 "user_id": user_id,
                 "seller_id": seller_id,
                 "updated_fields": list(update_data.keys())
             }})
 
-            return UserResponse.from_dict(result)
+            return result
 
         except HTTPException:
             raise
@@ -228,21 +368,22 @@ class UserService:
     async def delete_user(seller_id: int, user_id: str) -> bool:
         """Delete user by ID (soft delete by setting is_active=False)"""
         try:
-            collection = await UserModel.get_collection()
-
-            result = await collection.find_one_and_update(
-                {"_id": ObjectId(user_id), "seller_id": seller_id},
-                UserModel.update_document({"is_active": False}),
-                return_document=True
-            )
-
-            if not result:
+            def _delete_user():
+                collection = UserModel.get_collection()
+                update = UserModel.update_document({"is_active": False})
+                # Nothing is read back: the caller only needs to know the user existed
+                result = collection.update_one({"_id": ObjectId(user_id), "seller_id": seller_id}, update)
+                if result.matched_count:
+                    _record_write(seller_id)
+                return result.matched_count
+
+            if not await run_in_executor(_delete_user):
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="User not found"
                 )
 
-            logger.info("User soft deleted successfully", extra={"extra_data": {
+            logger.info("User soft deleted successfully", extra={"extra_data": lambda: {
                 "user_id": user_id,
                 "seller_id": seller_id
             }})
@@ -277,9 +418,20 @@ class UserService:
                 filter_doc = UserModel.build_search_filter(
                     seller_id=seller_id,
                     search=search.search,
-                    is_active=search.is_active
+                    is_active=search.is_active,
+                    mode=app_config.user_search_mode
                 )
 
+                if search.search and app_config.user_search_mode == "prefix":
+                    # Typeahead: range scan on (seller_id, search_keys), results in index
+                    # (alphabetical key) order with no in-memory sort
+                    total_count = collection.count_documents(filter_doc, hint=UserModel.SEARCH_INDEX)
+                    users = list(collection.find(filter_doc)
+                               .hint(UserModel.SEARCH_INDEX)
+                               .skip(pagination.skip)
+                               .limit(pagination.page_size))
+                    return users, total_count
+
                 # Get total count
                 total_count = collection.count_documents(filter_doc)
 
@@ -291,7 +443,39 @@ class UserService:
 
                 return users, total_count
 
-            users, total_count = await run_in_executor(_list_users)
+            page = None
+            cache_key = None
+            if app_config.list_cache_enabled:
+                # The generation changes on every write, so a hit is never stale beyond its cache TTL
+                generation = await seller_generations.get(seller_id)
+                if generation is not None:
+                    cache_key = (
+                        seller_id,
+                        generation,
+                        app_config.user_search_mode,
+                        UserModel.normalize_search_term(search.search),
+                        search.is_active,
+                        pagination.page,
+                        pagination.page_size
+                    )
+                    page = list_page_cache.get(cache_key)
+
+            if page is None and search.search and app_config.user_search_mode == "prefix" and search_indexes.is_hot(seller_id):
+                # Hot sellers: answer typeahead from the in-process index when it is built and current
+                page = await search_indexes.search(
+                    seller_id,
+                    UserModel.normalize_search_term(search.search),
+                    search.is_active,
+                    pagination.skip,
+                    pagination.page_size
+                )
+
+            if page is None:
+                page = await run_in_executor(_list_users)
+                if cache_key is not None:
+                    list_page_cache.put(cache_key, page)
+
+            users, total_count = page
 
             # Convert to response objects
             user_responses = [UserResponse.from_dict(user) for user in users]
@@ -315,6 +499,8 @@ class UserService:
                 pagination=pagination_info
             )
 
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error("Failed to list users", extra={"extra_data": {
                 "seller_id": seller_id,
@@ -326,16 +512,107 @@ class UserService:
                 detail="Failed to retrieve users"
             )
 
+    @staticmethod
+    async def list_user_changes(
+        seller_id: int,
+        since: Optional[Tuple[datetime, ObjectId]],
+        limit: int
+    ) -> Tuple[List[dict], bool]:
+        """
+        Users created, updated or soft-deleted after the (updated_at, _id) watermark,
+        in (updated_at, _id) order. Returns (raw documents, has_more).
+
+        Changes younger than `changes_settle_seconds` are held back: updated_at comes from
+        the writer's clock, so a write still in flight could otherwise commit behind a
+        watermark that was already handed out.
+        """
+        try:
+            def _list_changes():
+                collection = UserModel.get_collection()
+                upper = datetime.now(timezone.utc) - timedelta(seconds=app_config.changes_settle_seconds)
+                filter_doc: Dict[str, Any] = {"seller_id": seller_id, "updated_at": {"$lte": upper}}
+                if since is not None:
+                    since_updated_at, since_id = since
+                    filter_doc["$or"] = [
+                        {"updated_at": {"$gt": since_updated_at}},
+                        {"updated_at": since_updated_at, "_id": {"$gt": since_id}}
+                    ]
+
+                return list(collection.find(filter_doc)
+                           .sort([("updated_at", ASCENDING), ("_id", ASCENDING)])
+                           .hint(UserModel.CHANGES_INDEX)
+                           .limit(limit + 1))
+
+            users = await run_in_executor(_list_changes)
+            return users[:limit], len(users) > limit
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error("Failed to list user changes", extra={"extra_data": {
+                "seller_id": seller_id,
+                "error": str(e)
+            }})
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to retrieve user changes"
+            )
+
+    @staticmethod
+    async def lookup_users_by_contact_fast(
+        seller_id: int,
+        email: Optional[str] = None,
+        phone: Optional[str] = None
+    ) -> List[dict]:
+        """Users whose normalized email or E.164 phone equals the given one (exact index match)"""
+        try:
+            if email is not None:
+                if await email_filters.might_contain(seller_id, email) is False:
+                    return []
+                filter_doc = {"seller_id": seller_id, "email_normalized": UserModel.normalize_email(email)}
+            else:
+                phone_e164 = UserModel.normalize_phone(phone)
+                if phone_e164 is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Invalid phone number"
+                    )
+                filter_doc = {"seller_id": seller_id, "phone_e164": phone_e164}
+
+            def _lookup_users():
+                collection = UserModel.get_collection()
+                return list(
+                    collection.find(filter_doc, UserModel.RESPONSE_PROJECTION)
+                    .sort("_id", ASCENDING)
+                    .limit(app_config.contact_lookup_limit)
+                )
+
+            return await run_in_executor(_lookup_users)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error("Failed to look up users by contact", extra={"extra_data": {
+                "seller_id": seller_id,
+                "error": str(e)
+            }})
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to look up users"
+            )
+
     @staticmethod
     async def get_user_by_email(seller_id: int, email: str) -> Optional[UserResponse]:
         """Get user by email (for internal use)"""
         try:
-            collection = await UserModel.get_collection()
+            def _get_user():
+                collection = UserModel.get_collection()
+                return collection.find_one(
+                    {"seller_id": seller_id, "email": email},
+                    UserModel.RESPONSE_PROJECTION
+                )
 
-            user_doc = await collection.find_one({
-                "seller_id": seller_id,
-                "email": email
-            })
+            user_doc = await run_in_executor(_get_user)
 
             return UserResponse.from_dict(user_doc) if user_doc else None
 
@@ -345,4 +622,4 @@ class UserService:
                 "email": email,
                 "error": str(e)
             }})
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,46 @@
+"""
+ETag helpers for conditional GET (If-None-Match -> 304 Not Modified)
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from starlette.responses import Response
+
+# Clients must revalidate, intermediaries must not share per-tenant responses
+CACHE_CONTROL = "private, no-cache"
+
+
+def user_etag(user_doc: Dict[str, Any]) -> str:
+    """Strong ETag from the document id and its updated_at (microseconds)"""
+    updated_at: datetime = user_doc["updated_at"]
+    if updated_at.tzinfo is None:
+        # PyMongo returns naive UTC datetimes by default
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return f'"{user_doc["_id"]}-{int(updated_at.timestamp() * 1_000_000):x}"'
+
+
+def list_etag(seller_id: int, generation: int, *query_parts: Any) -> str:
+    """Strong ETag from the seller's change generation and the normalized query"""
+    query = "|".join("" if part is None else str(part) for part in query_parts)
+    digest = hashlib.blake2b(query.encode("utf-8"), digest_size=8).hexdigest()
+    return f'"{seller_id}-{generation}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match evaluation (weak comparison, '*' and comma-separated lists)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified_response(etag: str) -> Response:
+    """Empty 304 carrying the validator"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
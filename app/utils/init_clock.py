@@ -0,0 +1,8 @@
+"""
+Marca del inicio de la fase INIT de Lambda
+Se importa antes que cualquier otro módulo de la app para que el cold start
+medido incluya la carga de FastAPI, la configuración y las rutas.
+"""
+import time
+
+INIT_START = time.perf_counter()
@@ -1,7 +1,23 @@
 import json
 import logging
+import queue
+import random
+import time
 from datetime import datetime, timezone
-from typing import Dict, Any
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, Optional, Callable, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional fast encoder
+    orjson = None
+
+
+def json_dumps(obj: Dict[str, Any]) -> str:
+    """Serialize a log object with orjson when available, falling back to json"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, default=str)
 
 
 class FormatLog(logging.Formatter):
@@ -18,7 +34,8 @@ class FormatLog(logging.Formatter):
         icon = self.ICONS.get(record.levelno, "ℹ️")  # default icon
         log_obj = {
             'level': f"{icon} {record.levelname}",
-            'timestamp': datetime.now(timezone.utc).isoformat(),
+            # Use the record creation time: formatting may happen later on the queue thread
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
             'message': f"{icon} {record.getMessage()}",
             'function': record.funcName,
             'line': record.lineno,
@@ -26,40 +43,176 @@ class FormatLog(logging.Formatter):
             'pathname': record.pathname
         }
 
-        # Add extra data if present
+        # Add extra data if present (callables are evaluated only for emitted records)
         if hasattr(record, 'extra_data'):
-            log_obj.update(record.extra_data)
+            extra_data = record.extra_data
+            log_obj.update(extra_data() if callable(extra_data) else extra_data)
+
+        # Records dropped by sampling/rate limiting since the last emitted one
+        if getattr(record, 'suppressed', 0):
+            log_obj['suppressed'] = record.suppressed
 
         # Add exception info if present
         if record.exc_info:
             log_obj['exception'] = self.formatException(record.exc_info)
 
-        return json.dumps(log_obj, ensure_ascii=False)
+        return json_dumps(log_obj)
+
+
+class _KeyState:
+    """Token bucket and suppressed counter for one message key"""
+    __slots__ = ("tokens", "updated", "suppressed")
+
+    def __init__(self, burst: float):
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.suppressed = 0
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Per-message-key sampling and token-bucket rate limiting.
+
+    The key is the unformatted message (e.g. "Health check requested"). Records at
+    ERROR and above always pass. The number of suppressed records is attached to
+    the next emitted record for the same key as `suppressed`.
+    """
+
+    def __init__(self, sample_rates: Optional[Dict[str, float]] = None, rate_limits: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.sample_rates = sample_rates or {}
+        self.rate_limits = rate_limits or {}
+        self._state: Dict[str, _KeyState] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+
+        key = record.msg
+        sample_rate = self.sample_rates.get(key)
+        rate_limit = self.rate_limits.get(key)
+        if sample_rate is None and rate_limit is None:
+            return True
+
+        state = self._state.get(key)
+        if state is None:
+            state = self._state[key] = _KeyState(burst=max(1.0, rate_limit or 1.0))
+
+        allowed = sample_rate is None or random.random() < sample_rate
+        if allowed and rate_limit is not None:
+            # Refill the bucket; burst capacity equals one second of traffic
+            now = time.monotonic()
+            state.tokens = min(max(1.0, rate_limit), state.tokens + (now - state.updated) * rate_limit)
+            state.updated = now
+            if state.tokens >= 1.0:
+                state.tokens -= 1.0
+            else:
+                allowed = False
 
+        if not allowed:
+            state.suppressed += 1
+            return False
 
-def setup_logger(log_level: str = "INFO") -> logging.Logger:
+        if state.suppressed:
+            record.suppressed, state.suppressed = state.suppressed, 0
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Non-blocking handler: pushes raw records onto a bounded queue so formatting
+    and stream I/O happen on the listener thread instead of the event loop.
+
+    Overflow policies:
+        drop_newest: discard the incoming record (default, never blocks)
+        drop_oldest: discard the oldest queued record to make room
+        block: wait for room (only for callers that prefer completeness over latency)
+    """
+
+    OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+    def __init__(self, log_queue: queue.Queue, overflow: str = "drop_newest"):
+        super().__init__(log_queue)
+        if overflow not in self.OVERFLOW_POLICIES:
+            overflow = "drop_newest"
+        self.overflow = overflow
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Defer formatting to the listener thread (records never leave the process)
+        return record
+
+    def enqueue(self, record):
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow == "drop_oldest":
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                    self.queue.put_nowait(record)
+                except (queue.Empty, queue.Full):
+                    pass
+            self.dropped += 1
+
+
+_queue_handler: Optional[BoundedQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def setup_logger(
+    log_level: str = "INFO",
+    queue_enabled: bool = False,
+    queue_size: int = 10000,
+    overflow: str = "drop_newest",
+    sample_rates: Optional[Dict[str, float]] = None,
+    rate_limits: Optional[Dict[str, float]] = None
+) -> logging.Logger:
     """
     Setup and configure logger with CloudWatch formatter.
 
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        queue_enabled: Format and write records on a background thread
+        queue_size: Maximum queued records before the overflow policy applies
+        overflow: Overflow policy (drop_newest, drop_oldest, block)
+        sample_rates: Fraction of records kept per message key (0.0-1.0)
+        rate_limits: Maximum records per second per message key
 
     Returns:
         Configured logger instance
     """
+    global _queue_handler, _listener
+
     logger = logging.getLogger("fastapi_app")
 
     # Convert string level to logging constant
     numeric_level = getattr(logging, log_level.upper(), logging.INFO)
     logger.setLevel(numeric_level)
 
-    # Clear existing handlers to avoid duplicates
+    # Stop a previous background writer and clear handlers to avoid duplicates
+    shutdown_logging()
     logger.handlers = []
+    logger.filters = []
+
+    if sample_rates or rate_limits:
+        logger.addFilter(SamplingFilter(sample_rates, rate_limits))
 
     # Create handler with CloudWatch formatter
     handler = logging.StreamHandler()
     handler.setFormatter(FormatLog())
-    logger.addHandler(handler)
+
+    if queue_enabled:
+        _queue_handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size), overflow=overflow)
+        _listener = QueueListener(_queue_handler.queue, handler, respect_handler_level=False)
+        _listener.start()
+        logger.addHandler(_queue_handler)
+    else:
+        logger.addHandler(handler)
 
     # Prevent propagation to avoid duplicate logs
     logger.propagate = False
@@ -67,7 +220,46 @@ def setup_logger(log_level: str = "INFO") -> logging.Logger:
     return logger
 
 
-def log_with_extra(logger: logging.Logger, level: str, message: str, extra_data: Dict[str, Any] = None):
+def flush_logs(timeout: float = 0.5) -> None:
+    """
+    Wait until queued records are written (end of a Lambda invocation, before freeze).
+    No-op when the queue-based mode is disabled.
+    """
+    if _queue_handler is None:
+        return
+
+    log_queue = _queue_handler.queue
+    deadline = time.monotonic() + timeout
+    while log_queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    if _queue_handler.dropped:
+        dropped, _queue_handler.dropped = _queue_handler.dropped, 0
+        logging.getLogger("fastapi_app").warning("Log records dropped by queue overflow", extra={"extra_data": {
+            "dropped": dropped,
+            "policy": _queue_handler.overflow
+        }})
+
+
+def shutdown_logging() -> None:
+    """Drain the queue and stop the background writer thread"""
+    global _queue_handler, _listener
+
+    if _listener is not None:
+        flush_logs(timeout=2.0)
+        _listener.stop()  # Processes every queued record before returning
+        # Late records (after shutdown) fall back to synchronous writes
+        logging.getLogger("fastapi_app").handlers = list(_listener.handlers)
+    _listener = None
+    _queue_handler = None
+
+
+def log_with_extra(
+    logger: logging.Logger,
+    level: str,
+    message: str,
+    extra_data: Union[Dict[str, Any], Callable[[], Dict[str, Any]], None] = None
+):
     """
     Log message with extra structured data.
 
@@ -75,7 +267,8 @@ def log_with_extra(logger: logging.Logger, level: str, message: str, extra_data:
         logger: Logger instance
         level: Log level (debug, info, warning, error, critical)
         message: Log message
-        extra_data: Additional data to include in log
+        extra_data: Additional data to include in log, or a callable returning it
+            (evaluated only if the record passes level, sampling and rate limits)
     """
     if extra_data is None:
         extra_data = {}
@@ -86,4 +279,4 @@ def log_with_extra(logger: logging.Logger, level: str, message: str, extra_data:
 
 
 # Create a default logger instance
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
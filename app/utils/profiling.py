@@ -0,0 +1,186 @@
+"""
+On-demand sampling profiler
+Samples the stacks of every thread in the process at a fixed interval while a
+request is profiled, and renders the result as collapsed stacks (flamegraph.pl
+/ speedscope import) or speedscope JSON. Aggregates are kept per route for the
+debug endpoint.
+
+A profile covers the whole process, not just one request: concurrent requests
+on the event loop and executor threads (PyMongo calls) show up in it, each
+stack rooted at its thread name. A single shared sampler runs at most one
+profile at a time; requests arriving meanwhile are not profiled.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+from app.utils.logger import json_dumps
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class StackSampler:
+    """Shared background thread sampling all thread stacks via sys._current_frames(); one profile at a time"""
+
+    def __init__(self, interval: float = 0.001, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self._busy = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = 0.0
+        self.duration = 0.0
+
+    def try_start(self, interval: Optional[float] = None) -> bool:
+        """Start a profile unless one is already running (returns False then)"""
+        if not self._busy.acquire(blocking=False):
+            return False
+        if interval is not None:
+            self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return True
+
+    def stop(self) -> Counter:
+        """Stop the running profile and return the sample count per collapsed stack"""
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        stacks = self.stacks
+        self._busy.release()
+        return stacks
+
+    def _run(self) -> None:
+        """Sampling loop: walk each thread's frame chain root-first into a collapsed stack"""
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                names = []
+                while frame is not None and len(names) < self.max_depth:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                names.append(f"thread {thread_names.get(thread_id, thread_id)}")
+                names.reverse()
+                self.stacks[";".join(names)] += 1
+
+
+def to_collapsed(stacks: Counter) -> str:
+    """Collapsed stack format: one 'frame;frame;frame count' line per unique stack"""
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+
+def to_speedscope(name: str, stacks: Counter, interval_ms: float) -> str:
+    """Speedscope 'sampled' profile JSON"""
+    frame_index: Dict[str, int] = {}
+    frames: List[Dict[str, str]] = []
+    samples: List[List[int]] = []
+    weights: List[float] = []
+
+    for stack, count in stacks.items():
+        indexes = []
+        for frame_name in stack.split(";"):
+            index = frame_index.get(frame_name)
+            if index is None:
+                index = frame_index[frame_name] = len(frames)
+                frames.append({"name": frame_name})
+            indexes.append(index)
+        samples.append(indexes)
+        weights.append(count * interval_ms)
+
+    return json_dumps({
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights
+        }],
+        "name": name,
+        "exporter": "fastapi-app-profiler"
+    })
+
+
+class ProfileStore:
+    """Aggregated stacks per route key, bounded by routes (LRU) and distinct stacks per route"""
+
+    def __init__(self, max_routes: int = 50, max_stacks: int = 5000):
+        self.max_routes = max_routes
+        self.max_stacks = max_stacks
+        self._profiles: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key: str, stacks: Counter, duration: float) -> None:
+        """Merge one request profile into the route aggregate"""
+        with self._lock:
+            profile = self._profiles.pop(key, None)
+            if profile is None:
+                profile = {"stacks": Counter(), "requests": 0, "total_seconds": 0.0}
+            profile["requests"] += 1
+            profile["total_seconds"] += duration
+            for stack, count in stacks.items():
+                if stack in profile["stacks"] or len(profile["stacks"]) < self.max_stacks:
+                    profile["stacks"][stack] += count
+            self._profiles[key] = profile
+            while len(self._profiles) > self.max_routes:
+                self._profiles.popitem(last=False)
+
+    def summary(self) -> List[Dict]:
+        """Profiled routes with request/sample counts and average duration"""
+        with self._lock:
+            return [
+                {
+                    "route": key,
+                    "requests": profile["requests"],
+                    "samples": sum(profile["stacks"].values()),
+                    "avg_ms": round(profile["total_seconds"] / profile["requests"] * 1000, 3)
+                }
+                for key, profile in self._profiles.items()
+            ]
+
+    def get(self, key: str) -> Optional[Counter]:
+        """Aggregated stacks for a route key"""
+        with self._lock:
+            profile = self._profiles.get(key)
+            return Counter(profile["stacks"]) if profile else None
+
+    def clear(self) -> None:
+        """Drop all aggregates"""
+        with self._lock:
+            self._profiles.clear()
+
+
+def write_profile(directory: str, key: str, stacks: Counter, profile_format: str, interval_ms: float) -> str:
+    """Write one request profile to `directory`; returns the file path"""
+    os.makedirs(directory, exist_ok=True)
+    safe_key = re.sub(r"[^A-Za-z0-9_.-]+", "_", key).strip("_")
+    base = os.path.join(directory, f"{int(time.time() * 1000)}-{safe_key}")
+
+    if profile_format == "speedscope":
+        path = f"{base}.speedscope.json"
+        content = to_speedscope(key, stacks, interval_ms)
+    else:
+        path = f"{base}.collapsed"
+        content = to_collapsed(stacks)
+
+    with open(path, "w", encoding="utf-8") as profile_file:
+        profile_file.write(content)
+    return path
+
+
+profile_store = ProfileStore()
+process_sampler = StackSampler()
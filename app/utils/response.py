@@ -1,8 +1,11 @@
-from typing import TypeVar
+from functools import lru_cache
+from typing import TypeVar, Optional, Mapping, Tuple
 from datetime import datetime, timezone
+from starlette.responses import Response
 from app.schemas.response import StandardResponse, ResponseMetadata, ErrorResponse, ErrorDetail
 from app.schemas.common import PaginationInfo
 from app.config.settings import app_config
+from app.utils.logger import json_dumps
 
 T = TypeVar('T')
 
@@ -118,3 +121,61 @@ def create_fast_response(
     }
 
 
+_TIMESTAMP_PLACEHOLDER = "\x00timestamp\x00"
+
+
+@lru_cache(maxsize=256)
+def _error_envelope_parts(message: str, code: str, field: Optional[str], detail: str) -> Tuple[bytes, bytes]:
+    """
+    Pre-serializa el envelope de error alrededor del timestamp
+
+    Returns:
+        (prefijo, sufijo) en bytes; el body es prefijo + timestamp + sufijo
+    """
+    body = json_dumps({
+        "metadata": {
+            "success": False,
+            "message": message,
+            "timestamp": _TIMESTAMP_PLACEHOLDER
+        },
+        "errors": [{"code": code, "field": field, "message": detail}]
+    })
+    prefix, suffix = body.split(json_dumps(_TIMESTAMP_PLACEHOLDER)[1:-1], 1)
+    return prefix.encode("utf-8"), suffix.encode("utf-8")
+
+
+def create_fast_error_response(
+    status_code: int,
+    message: str,
+    code: Optional[str] = None,
+    field: Optional[str] = None,
+    detail: Optional[str] = None,
+    headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    """
+    Crea una respuesta de error sin modelos Pydantic a partir de un envelope precomputado
+
+    Args:
+        status_code: Código HTTP
+        message: Mensaje de error general
+        code: Código del error (por defecto http_<status_code>)
+        field: Campo que causó el error
+        detail: Mensaje del error específico (por defecto el mensaje general)
+        headers: Headers adicionales (p.ej. Retry-After)
+
+    Returns:
+        Response JSON con el mismo formato que ErrorResponse
+    """
+    prefix, suffix = _error_envelope_parts(
+        message,
+        code or f"http_{status_code}",
+        field,
+        message if detail is None else detail
+    )
+    timestamp = datetime.now(timezone.utc).isoformat().encode("ascii")
+    return Response(
+        content=prefix + timestamp + suffix,
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
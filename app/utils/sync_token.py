@@ -0,0 +1,37 @@
+"""
+Resumable sync tokens for the delta-sync endpoint
+A token is the (updated_at, _id) watermark of the last change a client has
+seen, encoded as url-safe base64 of "<updated_at epoch ms>:<ObjectId hex>".
+MongoDB stores datetimes with millisecond precision, so the round trip is exact.
+"""
+import base64
+import binascii
+from datetime import datetime, timezone
+from typing import Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+
+Watermark = Tuple[datetime, ObjectId]
+
+
+def _to_millis(value: datetime) -> int:
+    if value.tzinfo is None:
+        # PyMongo returns naive UTC datetimes by default
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def encode_sync_token(updated_at: datetime, user_id: ObjectId) -> str:
+    """Opaque token for the watermark (updated_at, _id)"""
+    raw = f"{_to_millis(updated_at)}:{user_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_sync_token(token: str) -> Watermark:
+    """Watermark from a token; raises ValueError when malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("ascii")
+        millis, user_id = raw.split(":", 1)
+        return datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc), ObjectId(user_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, InvalidId, OverflowError, OSError) as e:
+        raise ValueError("Invalid sync token") from e
@@ -0,0 +1,130 @@
+"""
+Per-request phase timing
+Phases are accumulated in a context-local RequestTimings object (set by
+ServerTimingMiddleware) and rendered as a Server-Timing header / log line
+"""
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+from fastapi.routing import APIRoute
+
+# Human readable descriptions for the Server-Timing "desc" attribute
+PHASE_DESCRIPTIONS = {
+    "auth": "Authorizer middleware",
+    "deps": "Request parsing and dependency resolution",
+    "handler": "Endpoint execution",
+    "db_queue": "Executor queue wait",
+    "db": "MongoDB call",
+    "serialize": "Response serialization",
+    "total": "Total",
+}
+
+
+class RequestTimings:
+    """Accumulated phase durations (ms) for the current request"""
+    __slots__ = ("phases", "endpoint_start", "endpoint_end")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.endpoint_start = 0.0
+        self.endpoint_end = 0.0
+
+    def add(self, name: str, duration_ms: float) -> None:
+        """Add a duration to a phase (repeated phases such as several DB calls are summed)"""
+        self.phases[name] = self.phases.get(name, 0.0) + duration_ms
+
+    def header_value(self) -> str:
+        """Render the phases as a Server-Timing header value"""
+        return ", ".join(
+            f'{name};dur={duration:.3f};desc="{PHASE_DESCRIPTIONS.get(name, name)}"'
+            for name, duration in self.phases.items()
+        )
+
+    def as_dict(self) -> Dict[str, float]:
+        """Phases rounded for structured logging"""
+        return {name: round(duration, 3) for name, duration in self.phases.items()}
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request being handled, or None when timing is inactive"""
+    return _current_timings.get()
+
+
+def start_request_timings():
+    """Activate a new RequestTimings for the current context; returns (timings, reset token)"""
+    timings = RequestTimings()
+    return timings, _current_timings.set(timings)
+
+
+def reset_request_timings(token) -> None:
+    """Deactivate the RequestTimings set by start_request_timings"""
+    _current_timings.reset(token)
+
+
+def record_phase(name: str, duration_ms: float) -> None:
+    """Add a duration to a phase of the current request (no-op when inactive)"""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, duration_ms)
+
+
+@contextmanager
+def timed_phase(name: str):
+    """Time the enclosed block as a phase of the current request"""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - start) * 1000)
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that splits the route handler into deps / handler / serialize phases
+    by marking when the endpoint function starts and returns
+    """
+
+    def get_route_handler(self) -> Callable:
+        call = self.dependant.call
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def timed_call(*args, **kwargs):
+                timings = _current_timings.get()
+                if timings is None:
+                    return await call(*args, **kwargs)
+                timings.endpoint_start = time.perf_counter()
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    timings.endpoint_end = time.perf_counter()
+
+            self.dependant.call = timed_call
+
+        original_handler = super().get_route_handler()
+
+        async def timed_route_handler(request):
+            timings = _current_timings.get()
+            if timings is None:
+                return await original_handler(request)
+
+            start = time.perf_counter()
+            response = await original_handler(request)
+            end = time.perf_counter()
+
+            if timings.endpoint_start:
+                timings.add("deps", (timings.endpoint_start - start) * 1000)
+                timings.add("handler", (timings.endpoint_end - timings.endpoint_start) * 1000)
+                timings.add("serialize", (end - timings.endpoint_end) * 1000)
+            return response
+
+        return timed_route_handler
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Contact Keys Backfill Migration
+Computes `email_normalized` and `phone_e164`, used by contact lookup, for users
+created before they existed. Safe to re-run: only documents without
+`email_normalized` are touched unless --all is given (e.g. after changing
+PHONE_DEFAULT_COUNTRY_CODE).
+Usage: python deployment/backfill_contact_keys.py [--batch-size 500] [--all] [--dry-run]
+"""
+import argparse
+import sys
+from pathlib import Path
+from pymongo import MongoClient, UpdateOne
+
+# Add project root to path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.config.settings import db_config
+from app.models.users import UserModel
+
+
+def backfill_contact_keys(batch_size: int = 500, recompute_all: bool = False, dry_run: bool = False) -> bool:
+    """Write contact keys in batches of `batch_size` bulk updates"""
+    try:
+        if not db_config.mongodb_url:
+            print("❌ MongoDB URL not configured")
+            return False
+
+        print("🔄 Connecting to MongoDB...")
+        client = MongoClient(db_config.connection_string)
+        client.admin.command('ping')
+        print("✅ Connected to MongoDB successfully")
+
+        users_collection = client[db_config.mongodb_database_name][UserModel.COLLECTION_NAME]
+        filter_doc = {} if recompute_all else {"email_normalized": {"$exists": False}}
+        pending = users_collection.count_documents(filter_doc)
+        print(f"🔄 {pending} users to backfill{' (dry run)' if dry_run else ''}...")
+
+        updated = 0
+        unparseable = 0
+        batch = []
+        cursor = users_collection.find(filter_doc, {"email": 1, "phone_number": 1}).sort("_id", 1)
+        for doc in cursor:
+            keys = UserModel.contact_keys(doc.get("email", ""), doc.get("phone_number"))
+            update = {"$set": {"email_normalized": keys["email_normalized"]}}
+            if keys.get("phone_e164"):
+                update["$set"]["phone_e164"] = keys["phone_e164"]
+            else:
+                unparseable += doc.get("phone_number") is not None
+                update["$unset"] = {"phone_e164": ""}
+            batch.append(UpdateOne({"_id": doc["_id"]}, update))
+            if len(batch) >= batch_size:
+                updated += _flush(users_collection, batch, dry_run)
+                batch = []
+                print(f"   - {updated}/{pending}")
+        if batch:
+            updated += _flush(users_collection, batch, dry_run)
+
+        client.close()
+        print(f"\n🎉 Backfill completed: {updated} users {'would be ' if dry_run else ''}updated")
+        if unparseable:
+            print(f"⚠️ {unparseable} phone numbers could not be normalized to E.164 (not searchable by phone)")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error backfilling contact keys: {e}")
+        return False
+
+
+def _flush(collection, batch, dry_run: bool) -> int:
+    """Send one unordered bulk write (or just count it in dry-run mode)"""
+    if dry_run:
+        return len(batch)
+    return collection.bulk_write(batch, ordered=False).modified_count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill users.email_normalized and users.phone_e164 for contact lookup")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--all", action="store_true", help="Recompute keys for every user")
+    parser.add_argument("--dry-run", action="store_true", help="Count the documents without writing")
+    args = parser.parse_args()
+
+    success = backfill_contact_keys(args.batch_size, args.all, args.dry_run)
+    sys.exit(0 if success else 1)
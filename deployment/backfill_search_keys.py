@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Search Keys Backfill Migration
+Computes the normalized `search_keys` used by typeahead search for users
+created before they existed. Safe to re-run: only documents without keys are
+touched unless --all is given.
+Usage: python deployment/backfill_search_keys.py [--batch-size 500] [--all] [--dry-run]
+"""
+import argparse
+import sys
+from pathlib import Path
+from pymongo import MongoClient, UpdateOne
+
+# Add project root to path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.config.settings import db_config
+from app.models.users import UserModel
+
+
+def backfill_search_keys(batch_size: int = 500, recompute_all: bool = False, dry_run: bool = False) -> bool:
+    """Write search_keys in batches of `batch_size` bulk updates"""
+    try:
+        if not db_config.mongodb_url:
+            print("❌ MongoDB URL not configured")
+            return False
+
+        print("🔄 Connecting to MongoDB...")
+        client = MongoClient(db_config.connection_string)
+        client.admin.command('ping')
+        print("✅ Connected to MongoDB successfully")
+
+        users_collection = client[db_config.mongodb_database_name][UserModel.COLLECTION_NAME]
+        filter_doc = {} if recompute_all else {"search_keys": {"$exists": False}}
+        pending = users_collection.count_documents(filter_doc)
+        print(f"🔄 {pending} users to backfill{' (dry run)' if dry_run else ''}...")
+
+        updated = 0
+        batch = []
+        cursor = users_collection.find(filter_doc, {field: 1 for field in UserModel.SEARCH_FIELDS}).sort("_id", 1)
+        for doc in cursor:
+            keys = UserModel.build_search_keys(doc.get("email", ""), doc.get("first_name", ""), doc.get("last_name", ""))
+            batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_keys": keys}}))
+            if len(batch) >= batch_size:
+                updated += _flush(users_collection, batch, dry_run)
+                batch = []
+                print(f"   - {updated}/{pending}")
+        if batch:
+            updated += _flush(users_collection, batch, dry_run)
+
+        client.close()
+        print(f"\n🎉 Backfill completed: {updated} users {'would be ' if dry_run else ''}updated")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error backfilling search keys: {e}")
+        return False
+
+
+def _flush(collection, batch, dry_run: bool) -> int:
+    """Send one unordered bulk write (or just count it in dry-run mode)"""
+    if dry_run:
+        return len(batch)
+    return collection.bulk_write(batch, ordered=False).modified_count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill users.search_keys for typeahead search")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--all", action="store_true", help="Recompute keys for every user")
+    parser.add_argument("--dry-run", action="store_true", help="Count the documents without writing")
+    args = parser.parse_args()
+
+    success = backfill_search_keys(args.batch_size, args.all, args.dry_run)
+    sys.exit(0 if success else 1)
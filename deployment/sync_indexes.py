@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+MongoDB Index Sync
+Diffs the indexes declared in the models (app/models/indexes.py) against the
+database: creates missing ones, reports definition conflicts, and flags
+undeclared indexes that are redundant (a left prefix of another index) or
+unused according to $indexStats. --drop removes those flagged undeclared
+indexes; --dry-run only prints the report.
+
+$indexStats counters are per node and reset on restart: an index only counts
+as unused when its counters started at least --min-unused-days ago (default 7);
+younger ones are reported as unconfirmed. Run this against the primary.
+Usage: python deployment/sync_indexes.py [--dry-run] [--drop] [--no-stats] [--min-unused-days N]
+"""
+import argparse
+import sys
+from pathlib import Path
+from datetime import timedelta
+from typing import Dict, Optional
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure
+
+# Add project root to path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.config.settings import db_config
+from app.models.indexes import DEFAULT_MIN_UNUSED_AGE, IndexDiff, declared_indexes, diff_indexes
+
+
+def index_usage(collection) -> Optional[Dict[str, dict]]:
+    """index name -> $indexStats accesses, or None when the stage is not permitted"""
+    try:
+        return {stats["name"]: stats.get("accesses", {}) for stats in collection.aggregate([{"$indexStats": {}}])}
+    except OperationFailure as e:
+        print(f"⚠️ $indexStats unavailable on '{collection.name}', skipping unused check: {e}")
+        return None
+
+
+def print_report(collection_name: str, diff: IndexDiff) -> None:
+    """Human-readable diff for one collection"""
+    print(f"\n📋 '{collection_name}'")
+    for name in diff.present:
+        print(f"   ✅ {name}")
+    for spec in diff.missing:
+        print(f"   ➕ {spec.name} (missing) - {spec.purpose}")
+    for spec, existing in diff.conflicting:
+        print(f"   ⚠️ {spec.name} exists with another definition {dict(existing['key'])}: drop it manually and re-run")
+    for name in diff.undeclared:
+        notes = []
+        if name in diff.redundant:
+            notes.append(f"redundant with {diff.redundant[name]}")
+        if name in diff.unused:
+            notes.append(f"unused since {diff.unused[name]}")
+        if name in diff.unconfirmed:
+            notes.append(f"no use since {diff.unconfirmed[name]}, too recent to judge")
+        print(f"   ❓ {name} (undeclared{': ' + ', '.join(notes) if notes else ''})")
+    for name, covered_by in diff.redundant.items():
+        if name not in diff.undeclared:
+            print(f"   ⚠️ declared {name} is redundant with {covered_by}: remove it from the registry")
+    for name, since in diff.unused.items():
+        if name not in diff.undeclared:
+            print(f"   ℹ️ declared {name} unused since {since}")
+
+
+def sync_indexes(
+    dry_run: bool = False,
+    drop: bool = False,
+    use_stats: bool = True,
+    min_unused_age: timedelta = DEFAULT_MIN_UNUSED_AGE
+) -> bool:
+    """Apply (or with dry_run, only report) the declared indexes on every registered collection"""
+    try:
+        if not db_config.mongodb_url:
+            print("❌ MongoDB URL not configured")
+            return False
+
+        print("🔄 Connecting to MongoDB...")
+        client = MongoClient(db_config.connection_string)
+        client.admin.command('ping')
+        print("✅ Connected to MongoDB successfully")
+
+        db = client[db_config.mongodb_database_name]
+        created, dropped, failed = [], [], []
+
+        for collection_name, specs in declared_indexes().items():
+            collection = db[collection_name]
+            usage = index_usage(collection) if use_stats else None
+            diff = diff_indexes(specs, list(collection.list_indexes()), usage, min_unused_age)
+            print_report(collection_name, diff)
+
+            if dry_run:
+                continue
+
+            for spec in diff.missing:
+                try:
+                    collection.create_index(list(spec.keys), **spec.create_kwargs())
+                    created.append(f"{collection_name}.{spec.name}")
+                except OperationFailure as e:
+                    failed.append(f"{collection_name}.{spec.name}: {e}")
+
+            if drop:
+                for name in diff.droppable:
+                    try:
+                        collection.drop_index(name)
+                        dropped.append(f"{collection_name}.{name}")
+                    except OperationFailure as e:
+                        failed.append(f"{collection_name}.{name}: {e}")
+
+        client.close()
+
+        print("\n📊 Index Sync Summary:" + (" (dry run, nothing changed)" if dry_run else ""))
+        print(f"✅ Created: {len(created)}")
+        for name in created:
+            print(f"   - {name}")
+        print(f"🗑️  Dropped: {len(dropped)}")
+        for name in dropped:
+            print(f"   - {name}")
+        for failure in failed:
+            print(f"⚠️ Failed: {failure}")
+        return not failed
+
+    except Exception as e:
+        print(f"❌ Error syncing indexes: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync MongoDB indexes with the declarations in app/models")
+    parser.add_argument("--dry-run", action="store_true", help="Report the diff without changing anything")
+    parser.add_argument("--drop", action="store_true", help="Drop undeclared indexes flagged redundant or unused")
+    parser.add_argument("--no-stats", action="store_true", help="Skip $indexStats (no unused check)")
+    parser.add_argument(
+        "--min-unused-days",
+        type=float,
+        default=DEFAULT_MIN_UNUSED_AGE.days,
+        help="Only flag indexes unused when their $indexStats counters are at least this old"
+    )
+    args = parser.parse_args()
+
+    success = sync_indexes(args.dry_run, args.drop, not args.no_stats, timedelta(days=args.min_unused_days))
+    sys.exit(0 if success else 1)
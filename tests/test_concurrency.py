@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from pymongo.errors import NetworkTimeout
+from app.core import database
+from app.core.concurrency import AdaptiveConcurrencyLimiter, ServiceOverloadedError
+
+
+def test_limiter_rejects_over_limit():
+    """Test admissions stop at the current limit and resume after release"""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+
+    assert limiter.try_acquire() is True
+    assert limiter.try_acquire() is True
+    assert limiter.try_acquire() is False
+
+    limiter.release(0.01)
+    assert limiter.try_acquire() is True
+
+
+def test_limiter_backs_off_on_latency_and_recovers():
+    """Test the limit shrinks when latency degrades and grows again when it is stable"""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, min_limit=2)
+
+    for _ in range(50):
+        limiter.try_acquire()
+        limiter.release(0.01)
+    baseline = limiter.limit
+
+    for _ in range(10):
+        limiter.try_acquire()
+        limiter.release(0.5)
+    assert limiter.limit < baseline
+    assert limiter.limit >= 2
+
+    degraded = limiter.limit
+    for _ in range(300):
+        for _ in range(int(limiter.limit)):
+            limiter.try_acquire()
+        for _ in range(int(limiter.inflight)):
+            limiter.release(limiter.long_latency)
+    assert limiter.limit > degraded
+
+
+def test_limiter_backs_off_on_timeouts():
+    """Test dropped operations reduce the limit multiplicatively"""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, backoff_ratio=0.5)
+    limiter.try_acquire()
+    limiter.release(1.0, dropped=True)
+
+    assert limiter.limit == 5
+
+
+def test_run_in_executor_sheds_load_with_503():
+    """Test run_in_executor fails fast when the limiter is saturated"""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    limiter.try_acquire()
+
+    with patch.object(database, "concurrency_limiter", limiter):
+        with pytest.raises(ServiceOverloadedError) as exc_info:
+            asyncio.run(database.run_in_executor(lambda: None))
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "1"
+
+
+def test_run_in_executor_releases_on_timeout():
+    """Test timeouts release the slot and back off"""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+
+    def _timeout():
+        raise NetworkTimeout("timed out")
+
+    database.init_executor()
+    with patch.object(database, "concurrency_limiter", limiter):
+        with pytest.raises(NetworkTimeout):
+            asyncio.run(database.run_in_executor(_timeout))
+
+    assert limiter.inflight == 0
+    assert limiter.limit < 4
@@ -0,0 +1,61 @@
+from datetime import datetime
+from unittest.mock import patch
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.models.users import UserModel
+from app.services.users import UserService
+
+
+def test_normalize_phone_to_e164():
+    """Test international prefixes, national numbers and rejects"""
+    assert UserModel.normalize_phone("+1 (415) 555-2671") == "+14155552671"
+    assert UserModel.normalize_phone("0044 20 7946 0958") == "+442079460958"
+    assert UserModel.normalize_phone("55-1234-5678", default_country_code="52") == "+525512345678"
+    assert UserModel.normalize_phone("+12") is None
+    assert UserModel.normalize_phone(None) is None
+
+
+def test_documents_carry_contact_keys():
+    """Test create/update keep the normalized keys in step with email and phone"""
+    doc = UserModel.create_document(1, {"email": "Ana.Lopez@example.com", "first_name": "Ana", "last_name": "Lopez"})
+    assert doc["email_normalized"] == "ana.lopez@example.com"
+    assert "phone_e164" not in doc
+
+    update = UserModel.update_document({"phone_number": "+52 55 1234 5678"})
+    assert update["$set"]["phone_e164"] == "+525512345678"
+    assert "email_normalized" not in update["$set"]
+
+
+def _user() -> dict:
+    return {
+        "_id": ObjectId(), "seller_id": 1, "email": "Ana@example.com", "first_name": "Ana", "last_name": "Lopez",
+        "phone_number": "+525512345678", "is_active": True,
+        "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 1)
+    }
+
+
+def test_lookup_route_requires_exactly_one_key_and_is_not_a_user_id():
+    """Test GET /users/lookup validates its query and reaches the contact lookup"""
+    received = {}
+
+    async def _lookup(seller_id, email=None, phone=None):
+        received.update(seller_id=seller_id, email=email, phone=phone)
+        return [_user()]
+
+    client = TestClient(create_app())
+    with patch.object(UserService, "lookup_users_by_contact_fast", _lookup):
+        response = client.get("/api/1/users/lookup", params={"phone": "+52 55 1234 5678"})
+        assert client.get("/api/1/users/lookup").status_code == 400
+        assert client.get("/api/1/users/lookup", params={"email": "a@b.co", "phone": "5512345678"}).status_code == 400
+
+    assert response.status_code == 200
+    assert response.json()["data"][0]["email"] == "Ana@example.com"
+    assert received == {"seller_id": 1, "email": None, "phone": "+52 55 1234 5678"}
+
+
+def test_invalid_phone_is_rejected_before_querying():
+    """Test phones that cannot be E.164 get 400"""
+    response = TestClient(create_app()).get("/api/1/users/lookup", params={"phone": "+12"})
+
+    assert response.status_code == 400
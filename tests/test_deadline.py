@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import _csot
+from pymongo.errors import ExecutionTimeout
+from app.config.settings import app_config, db_config
+from app.core.database import run_in_executor_unlimited
+from app.core.deadline import (
+    DeadlineExceededError,
+    start_request_deadline,
+    reset_request_deadline,
+    remaining_seconds
+)
+from app.middleware.deadline import request_budget_seconds
+
+
+class FakeLambdaContext:
+    def __init__(self, remaining_ms: int):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self) -> int:
+        return self.remaining_ms
+
+
+def test_budget_uses_lambda_remaining_time():
+    """Test the budget is capped by the Lambda context and keeps the safety margin"""
+    with patch.object(app_config, "request_budget_seconds", 29.0), \
+         patch.object(app_config, "request_deadline_margin_ms", 250):
+        assert request_budget_seconds({"aws.context": FakeLambdaContext(5000)}) == pytest.approx(4.75)
+        assert request_budget_seconds({}) == pytest.approx(28.75)
+
+
+@pytest.mark.asyncio
+async def test_operations_run_under_pymongo_timeout():
+    """Test executor work sees the remaining request budget as the PyMongo timeout (below the socket timeout)"""
+    token = start_request_deadline(10.0)
+    try:
+        with patch.object(db_config, "mongodb_socket_timeout_ms", 20000), \
+             patch("app.core.database.executor", ThreadPoolExecutor(max_workers=1)):
+            timeout = await run_in_executor_unlimited(_csot.get_timeout)
+    finally:
+        reset_request_deadline(token)
+
+    assert 9.0 < timeout <= 10.0
+
+
+@pytest.mark.asyncio
+async def test_operation_timeout_never_exceeds_socket_timeout():
+    """Test a long request budget does not lift the per-operation socket timeout"""
+    token = start_request_deadline(28.0)
+    try:
+        with patch.object(db_config, "mongodb_socket_timeout_ms", 5000), \
+             patch("app.core.database.executor", ThreadPoolExecutor(max_workers=1)):
+            timeout = await run_in_executor_unlimited(_csot.get_timeout)
+    finally:
+        reset_request_deadline(token)
+
+    assert timeout == 5.0
+
+
+@pytest.mark.asyncio
+async def test_expired_deadline_is_not_submitted():
+    """Test work is abandoned with 504 once the deadline has passed"""
+    token = start_request_deadline(-1.0)
+    try:
+        with patch("app.core.database.executor", ThreadPoolExecutor(max_workers=1)):
+            with pytest.raises(DeadlineExceededError) as exc_info:
+                await run_in_executor_unlimited(lambda: pytest.fail("should not run"))
+    finally:
+        reset_request_deadline(token)
+
+    assert exc_info.value.status_code == 504
+    assert remaining_seconds() is None
+
+
+@pytest.mark.asyncio
+async def test_pymongo_timeout_at_deadline_maps_to_504():
+    """Test client-side timeouts raised at the deadline become DeadlineExceededError"""
+    token = start_request_deadline(0.05)
+
+    def _slow():
+        raise ExecutionTimeout("operation exceeded time limit")
+
+    try:
+        with patch("app.core.database.executor", ThreadPoolExecutor(max_workers=1)):
+            with pytest.raises(DeadlineExceededError):
+                await run_in_executor_unlimited(_slow)
+    finally:
+        reset_request_deadline(token)
@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.core.email_filter import BloomFilter, EmailFilterRegistry
+from app.core.generations import SellerGenerations, seller_generations
+
+
+def test_bloom_filter_has_no_false_negatives_and_meets_target_rate():
+    """Test every added email is found and the measured rate tracks the configured one"""
+    bloom = BloomFilter.for_capacity(5000, 0.01, max_bytes=1024 * 1024)
+    for i in range(5000):
+        bloom.add(f"user{i}@example.com")
+
+    assert all(f"user{i}@example.com" in bloom for i in range(5000))
+    false_positives = sum(f"other{i}@example.com" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    assert bloom.estimated_false_positive_rate() == pytest.approx(0.01, rel=0.2)
+
+
+def test_snapshot_round_trip_and_validation():
+    """Test snapshots restore bits, size and generation, and reject garbage"""
+    bloom = BloomFilter.for_capacity(100, 0.01, max_bytes=1024)
+    bloom.add("ana@example.com")
+
+    restored, generation = BloomFilter.from_bytes(bloom.to_bytes(generation=7))
+
+    assert generation == 7 and "ana@example.com" in restored
+    assert (restored.num_bits, restored.num_hashes, restored.count) == (bloom.num_bits, bloom.num_hashes, 1)
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(b"nope")
+
+
+def _confirming(generation):
+    """Stand-in for seller_generations.confirm returning `generation`, counting calls"""
+    async def _confirm(seller_id):
+        _confirm.calls += 1
+        return generation
+    _confirm.calls = 0
+    return _confirm
+
+
+@pytest.mark.asyncio
+async def test_registry_answers_from_current_filter_only():
+    """Test definite misses need a confirmed generation, matches do not, and stale filters catch up"""
+    registry = EmailFilterRegistry(sellers=[6], false_positive_rate=0.01, max_bytes=1024 * 1024)
+    bloom = BloomFilter.for_capacity(1000, 0.01, max_bytes=1024 * 1024)
+    bloom.add("ana@example.com")
+    registry._filters[6] = (bloom, 3)
+
+    confirm = _confirming(3)
+    with patch.object(seller_generations, "confirm", confirm):
+        assert await registry.might_contain(6, "Ana@Example.com") is True
+        assert confirm.calls == 0
+        assert await registry.might_contain(6, "bea@example.com") is False
+        assert confirm.calls == 1
+
+    # Bea was just created on another instance: the confirming read sees generation 9
+    with patch.object(seller_generations, "confirm", _confirming(9)), \
+         patch.object(registry, "_schedule_build") as schedule_build:
+        assert await registry.might_contain(6, "bea@example.com") is None
+        schedule_build.assert_called_once_with(6)
+
+    def _changes(seller_id, after, upto, projection):
+        assert (seller_id, after, upto) == (6, 3, 9)
+        return iter([{"email": "Bea@Example.com"}])
+
+    with patch.object(seller_generations, "read_sync", lambda seller_id: 9), \
+         patch.object(seller_generations, "changes_sync", _changes):
+        assert registry._build_sync(6) is None
+
+    assert await registry.might_contain(6, "bea@example.com") is True
+    assert registry._filters[6] == (bloom, 9)
+    assert await registry.might_contain(1, "ana@example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_unconfirmed_generation_never_answers_absent():
+    """Test a settling or failed confirming read falls back to MongoDB instead of answering False"""
+    registry = EmailFilterRegistry(sellers=[6], false_positive_rate=0.01, max_bytes=1024 * 1024)
+    registry._filters[6] = (BloomFilter.for_capacity(1000, 0.01, max_bytes=1024 * 1024), 3)
+
+    async def _fails(seller_id):
+        raise ConnectionError("primary unavailable")
+
+    for confirm in (_confirming(None), _fails):
+        with patch.object(seller_generations, "confirm", confirm), \
+             patch.object(registry, "_schedule_build"):
+            assert await registry.might_contain(6, "bea@example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_missing_filter_bypasses_without_a_read():
+    """Test a seller without a filter goes straight to MongoDB and builds one in the background"""
+    registry = EmailFilterRegistry(sellers=[6], false_positive_rate=0.01, max_bytes=1024 * 1024)
+
+    async def _confirm(seller_id):
+        raise AssertionError("the check should not read the generation")
+
+    with patch.object(seller_generations, "confirm", _confirm), \
+         patch.object(registry, "_schedule_build") as schedule_build:
+        assert await registry.might_contain(6, "bea@example.com") is None
+        schedule_build.assert_called_once_with(6)
+
+
+@pytest.mark.asyncio
+async def test_confirm_reads_after_the_call_and_shares_reads():
+    """Test confirm never answers from the cache, and concurrent callers share the next read"""
+    reads = []
+
+    async def _run(func, *args):
+        await asyncio.sleep(0)
+        return func(*args)
+
+    def _read_sync(seller_id):
+        reads.append(seller_id)
+        return 5
+
+    generations = SellerGenerations()
+    generations._cache[6] = (4, float("inf"))
+    with patch("app.core.generations.run_in_executor", _run), \
+         patch.object(generations, "read_sync", _read_sync):
+        results = await asyncio.gather(*(generations.confirm(6) for _ in range(10)))
+
+    assert results == [5] * 10
+    assert len(reads) <= 2
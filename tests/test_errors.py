@@ -0,0 +1,39 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import create_app
+
+
+@pytest.fixture
+def client():
+    """Create test client"""
+    return TestClient(create_app())
+
+
+def test_http_exception_uses_standard_envelope(client):
+    """Test precomputed HTTP error envelopes keep the ErrorResponse shape"""
+    response = client.get("/api/1/users/not-an-object-id")
+
+    assert response.status_code == 400
+    data = response.json()
+    assert data["metadata"]["success"] is False
+    assert data["metadata"]["message"] == "Invalid user ID format"
+    assert data["metadata"]["timestamp"]
+    assert data["errors"] == [{"code": "http_400", "field": None, "message": "Invalid user ID format"}]
+
+
+def test_error_timestamps_are_per_response(client):
+    """Test the cached envelope does not freeze the timestamp"""
+    first = client.get("/api/1/users/bad").json()["metadata"]["timestamp"]
+    second = client.get("/api/1/users/bad").json()["metadata"]["timestamp"]
+    assert first != second
+
+
+def test_validation_error_envelope(client):
+    """Test validation errors are rendered per field"""
+    response = client.post("/api/1/users", json={"email": "not-an-email", "first_name": "Ana", "last_name": "Lopez"})
+
+    assert response.status_code == 422
+    data = response.json()
+    assert data["metadata"]["message"] == "Request validation failed"
+    assert data["errors"][0]["code"] == "validation_error"
+    assert data["errors"][0]["field"] == "body.email"
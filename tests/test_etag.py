@@ -0,0 +1,117 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest.mock import patch
+from bson import ObjectId, Timestamp
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.core.generations import from_timestamp, seller_generations
+from app.models.users import UserModel
+from app.schemas.common import PaginationInfo
+from app.schemas.users import UserListResponse
+from app.services.users import UserService
+from app.utils.etag import etag_matches, list_etag, user_etag
+
+USER_ID = ObjectId()
+USER_DOC = {
+    "_id": USER_ID,
+    "seller_id": 3,
+    "email": "ana@example.com",
+    "first_name": "Ana",
+    "last_name": "Lopez",
+    "phone_number": None,
+    "is_active": True,
+    "created_at": datetime(2024, 1, 1),
+    "updated_at": datetime(2024, 1, 2, 3, 4, 5, 678000)
+}
+
+
+def test_user_etag_changes_with_updated_at():
+    """Test user ETags are strong and follow updated_at"""
+    etag = user_etag(USER_DOC)
+    assert etag.startswith(f'"{USER_ID}-') and etag.endswith('"')
+    assert user_etag({**USER_DOC, "updated_at": datetime(2024, 1, 3)}) != etag
+    assert user_etag({**USER_DOC, "updated_at": USER_DOC["updated_at"].replace(tzinfo=timezone.utc)}) == etag
+
+
+def test_if_none_match_parsing():
+    """Test lists, weak validators and '*' in If-None-Match"""
+    etag = list_etag(1, 7, 1, 20, None, None)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(list_etag(1, 8, 1, 20, None, None), etag)
+
+
+def test_get_user_returns_304_when_unchanged():
+    """Test a matching If-None-Match skips the body"""
+    async def _get(seller_id, user_id):
+        return USER_DOC
+
+    with patch.object(UserService, "get_user_by_id_fast", _get):
+        client = TestClient(create_app())
+        first = client.get(f"/api/3/users/{USER_ID}")
+        second = client.get(f"/api/3/users/{USER_ID}", headers={"If-None-Match": first.headers["etag"]})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+def test_list_returns_304_from_cached_generation_without_db():
+    """Test a cached generation answers a matching list poll before the DB read"""
+    async def _list(*args):
+        raise AssertionError("list query should not run")
+
+    etag = list_etag(3, 12, 1, 20, None, None)
+    with patch.object(seller_generations, "_cache", {3: (12, float("inf"))}), \
+         patch.object(UserService, "list_users", _list):
+        client = TestClient(create_app())
+        response = client.get("/api/3/users", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+class StampedCollection:
+    """Users collection whose newest write_ts is `stamp` (moved by writes on any instance)"""
+
+    def __init__(self, stamp: Timestamp):
+        self.stamp = stamp
+
+    def find_one(self, filter_doc, projection=None, sort=None):
+        assert sort == [("write_ts", -1)]
+        return {"write_ts": self.stamp}
+
+
+def test_list_etag_follows_the_newest_write_stamp():
+    """Test a write made elsewhere changes the list ETag, and a settling one disables it"""
+    async def _list(seller_id, pagination, search):
+        return UserListResponse(data=[], pagination=PaginationInfo(
+            total_count=0, page=1, page_size=20, total_pages=0, has_next=False, has_previous=False
+        ))
+
+    settled = Timestamp(int(time.time()) - 60, 1)
+    collection = StampedCollection(settled)
+    with patch.object(seller_generations, "_cache", {}), \
+         patch.object(seller_generations, "cache_ttl", 0), \
+         patch.object(UserModel, "get_collection", lambda: collection), \
+         patch("app.core.database.executor", ThreadPoolExecutor(max_workers=1)), \
+         patch.object(UserService, "list_users", _list):
+        client = TestClient(create_app())
+        first = client.get("/api/3/users")
+        assert first.headers["etag"] == list_etag(3, from_timestamp(settled), 1, 20, None, None)
+        assert client.get("/api/3/users", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+        # Another instance wrote: the stamp moved without any local write
+        collection.stamp = Timestamp(settled.time, 2)
+        moved = client.get("/api/3/users", headers={"If-None-Match": first.headers["etag"]})
+        assert moved.status_code == 200
+        assert moved.headers["etag"] != first.headers["etag"]
+
+        # A write this recent may still have older-stamped writes in flight
+        collection.stamp = Timestamp(int(time.time()), 1)
+        settling = client.get("/api/3/users", headers={"If-None-Match": moved.headers["etag"]})
+        assert settling.status_code == 200
+        assert "etag" not in settling.headers
@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import patch
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.core.idempotency import (
+    COMPLETED,
+    IN_FLIGHT,
+    IdempotencyRecord,
+    IdempotencyStoreFullError,
+    InMemoryIdempotencyStore,
+    execute_idempotent
+)
+from app.dependencies import idempotency
+from app.services.users import UserService
+
+USER_PAYLOAD = {"email": "ana@example.com", "first_name": "Ana", "last_name": "Lopez"}
+
+
+def _fake_create_user(calls: list):
+    async def _create(seller_id, user_data):
+        calls.append(seller_id)
+        now = datetime.now(timezone.utc)
+        return {
+            "_id": ObjectId(),
+            "seller_id": seller_id,
+            "email": user_data.email,
+            "first_name": user_data.first_name,
+            "last_name": user_data.last_name,
+            "phone_number": None,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now
+        }
+    return _create
+
+
+def test_retry_replays_first_response():
+    """Test a retried create returns the stored response without creating again"""
+    calls = []
+    with patch.object(idempotency, "idempotency_store", InMemoryIdempotencyStore()), \
+         patch.object(UserService, "create_user_fast", _fake_create_user(calls)):
+        client = TestClient(create_app())
+        headers = {"Idempotency-Key": "retry-1"}
+        first = client.post("/api/5/users", json=USER_PAYLOAD, headers=headers)
+        second = client.post("/api/5/users", json=USER_PAYLOAD, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.content == first.content
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert calls == [5]
+
+
+def test_idempotent_body_matches_plain_create():
+    """Test the keyed create encodes the user like the create without a key (nulls included or not)"""
+    with patch.object(idempotency, "idempotency_store", InMemoryIdempotencyStore()), \
+         patch.object(UserService, "create_user_fast", _fake_create_user([])):
+        client = TestClient(create_app())
+        plain = client.post("/api/5/users", json=USER_PAYLOAD)
+        keyed = client.post("/api/5/users", json=USER_PAYLOAD, headers={"Idempotency-Key": "shape-1"})
+
+    assert plain.status_code == keyed.status_code == 201
+    assert keyed.json()["data"].keys() == plain.json()["data"].keys()
+    assert ("phone_number" in keyed.json()["data"]) is not idempotency.app_config.validate_responses
+
+
+def test_key_reuse_with_different_body_is_rejected():
+    """Test the same key with another body gets 422 instead of a replay"""
+    calls = []
+    with patch.object(idempotency, "idempotency_store", InMemoryIdempotencyStore()), \
+         patch.object(UserService, "create_user_fast", _fake_create_user(calls)):
+        client = TestClient(create_app())
+        headers = {"Idempotency-Key": "retry-2"}
+        client.post("/api/5/users", json=USER_PAYLOAD, headers=headers)
+        response = client.post("/api/5/users", json={**USER_PAYLOAD, "first_name": "Eva"}, headers=headers)
+
+    assert response.status_code == 422
+    assert calls == [5]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_in_flight_attempt():
+    """Test concurrent duplicates share one execution"""
+    store = InMemoryIdempotencyStore()
+    runs = []
+
+    async def _produce():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return 201, b'{"ok":true}', "application/json"
+
+    results = await asyncio.gather(*[
+        execute_idempotent(store, "1:key", "hash", _produce, wait_seconds=1.0) for _ in range(3)
+    ])
+
+    assert len(runs) == 1
+    assert [replayed for _, replayed in results].count(False) == 1
+    assert all(record.body == b'{"ok":true}' for record, _ in results)
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_releases_key():
+    """Test errors are not stored so the next retry runs again"""
+    store = InMemoryIdempotencyStore()
+
+    async def _fail():
+        raise RuntimeError("boom")
+
+    async def _succeed():
+        return 201, b"{}", "application/json"
+
+    with pytest.raises(RuntimeError):
+        await execute_idempotent(store, "1:key", "hash", _fail)
+    record, replayed = await execute_idempotent(store, "1:key", "hash", _succeed)
+
+    assert record.status_code == 201
+    assert replayed is False
+
+
+@pytest.mark.asyncio
+async def test_full_memory_store_keeps_in_flight_claims():
+    """Test eviction only drops completed entries and rejects new claims when all slots are in flight"""
+    store = InMemoryIdempotencyStore(max_keys=2)
+    assert await store.reserve("1:done", "hash") is None
+    await store.complete("1:done", IdempotencyRecord(body_hash="hash", state=COMPLETED, status_code=201))
+    assert await store.reserve("1:a", "hash") is None
+    assert await store.reserve("1:b", "hash") is None
+
+    # The completed entry made room; both in-flight claims are still held
+    assert (await store.reserve("1:a", "hash")).state == IN_FLIGHT
+    with pytest.raises(IdempotencyStoreFullError) as exc_info:
+        await store.reserve("1:c", "hash")
+    assert exc_info.value.status_code == 503
+    assert (await store.reserve("1:b", "hash")).state == IN_FLIGHT
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+from app.models.indexes import IndexSpec, declared_indexes, diff_indexes
+from app.models.users import UserModel
+
+# list_indexes() output of a database set up by the old imperative script
+LEGACY_INDEXES = [
+    {"v": 2, "key": {"_id": 1}, "name": "_id_"},
+    {"v": 2, "key": {"seller_id": 1, "email": 1}, "name": "seller_email_unique", "unique": True},
+    {"v": 2, "key": {"seller_id": 1}, "name": "seller_id_idx"},
+    {"v": 2, "key": {"email": 1}, "name": "email_idx"},
+    {"v": 2, "key": {"seller_id": 1, "is_active": 1, "created_at": -1}, "name": "seller_active_created_idx"},
+    {"v": 2, "key": {"_fts": "text", "_ftsx": 1}, "name": "search_text_idx",
+     "weights": {"email": 1, "first_name": 1, "last_name": 1}, "default_language": "english", "textIndexVersion": 3},
+    {"v": 2, "key": {"seller_id": 1, "search_keys": 1}, "name": "seller_search_keys_idx"},
+    {"v": 2, "key": {"seller_id": 1.0, "updated_at": 1.0, "_id": 1.0}, "name": "seller_updated_id_idx"},
+    {"v": 2, "key": {"seller_id": 1, "phone_e164": 1}, "name": "seller_phone_e164_idx",
+     "partialFilterExpression": {"phone_e164": {"$exists": True}}}
+]
+
+
+def test_diff_against_legacy_indexes():
+    """Test text/partial/float-key indexes match their specs and seller_id_idx is redundant"""
+    usage = {info["name"]: {"ops": 10, "since": datetime(2024, 1, 1)} for info in LEGACY_INDEXES}
+    usage["email_idx"]["ops"] = 0
+
+    diff = diff_indexes(UserModel.INDEXES, LEGACY_INDEXES, usage)
+
+    assert [spec.name for spec in diff.missing] == [UserModel.EMAIL_LOOKUP_INDEX, UserModel.GENERATION_INDEX]
+    assert not diff.conflicting
+    assert diff.undeclared == ["seller_id_idx"]
+    assert diff.redundant == {"seller_id_idx": "seller_email_unique"}
+    assert diff.droppable == ["seller_id_idx"]
+    # Declared but unused: reported, never dropped
+    assert "email_idx" in diff.unused and "email_idx" not in diff.droppable
+
+
+def test_recently_reset_counters_do_not_make_an_index_unused():
+    """Test zero ops only count as unused once the counters are older than the minimum age"""
+    now = datetime(2024, 6, 10, tzinfo=timezone.utc)
+    existing = LEGACY_INDEXES + [{"v": 2, "key": {"first_name": 1}, "name": "first_name_idx"}]
+    usage = {info["name"]: {"ops": 10, "since": datetime(2024, 1, 1)} for info in existing}
+    # Node restarted yesterday: PyMongo reports naive UTC datetimes
+    usage["first_name_idx"] = {"ops": 0, "since": datetime(2024, 6, 9)}
+
+    diff = diff_indexes(UserModel.INDEXES, existing, usage, min_unused_age=timedelta(days=7), now=now)
+    assert "first_name_idx" not in diff.unused and "first_name_idx" not in diff.droppable
+    assert diff.unconfirmed == {"first_name_idx": datetime(2024, 6, 9)}
+
+    diff = diff_indexes(UserModel.INDEXES, existing, usage, min_unused_age=timedelta(hours=12), now=now)
+    assert "first_name_idx" in diff.unused and "first_name_idx" in diff.droppable
+
+
+def test_conflicting_definition_and_duplicate_index():
+    """Test a declared name with another definition conflicts and an exact copy is flagged"""
+    spec = IndexSpec("by_seller_created", (("seller_id", 1), ("created_at", -1)))
+    existing = [
+        {"key": {"seller_id": 1, "created_at": 1}, "name": "by_seller_created"},
+        {"key": {"seller_id": 1, "created_at": 1}, "name": "copy_idx"}
+    ]
+
+    diff = diff_indexes([spec], existing)
+
+    assert diff.conflicting[0][0] is spec
+    assert diff.redundant.get("copy_idx") == "by_seller_created"
+
+
+def test_declared_registry_has_no_redundant_indexes():
+    """Test the registry itself would not be flagged"""
+    for specs in declared_indexes().values():
+        diff = diff_indexes(specs, [])
+        assert len(diff.missing) == len(specs)
+        assert diff.redundant == {}
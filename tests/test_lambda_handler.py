@@ -0,0 +1,57 @@
+from unittest.mock import patch
+from app import lambda_handler
+
+
+def test_warmer_event_with_marker_is_detected():
+    """Test payloads carrying the warmer marker are treated as keep-warm pings"""
+    assert lambda_handler.is_warmer_event({"warmer": True}) is True
+    assert lambda_handler.is_warmer_event({"source": "aws.events", "detail-type": "Scheduled Event"}) is True
+
+
+def test_http_event_is_not_warmer():
+    """Test API Gateway events are never treated as warmers"""
+    event = {"warmer": True, "requestContext": {}, "httpMethod": "GET", "path": "/health"}
+    assert lambda_handler.is_warmer_event(event) is False
+
+
+def test_warmer_event_skips_asgi_dispatch():
+    """Test warmer events are answered without going through Mangum"""
+    with patch.object(lambda_handler, "asgi_handler") as asgi_mock, \
+         patch.object(lambda_handler, "warm_connection_pool", return_value=True):
+        response = lambda_handler.handler({"warmer": True}, None)
+
+    asgi_mock.assert_not_called()
+    assert response == {"warmed": True, "pool_warmed": True}
+
+
+def test_http_invocation_emits_one_emf_line(capsys):
+    """Test an API Gateway invocation writes a single EMF line with route metrics"""
+    import json
+    event = {
+        "resource": "/{proxy+}",
+        "path": "/health",
+        "httpMethod": "GET",
+        "headers": {"host": "example.com"},
+        "multiValueHeaders": {},
+        "queryStringParameters": None,
+        "multiValueQueryStringParameters": None,
+        "pathParameters": {"proxy": "health"},
+        "requestContext": {"resourcePath": "/{proxy+}", "httpMethod": "GET", "path": "/dev/health", "stage": "dev"},
+        "body": None,
+        "isBase64Encoded": False,
+    }
+
+    response = lambda_handler.handler(event, None)
+    assert response["statusCode"] == 200
+
+    emf_lines = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()
+        if line.startswith("{") and '"_aws"' in line
+    ]
+    assert len(emf_lines) == 1
+    emf = emf_lines[0]
+    assert emf["Route"] == "GET /health"
+    assert "Latency" in emf
+    assert emf["ColdStart"] in (0, 1)
+    metric_names = {metric["Name"] for metric in emf["_aws"]["CloudWatchMetrics"][0]["Metrics"]}
+    assert {"Latency", "ColdStart"} <= metric_names
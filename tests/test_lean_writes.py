@@ -0,0 +1,116 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from app.core.generations import seller_generations
+from app.models.users import UserModel
+from app.schemas.users import UserCreateRequest, UserUpdateRequest
+from app.services import users as users_service
+from app.services.users import UserService
+
+USER_ID = ObjectId()
+
+
+class _FakeCollection:
+    """Records calls; behaves as if USER_ID exists for seller 5"""
+
+    def __init__(self, calls: list):
+        self.calls = calls
+
+    def update_one(self, filter_doc, update, upsert=False):
+        self.calls.append(("update_one", filter_doc, update, upsert))
+        return SimpleNamespace(matched_count=int(filter_doc["_id"] == USER_ID))
+
+    def find_one_and_update(self, filter_doc, update, projection=None, return_document=None):
+        self.calls.append(("find_one_and_update", filter_doc, update, projection, return_document))
+        return {"_id": USER_ID, "seller_id": 5, "email": "ana@example.com", "first_name": "Ana",
+                "last_name": "Lopez", "phone_number": "5551234567", "is_active": True,
+                "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 2)}
+
+
+async def _run_inline(func, *args):
+    return func(*args)
+
+
+@pytest.fixture
+def collection():
+    collection = _FakeCollection([])
+    # A cached generation the writes must forget
+    with patch.object(UserModel, "get_collection", lambda: collection), \
+         patch.object(seller_generations, "_cache", {5: (1, float("inf"))}), \
+         patch.object(users_service, "run_in_executor", _run_inline):
+        yield collection
+
+
+@pytest.mark.asyncio
+async def test_delete_is_one_update_one_checked_by_matched_count(collection):
+    """Test soft delete reads nothing back, stamps the generation in the same update and maps matched_count 0 to 404"""
+    assert await UserService.delete_user(5, str(USER_ID)) is True
+    assert [call[0] for call in collection.calls] == ["update_one"]
+    assert collection.calls[0][2]["$set"]["is_active"] is False
+    assert collection.calls[0][2]["$currentDate"] == {"write_ts": {"$type": "timestamp"}}
+    assert 5 not in seller_generations._cache
+
+    with pytest.raises(HTTPException) as exc_info:
+        await UserService.delete_user(5, str(ObjectId()))
+    assert exc_info.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_update_projects_response_fields_without_a_read(collection):
+    """Test non-search updates are one projected find_one_and_update that also stamps the generation"""
+    user_doc = await UserService.update_user_fast(5, str(USER_ID), UserUpdateRequest(phone_number="5551234567"))
+
+    assert [call[0] for call in collection.calls] == ["find_one_and_update"]
+    _, _, update, projection, return_document = collection.calls[0]
+    assert "$currentDate" in update
+    assert projection == UserModel.RESPONSE_PROJECTION and "search_keys" not in projection
+    assert return_document is ReturnDocument.AFTER
+    assert user_doc["phone_number"] == "5551234567"
+
+
+@pytest.mark.asyncio
+async def test_create_is_one_stamped_insert(collection):
+    """Test creates insert through a single upsert on the new _id, stamping write_ts"""
+    user_doc = await UserService.create_user_fast(5, UserCreateRequest(
+        email="eva@example.com", first_name="Eva", last_name="Diaz"
+    ))
+
+    assert [call[0] for call in collection.calls] == ["update_one"]
+    _, filter_doc, update, upsert = collection.calls[0]
+    assert filter_doc == {"_id": user_doc["_id"]} and upsert is True
+    assert update["$setOnInsert"]["email"] == "eva@example.com" and "_id" not in update["$setOnInsert"]
+    assert "$currentDate" in update
+    assert 5 not in seller_generations._cache
+
+
+class _RacingCollection:
+    """The user exists (or not), but every conditional rename loses the race"""
+
+    def __init__(self, exists: bool):
+        self.exists = exists
+        self.attempts = 0
+
+    def find_one(self, filter_doc, projection=None):
+        return {"email": "ana@example.com", "first_name": "Ana", "last_name": "Lopez"} if self.exists else None
+
+    def find_one_and_update(self, filter_doc, update, projection=None, return_document=None):
+        self.attempts += 1
+        return None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("exists, expected_status", [(True, 409), (False, 404)])
+async def test_rename_race_is_a_conflict_not_a_missing_user(exists, expected_status):
+    """Test exhausted rename retries answer 409, and only a missing document answers 404"""
+    racing = _RacingCollection(exists)
+    with patch.object(UserModel, "get_collection", lambda: racing), \
+         patch.object(users_service, "run_in_executor", _run_inline):
+        with pytest.raises(HTTPException) as exc_info:
+            await UserService.update_user_fast(5, str(USER_ID), UserUpdateRequest(first_name="Eva"))
+
+    assert exc_info.value.status_code == expected_status
+    assert racing.attempts == (3 if exists else 0)
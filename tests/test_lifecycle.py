@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.core.lifecycle import Lifecycle
+from app.core.search_index import SearchIndexRegistry
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_runs_startup_in_order_and_shutdown_in_reverse():
+    """Test resources start in registration order, stop in reverse and record timings"""
+    calls = []
+    lifecycle = Lifecycle()
+    lifecycle.register("first", startup=lambda: calls.append("first.start"), shutdown=lambda: calls.append("first.stop"))
+    lifecycle.register("second", startup=lambda: calls.append("second.start"), shutdown=lambda: calls.append("second.stop"))
+
+    await lifecycle.startup()
+    assert lifecycle.ready is True
+    await lifecycle.shutdown()
+
+    assert calls == ["first.start", "second.start", "second.stop", "first.stop"]
+    assert "first.startup" in lifecycle.timings
+    assert "shutdown" in lifecycle.timings
+
+
+def test_lifecycle_sync_startup_retries_failed_resources():
+    """Test a failed non-required resource is retried by the next sync startup"""
+    attempts = []
+
+    def flaky_startup():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("unreachable")
+
+    lifecycle = Lifecycle()
+    lifecycle.register("flaky", startup=flaky_startup)
+
+    lifecycle.startup_sync()
+    assert lifecycle.ready is False
+
+    lifecycle.startup_sync()
+    assert lifecycle.ready is True
+    assert len(attempts) == 2
+
+
+@pytest.mark.asyncio
+async def test_lifespan_retries_failed_resources_with_backoff():
+    """Test a resource that fails at ASGI startup is retried in the background until it starts"""
+    attempts = []
+
+    def flaky_startup():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("unreachable")
+
+    lifecycle = Lifecycle(retry_initial_seconds=0.01, retry_max_seconds=0.02)
+    lifecycle.register("flaky", startup=flaky_startup)
+
+    await lifecycle.startup()
+    assert lifecycle.ready is False
+
+    for _ in range(100):
+        if lifecycle.ready:
+            break
+        await asyncio.sleep(0.01)
+    assert lifecycle.ready is True
+    assert len(attempts) == 3
+    await lifecycle.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_registry_builds_start_with_the_app_and_are_cancelled_on_shutdown():
+    """Test hot sellers are built at startup and unfinished builds are cancelled on shutdown"""
+    registry = SearchIndexRegistry(sellers=[1, 2], memory_budget_bytes=1024)
+    started = []
+
+    async def _build(seller_id):
+        started.append(seller_id)
+        await asyncio.sleep(60)
+
+    lifecycle = Lifecycle()
+    lifecycle.register("search_index", startup=registry.start, shutdown=registry.close)
+    with patch.object(registry, "_build", _build):
+        await lifecycle.startup()
+        await asyncio.sleep(0)
+        assert sorted(started) == [1, 2]
+        tasks = list(registry._tasks)
+
+        await lifecycle.shutdown()
+
+    assert all(task.cancelled() for task in tasks)
+    assert not registry._tasks
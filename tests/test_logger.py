@@ -0,0 +1,84 @@
+import json
+import logging
+import queue
+from app.utils.logger import (
+    BoundedQueueHandler,
+    FormatLog,
+    json_dumps,
+    SamplingFilter,
+    setup_logger,
+    flush_logs,
+    shutdown_logging
+)
+
+
+def test_queue_mode_writes_records_from_background_thread(capsys):
+    """Test queued records are formatted and written once flushed"""
+    logger = setup_logger("INFO", queue_enabled=True, queue_size=100)
+    try:
+        logger.info("Queued message", extra={"extra_data": {"seller_id": 1}})
+        flush_logs(timeout=2.0)
+
+        line = capsys.readouterr().err.strip().splitlines()[-1]
+        log_obj = json.loads(line)
+        assert log_obj["message"].endswith("Queued message")
+        assert log_obj["seller_id"] == 1
+    finally:
+        shutdown_logging()
+        setup_logger()
+
+
+def test_overflow_policies_never_block():
+    """Test full queues drop records according to the overflow policy"""
+    record = logging.LogRecord("fastapi_app", logging.INFO, __file__, 1, "msg", None, None)
+
+    newest = BoundedQueueHandler(queue.Queue(maxsize=1), overflow="drop_newest")
+    newest.emit(record)
+    newest.emit(logging.makeLogRecord({"msg": "second"}))
+    assert newest.queue.get_nowait() is record
+    assert newest.dropped == 1
+
+    oldest = BoundedQueueHandler(queue.Queue(maxsize=1), overflow="drop_oldest")
+    oldest.emit(record)
+    second = logging.makeLogRecord({"msg": "second"})
+    oldest.emit(second)
+    assert oldest.queue.get_nowait() is second
+    assert oldest.dropped == 1
+
+
+def test_sampling_filter_drops_and_reports_suppressed_records():
+    """Test rate-limited keys drop records and report the suppressed count"""
+    sampling = SamplingFilter(rate_limits={"Health check requested": 1.0})
+
+    def make_record(level=logging.INFO):
+        return logging.LogRecord("fastapi_app", level, __file__, 1, "Health check requested", None, None)
+
+    assert sampling.filter(make_record()) is True
+    assert sampling.filter(make_record()) is False
+    assert sampling.filter(make_record()) is False
+    # Errors are never sampled away
+    assert sampling.filter(make_record(logging.ERROR)) is True
+
+    sampling._state["Health check requested"].tokens = 1.0
+    record = make_record()
+    assert sampling.filter(record) is True
+    assert record.suppressed == 2
+
+
+def test_callable_extra_data_is_evaluated_only_when_emitted():
+    """Test lazy extra_data is not evaluated for filtered records"""
+    calls = []
+    logger = setup_logger("INFO", sample_rates={"Lazy message": 0.0})
+    try:
+        logger.info("Lazy message", extra={"extra_data": lambda: calls.append(1) or {}})
+        assert calls == []
+    finally:
+        setup_logger()
+
+    record = logging.makeLogRecord({"msg": "Lazy", "extra_data": lambda: {"seller_id": 7}})
+    assert json.loads(FormatLog().format(record))["seller_id"] == 7
+
+
+def test_json_dumps_accepts_non_string_keys():
+    """Test extra_data dicts keyed by ints (e.g. seller_id) still serialize"""
+    assert json.loads(json_dumps({"extra_data": {42: "seller"}})) == {"extra_data": {"42": "seller"}}
@@ -0,0 +1,64 @@
+import threading
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.config.settings import app_config
+from app.core.metrics import Metric, MetricsRegistry
+
+
+def test_metrics_endpoint_exposes_route_metrics():
+    """Test /metrics exposes request counters labelled by route template"""
+    client = TestClient(create_app())
+    client.get("/health")
+
+    with patch.object(app_config, "environment", "development"):
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert '# TYPE http_requests_total counter' in body
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/health",le="+Inf"}' in body
+
+
+def test_metrics_endpoint_requires_token_when_configured():
+    """Test /metrics wants the bearer token when set, and is closed in production without one"""
+    client = TestClient(create_app())
+    with patch.object(app_config, "metrics_token", "s3cret"):
+        assert client.get("/metrics").status_code == 403
+        assert client.get("/metrics", headers={"Authorization": "Bearer nope"}).status_code == 403
+        assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+    with patch.object(app_config, "environment", "production"):
+        assert client.get("/metrics").status_code == 403
+
+
+def test_metric_base_class_is_abstract():
+    """Test a metric type without samples() cannot be instantiated"""
+    with pytest.raises(TypeError):
+        Metric("test", "Test metric")
+
+
+def test_counter_and_histogram_aggregate_across_threads():
+    """Test per-thread shards are merged at scrape time"""
+    registry = MetricsRegistry()
+    counter = registry.counter("test_total", "Test counter", ("kind",))
+    histogram = registry.histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(100):
+            counter.inc("a")
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.values()[("a",)] == 400
+    exposition = registry.expose()
+    assert 'test_seconds_bucket{le="0.1"} 0' in exposition
+    assert 'test_seconds_bucket{le="1"} 400' in exposition
+    assert 'test_seconds_count 400' in exposition
@@ -0,0 +1,70 @@
+from datetime import datetime
+from unittest.mock import patch
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.services.users import UserService
+
+FOUND_ID, MISSING_ID = str(ObjectId()), str(ObjectId())
+
+
+def _fake_get_users(calls: list):
+    async def _get(seller_id, user_ids):
+        calls.append((seller_id, list(user_ids)))
+        return {FOUND_ID: {
+            "_id": ObjectId(FOUND_ID),
+            "seller_id": seller_id,
+            "email": "ana@example.com",
+            "first_name": "Ana",
+            "last_name": "Lopez",
+            "phone_number": None,
+            "is_active": True,
+            "created_at": datetime(2024, 1, 1),
+            "updated_at": datetime(2024, 1, 1)
+        }}
+    return _get
+
+
+def test_lookup_returns_request_order_with_not_found_markers():
+    """Test POST /lookup keeps the requested order and marks missing ids"""
+    calls = []
+    with patch.object(UserService, "get_users_by_ids_fast", _fake_get_users(calls)):
+        response = TestClient(create_app()).post("/api/8/users/lookup", json={"ids": [MISSING_ID, FOUND_ID]})
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data[0] == {"id": MISSING_ID, "found": False}
+    assert data[1]["found"] is True and data[1]["user"]["email"] == "ana@example.com"
+    assert calls == [(8, [MISSING_ID, FOUND_ID])]
+
+
+def test_ids_query_param_uses_multi_get():
+    """Test GET ?ids= is served by the same single query"""
+    calls = []
+    with patch.object(UserService, "get_users_by_ids_fast", _fake_get_users(calls)):
+        response = TestClient(create_app()).get(f"/api/8/users?ids={FOUND_ID},{MISSING_ID}")
+
+    assert [item["found"] for item in response.json()["data"]] == [True, False]
+    assert len(calls) == 1
+
+
+def test_uppercase_ids_are_found_and_echoed_canonically():
+    """Test hex case does not turn an existing user into a not-found marker"""
+    calls = []
+    with patch.object(UserService, "get_users_by_ids_fast", _fake_get_users(calls)):
+        response = TestClient(create_app()).post("/api/8/users/lookup", json={"ids": [FOUND_ID.upper()]})
+
+    data = response.json()["data"]
+    assert data[0]["found"] is True and data[0]["id"] == FOUND_ID
+    assert calls == [(8, [FOUND_ID])]
+
+
+def test_invalid_ids_are_rejected_before_querying():
+    """Test every id is validated like validate_user_id"""
+    calls = []
+    with patch.object(UserService, "get_users_by_ids_fast", _fake_get_users(calls)):
+        response = TestClient(create_app()).post("/api/8/users/lookup", json={"ids": [FOUND_ID, "nope"]})
+
+    assert response.status_code == 400
+    assert "nope" in response.json()["metadata"]["message"]
+    assert calls == []
@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from bson import ObjectId
+from app.core import page_cache
+from app.core.emf import EmfSink
+from app.core.generations import seller_generations
+from app.core.metrics import page_cache_requests_total
+from app.core.page_cache import PageCache
+from app.dependencies.common import PaginationParams, SearchParams
+from app.services import users as users_service
+from app.services.users import UserService
+
+USER_DOC = {
+    "_id": ObjectId(),
+    "seller_id": 4,
+    "email": "ana@example.com",
+    "first_name": "Ana",
+    "last_name": "Lopez",
+    "phone_number": None,
+    "is_active": True,
+    "created_at": datetime(2024, 1, 1),
+    "updated_at": datetime(2024, 1, 1)
+}
+
+
+def test_page_cache_bounded_by_entries_and_bytes():
+    """Test LRU eviction on both the entry and the byte bound"""
+    cache = PageCache(max_entries=2, max_bytes=10 * 1024 * 1024)
+    for key in ("a", "b", "c"):
+        cache.put(key, ([USER_DOC], 1))
+    assert cache.get("a") is None
+    assert cache.get("c") == ([USER_DOC], 1)
+
+    small = PageCache(max_entries=100, max_bytes=1)
+    small.put("a", ([USER_DOC], 1))
+    assert len(small) == 0
+
+
+def test_page_cache_counts_hits_and_misses_in_emf():
+    """Test lookups are accumulated on the invocation's EMF line, not only in /metrics"""
+    sink = EmfSink(namespace="Test", service="test", allowed_dimensions=[])
+    sink.begin_invocation()
+    cache = PageCache()
+    with patch.object(page_cache, "emf_sink", sink):
+        cache.get("a")
+        cache.put("a", ([USER_DOC], 1))
+        cache.get("a")
+        cache.get("a")
+
+    assert sink._metrics["CacheMisses"] == (1.0, "Count")
+    assert sink._metrics["CacheHits"] == (2.0, "Count")
+
+
+@pytest.mark.asyncio
+async def test_list_users_hits_cache_until_generation_changes():
+    """Test repeated list calls skip MongoDB until a write bumps the generation"""
+    calls = []
+
+    async def _fake_run_in_executor(func, *args):
+        calls.append(func)
+        return [USER_DOC], 1
+
+    pagination = PaginationParams(page=1, page_size=20)
+    search = SearchParams(search=None, is_active=None)
+    hits_before = page_cache_requests_total.values().get(("hit",), 0)
+
+    with patch.object(users_service, "list_page_cache", PageCache()), \
+         patch.object(users_service, "run_in_executor", _fake_run_in_executor), \
+         patch.object(seller_generations, "_cache", {4: (1, float("inf"))}):
+        first = await UserService.list_users(4, pagination, search)
+        await UserService.list_users(4, pagination, search)
+        assert len(calls) == 1
+
+        seller_generations._cache[4] = (2, float("inf"))
+        await UserService.list_users(4, pagination, search)
+        assert len(calls) == 2
+
+    assert first.pagination.total_count == 1
+    assert page_cache_requests_total.values()[("hit",)] == hits_before + 1
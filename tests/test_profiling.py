@@ -0,0 +1,59 @@
+import time
+from collections import Counter
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.config.settings import app_config
+from app.utils.profiling import StackSampler, profile_store, to_collapsed
+
+
+def test_profiled_request_is_aggregated_and_served_by_debug_route(tmp_path):
+    """Test a request with the profiling header is profiled, written and retrievable"""
+    profile_store.clear()
+    with patch.object(app_config, "profiling_enabled", True), \
+         patch.object(app_config, "profiling_token", "secret"), \
+         patch.object(app_config, "profiling_output_dir", str(tmp_path)):
+        client = TestClient(create_app())
+
+        assert client.get("/health", headers={"x-profile": "secret"}).status_code == 200
+        assert any(tmp_path.iterdir())
+
+        forbidden = client.get("/debug/profiles")
+        assert forbidden.status_code == 403
+
+        summary = client.get("/debug/profiles", headers={"x-debug-token": "secret"})
+        assert summary.status_code == 200
+        assert summary.json()["data"][0]["route"] == "GET /health"
+
+        stacks = client.get(
+            "/debug/profiles/stacks",
+            params={"route": "GET /health", "format": "speedscope"},
+            headers={"x-debug-token": "secret"}
+        )
+        assert stacks.status_code == 200
+        assert stacks.json()["profiles"][0]["type"] == "sampled"
+    profile_store.clear()
+
+
+def test_profiling_routes_absent_when_disabled():
+    """Test the debug routes are not registered unless profiling is enabled"""
+    client = TestClient(create_app())
+    assert client.get("/debug/profiles").status_code == 404
+
+
+def test_collapsed_format():
+    """Test collapsed output lists each stack with its sample count"""
+    assert to_collapsed(Counter({"main;handler": 3})) == "main;handler 3\n"
+
+
+def test_shared_sampler_runs_one_profile_at_a_time():
+    """Test a second profile is refused while one runs and stacks are rooted at thread names"""
+    sampler = StackSampler(interval=0.001)
+    assert sampler.try_start()
+    assert not sampler.try_start()
+    time.sleep(0.02)
+    stacks = sampler.stop()
+
+    assert any(stack.startswith("thread MainThread;") for stack in stacks)
+    assert sampler.try_start()
+    sampler.stop()
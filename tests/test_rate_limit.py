@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.config.settings import app_config
+from app.main import create_app
+from app.core.rate_limit import RateLimitTier, TokenBucketLimiter
+from app.dependencies import rate_limit
+from app.dependencies.rate_limit import enforce_seller_rate_limit
+from app.services.users import UserService
+from app.utils.etag import user_etag
+
+
+def test_token_bucket_refills_over_time():
+    """Test buckets allow the burst, reject, then refill at the sustained rate"""
+    limiter = TokenBucketLimiter()
+    tier = RateLimitTier(name="test", rate=2.0, burst=2.0)
+
+    assert limiter.check("seller:1", tier, now=0.0).allowed is True
+    assert limiter.check("seller:1", tier, now=0.0).allowed is True
+    rejected = limiter.check("seller:1", tier, now=0.0)
+    assert rejected.allowed is False
+    assert rejected.retry_after == 1
+
+    assert limiter.check("seller:1", tier, now=0.5).allowed is True
+
+
+def test_idle_buckets_are_evicted():
+    """Test idle buckets are dropped when new keys arrive"""
+    limiter = TokenBucketLimiter(idle_ttl=10.0)
+    tier = RateLimitTier(name="test", rate=1.0, burst=1.0)
+
+    limiter.check("seller:1", tier, now=0.0)
+    limiter.check("seller:2", tier, now=20.0)
+
+    assert len(limiter) == 1
+
+
+def test_rate_limited_seller_gets_429_with_headers():
+    """Test exhausted sellers receive 429 in the standard envelope with Retry-After"""
+    tiers = {"standard": RateLimitTier(name="standard", rate=0.5, burst=1.0)}
+    with patch.object(app_config, "rate_limit_enabled", True), \
+         patch.object(rate_limit, "tiers", tiers), \
+         patch.object(rate_limit, "limiter", TokenBucketLimiter()):
+        client = TestClient(create_app())
+        client.get("/api/7/users/invalid-id")
+        response = client.get("/api/7/users/invalid-id")
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "2"
+    assert response.headers["ratelimit-remaining"] == "0"
+    assert response.json()["errors"][0]["code"] == "http_429"
+
+
+def test_headers_survive_routes_returning_their_own_response():
+    """Test a 304 (own Response object) still carries RateLimit-* headers"""
+    user_doc = {
+        "_id": ObjectId(), "seller_id": 7, "email": "ana@example.com", "first_name": "Ana", "last_name": "Lopez",
+        "phone_number": None, "is_active": True, "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 1)
+    }
+
+    async def _get(seller_id, user_id):
+        return user_doc
+
+    with patch.object(app_config, "rate_limit_enabled", True), \
+         patch.object(rate_limit, "limiter", TokenBucketLimiter()), \
+         patch.object(UserService, "get_user_by_id_fast", _get):
+        response = TestClient(create_app()).get(
+            f"/api/7/users/{user_doc['_id']}", headers={"If-None-Match": user_etag(user_doc)}
+        )
+
+    assert response.status_code == 304
+    assert "ratelimit-remaining" in response.headers
+
+
+def test_subject_rejection_does_not_spend_seller_tokens():
+    """Test the subject bucket is checked first and a seller rejection refunds the subject token"""
+    tier = RateLimitTier(name="standard", rate=0.001, burst=1.0)
+    limiter = TokenBucketLimiter()
+    limiter.check("sub:ana", tier)
+    request = SimpleNamespace(state=SimpleNamespace(user_id="ana"), scope={})
+
+    with patch.object(app_config, "rate_limit_enabled", True), \
+         patch.object(rate_limit, "tiers", {"standard": tier}), \
+         patch.object(rate_limit, "limiter", limiter), \
+         patch.object(app_config, "rate_limit_by_subject", True):
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(enforce_seller_rate_limit(request, 7))
+    assert exc_info.value.status_code == 429
+
+    assert limiter.check("seller:7", tier).allowed is True
+
+
+def test_subject_comes_from_authorizer_event_on_unprotected_routes():
+    """Test /api/ routes (not protected by the middleware) still key the subject on the authorizer "sub" """
+    tier = RateLimitTier(name="standard", rate=0.001, burst=1.0)
+    limiter = TokenBucketLimiter()
+    event = {"requestContext": {"authorizer": {"lambda": {"sub": "ana", "email": "ana@example.com"}}}}
+    request = SimpleNamespace(state=SimpleNamespace(), scope={"aws.event": event})
+
+    with patch.object(app_config, "rate_limit_enabled", True), \
+         patch.object(app_config, "rate_limit_by_subject", True), \
+         patch.object(rate_limit, "tiers", {"standard": tier}), \
+         patch.object(rate_limit, "limiter", limiter):
+        asyncio.run(enforce_seller_rate_limit(request, 7))
+
+    assert limiter.check("sub:ana", tier).allowed is False
@@ -0,0 +1,136 @@
+import pytest
+import time
+from datetime import datetime
+from unittest.mock import patch
+from app.core.generations import seller_generations
+from app.core.search_index import SearchIndexRegistry, SellerSearchIndex
+from app.models.users import UserModel
+
+
+def _user(first_name: str, last_name: str, is_active: bool = True) -> dict:
+    doc = UserModel.create_document(9, {
+        "email": f"{first_name}.{last_name}@example.com".lower(),
+        "first_name": first_name,
+        "last_name": last_name,
+        "is_active": is_active
+    })
+    doc["created_at"] = doc["updated_at"] = datetime(2024, 1, 1)
+    return doc
+
+
+def test_prefix_search_in_key_order_with_distinct_users():
+    """Test matches are distinct users in key order, filtered and paginated"""
+    index = SellerSearchIndex(9, generation=0)
+    ana, andres, bea = _user("Ana", "Lopez"), _user("Andrés", "Ruiz", is_active=False), _user("Bea", "Anaya")
+    index.add_sorted([ana, andres, bea])
+
+    page, total = index.search("an", None, 0, 10)
+    # "anaya" (Bea's last name) sorts before "andres"
+    assert [doc["first_name"] for doc in page] == ["Ana", "Bea", "Andrés"]
+    assert total == 3
+
+    page, total = index.search("an", True, 1, 1)
+    assert [doc["first_name"] for doc in page] == ["Bea"]
+    assert total == 2
+
+
+def test_upsert_replaces_keys():
+    """Test renames move the user to its new keys and keep the size estimate consistent"""
+    index = SellerSearchIndex(9, generation=0)
+    ana = _user("Ana", "Lopez")
+    index.add_sorted([ana])
+    size = index.size_bytes
+
+    index.upsert({**ana, "first_name": "Eva", "search_keys": UserModel.build_search_keys(ana["email"], "Eva", "Lopez")})
+
+    assert index.search("ana ", None, 0, 10)[1] == 0
+    assert index.search("eva", None, 0, 10)[1] == 1
+    assert index.size_bytes == size
+
+
+@pytest.mark.asyncio
+async def test_registry_serves_current_index_and_catches_up_stale_one():
+    """Test hits require a current index; a stale one is caught up from the users stamped since"""
+    registry = SearchIndexRegistry(sellers=[9], memory_budget_bytes=10 * 1024 * 1024)
+    index = SellerSearchIndex(9, generation=4)
+    index.add_sorted([_user("Ana", "Lopez")])
+    registry._indexes[9] = index
+
+    with patch.object(seller_generations, "_cache", {9: (4, float("inf"))}):
+        page, total = await registry.search(9, "ana", None, 0, 20)
+        assert total == 1
+
+    with patch.object(seller_generations, "_cache", {9: (7, float("inf"))}), \
+         patch.object(registry, "_schedule_build") as schedule_build:
+        assert await registry.search(9, "ana", None, 0, 20) is None
+        schedule_build.assert_called_once_with(9)
+    # Kept for the catch-up, not dropped
+    assert registry._indexes[9] is index
+
+    def _changes(seller_id, after, upto, projection):
+        assert (seller_id, after, upto) == (9, 4, 7)
+        return iter([_user("Anabel", "Diaz")])
+
+    with patch.object(seller_generations, "read_sync", lambda seller_id: 7), \
+         patch.object(seller_generations, "changes_sync", _changes):
+        assert registry._build_sync(9) is None
+
+    # Replaced by a caught-up copy: searches already scanning the old one are unaffected
+    assert registry._indexes[9].generation == 7
+    assert index.generation == 4 and len(index.docs) == 1
+    with patch.object(seller_generations, "_cache", {9: (7, float("inf"))}):
+        assert (await registry.search(9, "ana", None, 0, 20))[1] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_builds_back_off_exponentially():
+    """Test a failed or oversized build blocks rebuilds until its backoff expires, doubling each time"""
+    registry = SearchIndexRegistry(sellers=[9], memory_budget_bytes=10 * 1024 * 1024, build_backoff_seconds=30)
+
+    def _fail(seller_id):
+        raise ConnectionError("primary unavailable")
+
+    async def _run(func, *args):
+        return func(*args)
+
+    with patch("app.core.search_index.run_in_executor", _run), \
+         patch.object(registry, "_build_sync", _fail):
+        await registry._build(9)
+        assert registry._backoff[9][1] == 30
+        await registry._build(9)
+        assert registry._backoff[9][1] == 60
+
+    with patch.object(seller_generations, "_cache", {9: (7, float("inf"))}), \
+         patch("asyncio.create_task") as create_task:
+        assert await registry.search(9, "ana", None, 0, 20) is None
+        create_task.assert_not_called()
+
+    registry._backoff[9] = (0.0, 60)
+    with patch.object(seller_generations, "_cache", {9: (7, float("inf"))}), \
+         patch.object(registry, "_build", lambda seller_id: None), \
+         patch("asyncio.create_task") as create_task:
+        await registry.search(9, "ana", None, 0, 20)
+        create_task.assert_called_once()
+
+
+def test_unsettled_generation_builds_nothing():
+    """Test a generation whose newest write is settling is neither indexed nor caught up"""
+    registry = SearchIndexRegistry(sellers=[9], memory_budget_bytes=10 * 1024 * 1024)
+    unsettled = int(time.time()) << 32
+
+    with patch.object(seller_generations, "read_sync", lambda seller_id: unsettled), \
+         patch.object(UserModel, "get_collection", side_effect=AssertionError("no scan while settling")):
+        assert registry._build_sync(9) is None
+
+
+def test_registry_evicts_least_recently_used_tenant():
+    """Test the memory budget evicts whole sellers, least recently used first"""
+    registry = SearchIndexRegistry(sellers=[1, 2], memory_budget_bytes=1)
+    for seller_id in (1, 2):
+        index = SellerSearchIndex(seller_id, generation=0)
+        index.size_bytes = 1
+        registry._indexes[seller_id] = index
+
+    registry._enforce_budget(keep=2)
+
+    assert list(registry._indexes) == [2]
@@ -0,0 +1,44 @@
+import pytest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.config.settings import app_config
+from app.utils.timing import start_request_timings, reset_request_timings
+
+
+def test_server_timing_header_when_enabled():
+    """Test phases are reported in the Server-Timing header when enabled"""
+    with patch.object(app_config, "server_timing_header", True):
+        client = TestClient(create_app())
+        response = client.get("/health")
+
+    assert response.status_code == 200
+    header = response.headers["server-timing"]
+    for phase in ("auth;", "deps;", "handler;", "serialize;", "total;"):
+        assert phase in header
+
+
+def test_server_timing_header_disabled():
+    """Test no Server-Timing header is sent when disabled"""
+    with patch.object(app_config, "server_timing_header", False):
+        client = TestClient(create_app())
+        response = client.get("/health")
+
+    assert "server-timing" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_run_in_executor_records_queue_wait_and_execution():
+    """Test executor calls are split into db_queue and db phases"""
+    from app.core.database import run_in_executor
+
+    timings, token = start_request_timings()
+    try:
+        with patch("app.core.database.executor", ThreadPoolExecutor(max_workers=1)):
+            assert await run_in_executor(lambda x: x * 2, 21) == 42
+    finally:
+        reset_request_timings(token)
+
+    assert "db_queue" in timings.phases
+    assert "db" in timings.phases
@@ -0,0 +1,57 @@
+from datetime import datetime
+from unittest.mock import patch
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.models.users import UserModel
+from app.services.users import UserService
+
+
+def test_upsert_document_keeps_omitted_fields_on_update():
+    """Test omitted optional fields only get defaults on insert"""
+    now = datetime(2024, 1, 1)
+    update = UserModel.upsert_document({"first_name": "Ana", "last_name": "Lopez"}, "ana@example.com", now)
+
+    assert update["$setOnInsert"] == {
+        "created_at": now, "email_normalized": "ana@example.com", "phone_number": None, "is_active": True
+    }
+    assert update["$set"]["updated_at"] == now
+    assert "ana lopez" in update["$set"]["search_keys"]
+
+
+def _fake_upsert(calls: list, created: bool):
+    async def _upsert(seller_id, email, user_data):
+        calls.append((seller_id, email))
+        return {
+            "_id": ObjectId(),
+            "seller_id": seller_id,
+            "email": email,
+            "first_name": user_data.first_name,
+            "last_name": user_data.last_name,
+            "phone_number": None,
+            "is_active": True,
+            "created_at": datetime(2024, 1, 1),
+            "updated_at": datetime(2024, 1, 1)
+        }, created
+    return _upsert
+
+
+def test_upsert_route_reports_created_with_201():
+    """Test the route normalizes the path email and maps created to the status code"""
+    calls = []
+    body = {"first_name": "Ana", "last_name": "Lopez"}
+    with patch.object(UserService, "upsert_user_by_email_fast", _fake_upsert(calls, True)):
+        created = TestClient(create_app()).put("/api/3/users/by-email/Ana@Example.COM", json=body)
+    with patch.object(UserService, "upsert_user_by_email_fast", _fake_upsert(calls, False)):
+        updated = TestClient(create_app()).put("/api/3/users/by-email/ana@example.com", json=body)
+
+    assert created.status_code == 201 and created.json()["data"]["created"] is True
+    assert updated.status_code == 200 and updated.json()["data"]["created"] is False
+    assert calls[0] == (3, "Ana@example.com")
+
+
+def test_upsert_route_rejects_invalid_email():
+    """Test malformed emails get 400 before touching MongoDB"""
+    response = TestClient(create_app()).put("/api/3/users/by-email/not-an-email", json={"first_name": "Ana", "last_name": "Lopez"})
+
+    assert response.status_code == 400
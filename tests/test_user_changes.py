@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.services.users import UserService
+from app.utils.sync_token import decode_sync_token, encode_sync_token
+
+
+def _user(updated_at: datetime) -> dict:
+    return {
+        "_id": ObjectId(),
+        "seller_id": 2,
+        "email": "ana@example.com",
+        "first_name": "Ana",
+        "last_name": "Lopez",
+        "phone_number": None,
+        "is_active": False,
+        "created_at": updated_at,
+        "updated_at": updated_at
+    }
+
+
+def test_sync_token_round_trip():
+    """Test tokens restore the exact millisecond watermark"""
+    user_id = ObjectId()
+    updated_at = datetime(2024, 5, 6, 7, 8, 9, 123000)
+
+    since_updated_at, since_id = decode_sync_token(encode_sync_token(updated_at, user_id))
+
+    assert since_updated_at == updated_at.replace(tzinfo=timezone.utc)
+    assert since_id == user_id
+
+
+def test_changes_route_returns_next_token():
+    """Test the route pages with the watermark of the last change and is not captured by /users/{user_id}"""
+    last = _user(datetime(2024, 1, 2))
+    received = {}
+
+    async def _changes(seller_id, since, limit):
+        received.update(seller_id=seller_id, since=since, limit=limit)
+        return [_user(datetime(2024, 1, 1)), last], True
+
+    token = encode_sync_token(datetime(2023, 12, 31), ObjectId())
+    with patch.object(UserService, "list_user_changes", _changes):
+        response = TestClient(create_app()).get(f"/api/2/users/changes?since={token}&limit=2")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["data"]) == 2 and body["data"][1]["is_active"] is False
+    assert body["sync"] == {"next_token": encode_sync_token(last["updated_at"], last["_id"]), "has_more": True}
+    assert received["since"] == decode_sync_token(token) and received["limit"] == 2
+
+
+def test_changes_route_rejects_bad_token():
+    """Test malformed tokens get 400"""
+    response = TestClient(create_app()).get("/api/2/users/changes?since=not-a-token")
+
+    assert response.status_code == 400
@@ -0,0 +1,51 @@
+import re
+import pytest
+from app.dependencies.common import get_search_params
+from app.models.users import UserModel
+
+
+def test_search_keys_are_normalized():
+    """Test keys are casefolded, accent-free and include the full name"""
+    keys = UserModel.build_search_keys("Ana.Lopez@Example.com", "José", "Pérez  García")
+
+    assert keys == ["ana.lopez@example.com", "jose", "jose perez garcia", "perez garcia"]
+
+
+def test_create_document_stores_search_keys():
+    """Test new documents carry their search keys"""
+    doc = UserModel.create_document(1, {"email": "eva@example.com", "first_name": "Eva", "last_name": "Ruiz"})
+
+    assert doc["search_keys"] == ["eva", "eva ruiz", "eva@example.com", "ruiz"]
+
+
+def test_prefix_filter_matches_partial_input():
+    """Test the prefix filter is an anchored regex on normalized input"""
+    filter_doc = UserModel.build_search_filter(seller_id=1, search="  Pé", is_active=True)
+    pattern = re.compile(filter_doc["search_keys"]["$regex"])
+
+    assert filter_doc["seller_id"] == 1 and filter_doc["is_active"] is True
+    assert any(pattern.match(key) for key in UserModel.build_search_keys("x@y.com", "Ana", "Pérez"))
+    assert not any(pattern.match(key) for key in UserModel.build_search_keys("x@y.com", "Ana", "Lopez"))
+
+
+@pytest.mark.asyncio
+async def test_blank_search_term_is_no_search():
+    """Test a term that normalizes to nothing does not become a match-all "^" prefix"""
+    assert UserModel.build_search_filter(seller_id=1, search="  \u0301 ") == {"seller_id": 1}
+    assert (await get_search_params(search="   ", is_active=None)).search is None
+    assert (await get_search_params(search=" Pé ", is_active=None)).search == " Pé "
+
+
+def test_text_mode_keeps_legacy_filter():
+    """Test mode="text" still builds a $text query"""
+    assert UserModel.build_search_filter(seller_id=1, search="ana", mode="text")["$text"] == {"$search": "ana"}
+
+
+def test_update_document_recomputes_keys_from_current():
+    """Test renames recompute search_keys using the unchanged fields"""
+    current = {"email": "ana@example.com", "first_name": "Ana", "last_name": "Lopez"}
+
+    update = UserModel.update_document({"last_name": "Ortiz"}, current=current)["$set"]
+    assert update["search_keys"] == ["ana", "ana ortiz", "ana@example.com", "ortiz"]
+
+    assert "search_keys" not in UserModel.update_document({"is_active": False}, current=current)["$set"]